@@ -1,7 +1,23 @@
-from django.contrib import admin
-from .models import Student, Section, Lesson
+from django.contrib import admin, messages
+from .models import Student, Section, Lesson, GenerationJob
+from .jobs import enqueue_syllabus
 
 # Register your models here.
 admin.site.register(Student)
-admin.site.register(Section)
 admin.site.register(Lesson)
+admin.site.register(GenerationJob)
+
+
+@admin.register(Section)
+class SectionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'tutor', 'theme', 'number_of_lessons']
+    actions = ['generate_syllabi_action']
+
+    @admin.action(description="Generate syllabi for selected courses")
+    def generate_syllabi_action(self, request, queryset):
+        # Queued for the generation worker (apps/tutor/jobs.py) rather than run inside the admin request.
+        jobs = [enqueue_syllabus(section) for section in queryset.only('pk', 'tutor_id')]
+        self.message_user(
+            request, f"Syllabus generation queued for {len(jobs)} course(s); the generation worker will run it.",
+            messages.SUCCESS,
+        )
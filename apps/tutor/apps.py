@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TutorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tutor'
+
+    def ready(self):
+        import apps.tutor.signals
@@ -0,0 +1,175 @@
+"""
+Concurrent syllabus and lesson plan generation for many objects at once.
+
+Items are loaded and results saved on the calling thread; building each
+prompt (including its research context) and the AI request run together in
+a bounded thread pool, so throughput scales with the concurrency limit while
+database access stays on a single connection.
+"""
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from utils.syllabus import SyllabusHelper
+
+logger = logging.getLogger(__name__)
+
+
+class BatchResult:
+    """
+    Outcome of a batch run.
+
+    Attributes:
+        succeeded (list): Items whose output was saved.
+        failed (list): (item, error message) pairs for items that failed after all retries.
+        elapsed (float): Wall-clock seconds for the whole batch.
+    """
+
+    def __init__(self):
+        self.succeeded = []
+        self.failed = []
+        self.elapsed = 0.0
+
+    @property
+    def total(self):
+        return len(self.succeeded) + len(self.failed)
+
+    def summary(self):
+        return (f"{len(self.succeeded)} succeeded, {len(self.failed)} failed "
+                f"out of {self.total} in {self.elapsed:.1f}s")
+
+
+class RateLimiter:
+    """
+    Spaces out calls so that at most `rate` start per second, across threads.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def ask_with_retries(helper, prompt, retries=2, backoff=1.0, force=False):
+    """
+    Call `helper.ask`, retrying failures with exponential backoff.
+
+    Every attempt that reaches the API waits on `helper.rate_limiter`, so give
+    it a helper whose client does not retry on its own (`max_retries = 0`),
+    as `run_batch` does.
+
+    Args:
+        helper (AI): The helper to send the prompt with.
+        prompt (str): The prompt.
+        retries (int): Extra attempts after the first failure.
+        backoff (float): Seconds to wait before the first retry; doubled each time.
+        force (bool): Bypass the AI response cache.
+
+    Returns:
+        str: The response text.
+
+    Raises:
+        Exception: The last error if every attempt failed.
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = helper.ask(prompt, force=force)
+            if not response:
+                raise ValueError("Empty response from the model.")
+            return response
+        except Exception:
+            if attempt == retries:
+                raise
+            logger.warning("AI request failed (attempt %s of %s), retrying", attempt + 1, retries + 1)
+            time.sleep(backoff * 2 ** attempt)
+
+
+def run_batch(items, build_prompt, save, concurrency=None, rate_limit=None, retries=2, backoff=1.0,
+              force=False, progress=None, helper=None):
+    """
+    Generate text for many items concurrently.
+
+    `build_prompt` runs in the pool, so it must not query the database: load
+    what it needs with the items (e.g. `Section.objects.with_students()`).
+
+    Args:
+        items (iterable): The objects to generate for.
+        build_prompt (callable): item -> prompt, called on a pool thread.
+        save (callable): (item, response) -> None, called on this thread.
+        concurrency (int, optional): Maximum simultaneous AI requests.
+            Defaults to `settings.AI_BATCH_CONCURRENCY`.
+        rate_limit (float, optional): Maximum AI requests started per second;
+            responses served from the cache do not count.
+            Defaults to `settings.AI_BATCH_RATE_LIMIT`; None means unlimited.
+        retries (int): Extra attempts per item.
+        backoff (float): Initial retry delay in seconds.
+        force (bool): Bypass the AI response cache.
+        progress (callable, optional): Called as progress(done, total, item, error)
+            after each item finishes; `error` is None on success.
+        helper (AI, optional): The helper used to send prompts.
+
+    Returns:
+        BatchResult: What succeeded and what failed.
+    """
+    # Retries happen here, behind the rate limiter, not again inside the OpenAI client.
+    helper = copy.copy(helper or SyllabusHelper())
+    helper.max_retries = 0
+    concurrency = concurrency or settings.AI_BATCH_CONCURRENCY
+    rate_limit = rate_limit or getattr(settings, 'AI_BATCH_RATE_LIMIT', None)
+    helper.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+    result = BatchResult()
+    start = time.perf_counter()
+
+    def generate(item):
+        return ask_with_retries(helper, build_prompt(item), retries, backoff, force)
+
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(generate, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                response = future.result()
+                save(item, response)
+            except Exception as exc:
+                logger.exception("Batch generation failed for %s", item)
+                result.failed.append((item, str(exc)))
+                error = str(exc)
+            else:
+                result.succeeded.append(item)
+                error = None
+            if progress:
+                progress(result.total, len(items), item, error)
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def generate_syllabi(sections, **kwargs):
+    """
+    Generate and save syllabi for a queryset of sections concurrently.
+
+    Accepts the keyword arguments of `run_batch`.
+
+    Returns:
+        BatchResult: What succeeded and what failed.
+    """
+    helper = SyllabusHelper()
+
+    def save(section, syllabus):
+        section.syllabus = syllabus
+        section.save(update_fields=['syllabus'])
+
+    return run_batch(sections.with_students(), helper.build_prompt, save, helper=helper, **kwargs)
@@ -0,0 +1,224 @@
+"""
+Month calendar grid shared by the home page and the calendar partial.
+
+The grid always shows six Sunday-first weeks. Lesson counts for all 42 days
+are fetched with one aggregated query and filled in in memory.
+
+The counts for each (tutor, year, month) are cached. Every cache key carries
+a per-tutor version number, which the Lesson and Section signal handlers in
+signals.py bump, so any change to a tutor's lessons invalidates all of their
+months at once. The cache alias and timeout are `settings.CALENDAR_CACHE_ALIAS`
+and `settings.CALENDAR_CACHE_TIMEOUT`; with several web processes the alias
+must point at a shared cache for invalidation to reach all of them.
+"""
+from datetime import date, datetime, time, timedelta
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Lesson
+
+GRID_DAYS = 42
+CACHE_PREFIX = 'calendar:'
+
+
+def get_cache():
+    return caches[getattr(settings, 'CALENDAR_CACHE_ALIAS', 'default')]
+
+
+def _record(stat):
+    cache = get_cache()
+    key = CACHE_PREFIX + 'stats:' + stat
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats():
+    """
+    Returns the calendar cache hit / miss / invalidation counters.
+    """
+    cache = get_cache()
+    return {stat: cache.get(CACHE_PREFIX + 'stats:' + stat, 0) for stat in ('hits', 'misses', 'invalidations')}
+
+
+def reset_cache_stats():
+    get_cache().delete_many([CACHE_PREFIX + 'stats:' + stat for stat in ('hits', 'misses', 'invalidations')])
+
+
+def _tutor_version(tutor_id):
+    cache = get_cache()
+    key = f"{CACHE_PREFIX}version:{tutor_id}"
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a version evicted from the cache can never
+        # match summaries stored under an older value.
+        version = time_ns()
+        cache.add(key, version, timeout=None)
+        version = cache.get(key, version)
+    return version
+
+
+def invalidate_tutor(tutor_id):
+    """
+    Drop every cached month summary of a tutor.
+    """
+    cache = get_cache()
+    key = f"{CACHE_PREFIX}version:{tutor_id}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time_ns(), timeout=None)
+    _record('invalidations')
+
+
+def normalize_month(year, month):
+    """
+    Wrap months outside 1-12 into the previous or next year.
+
+    Returns:
+        tuple: (year, month)
+    """
+    year, month_index = divmod(year * 12 + month - 1, 12)
+    return year, month_index + 1
+
+
+def grid_start(year, month):
+    """
+    Returns the Sunday on or before the first day of the month.
+    """
+    first_of_month = date(year, month, 1)
+    return first_of_month - timedelta(days=(first_of_month.weekday() + 1) % 7)
+
+
+def local_day_range(start, end=None):
+    """
+    Aware datetime bounds covering whole local days, for index-friendly date filters.
+
+    Filtering on `date__range=local_day_range(day)` compares the raw column, so
+    the (section, date) index on Lesson can be used; `date__date` and
+    `date__year` wrap the column in a function and cannot.
+
+    Args:
+        start (date): First day, inclusive.
+        end (date, optional): Last day, exclusive. Defaults to the day after `start`.
+
+    Returns:
+        tuple: (first instant, last instant) in the current time zone.
+    """
+    tz = timezone.get_current_timezone()
+    end = end or start + timedelta(days=1)
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end, time.min), tz) - timedelta(microseconds=1),
+    )
+
+
+def lessons_on_day(tutor, day):
+    """
+    A tutor's lessons on one local day, in time order.
+    """
+    return Lesson.objects.filter(section__tutor=tutor, date__range=local_day_range(day)).order_by('date')
+
+
+def lesson_counts_by_day(tutor, start, end):
+    """
+    Count a tutor's lessons per local day with a single query.
+
+    Args:
+        tutor (User): Whose lessons to count.
+        start (date): First day, inclusive.
+        end (date): Last day, exclusive.
+
+    Returns:
+        dict: {date: number of lessons}
+    """
+    tz = timezone.get_current_timezone()
+    rows = (
+        Lesson.objects
+        .filter(section__tutor=tutor, date__range=local_day_range(start, end))
+        .annotate(day=TruncDate('date', tzinfo=tz))
+        .values('day')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return {row['day']: row['count'] for row in rows}
+
+
+def build_calendar_weeks(year, month, counts, today):
+    """
+    Lay out six weeks of day dicts for the template.
+
+    Args:
+        year (int): The displayed year.
+        month (int): The displayed month.
+        counts (dict): {date: number of lessons}, e.g. from `lesson_counts_by_day`.
+        today (date): The day to highlight.
+
+    Returns:
+        list: Six lists of seven dicts with `date`, `in_current_month`,
+        `is_today`, `has_event` and `lesson_count`.
+    """
+    start = grid_start(year, month)
+    weeks = []
+    for week in range(GRID_DAYS // 7):
+        week_days = []
+        for day in range(7):
+            current = start + timedelta(days=week * 7 + day)
+            lesson_count = counts.get(current, 0)
+            week_days.append({
+                'date': current,
+                'in_current_month': current.month == month,
+                'is_today': current == today,
+                'has_event': lesson_count > 0,
+                'lesson_count': lesson_count,
+            })
+        weeks.append(week_days)
+    return weeks
+
+
+def get_month_summary(tutor, year, month):
+    """
+    Lesson counts per day for the grid of one month, served from the cache when possible.
+
+    Returns:
+        dict: {date: number of lessons} for the 42 days shown for that month.
+    """
+    cache = get_cache()
+    key = (f"{CACHE_PREFIX}{tutor.pk}:{_tutor_version(tutor.pk)}:"
+           f"{timezone.get_current_timezone_name()}:{year}:{month}")
+    counts = cache.get(key)
+    if counts is not None:
+        _record('hits')
+        return counts
+
+    _record('misses')
+    start = grid_start(year, month)
+    counts = lesson_counts_by_day(tutor, start, start + timedelta(days=GRID_DAYS))
+    cache.set(key, counts, timeout=getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 60 * 60))
+    return counts
+
+
+def get_calendar_context(tutor, year, month, today=None):
+    """
+    Everything the calendar templates need for one month.
+
+    Returns:
+        dict: `year`, `month`, `calendar_month_name`, `calendar_weeks` and `today`.
+    """
+    today = today or timezone.localtime().date()
+    year, month = normalize_month(year, month)
+    counts = get_month_summary(tutor, year, month)
+    return {
+        'year': year,
+        'month': month,
+        'calendar_month_name': date(year, month, 1).strftime('%B %Y'),
+        'calendar_weeks': build_calendar_weeks(year, month, counts, today),
+        'today': today,
+    }
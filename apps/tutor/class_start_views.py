@@ -3,6 +3,7 @@ from .forms import (
     InlineStudentForm, SectionResourceFormSet
 )
 from .models import Section
+from .jobs import enqueue_syllabus
 from django.views import View
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -84,7 +85,7 @@ class StartSectionWizardView(LoginRequiredMixin, View):
                 if section_form.is_valid():
                     section = section_form.save()
                     section.students.set(section_form.cleaned_data['students'])
-                    section.generate_syllabus()
+                    enqueue_syllabus(section)
                     request.session.pop('section_id', None)
                     return redirect('section_detail', pk=section.pk)
 
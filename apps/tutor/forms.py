@@ -40,7 +40,7 @@ class SectionForm(forms.ModelForm):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         if user:
-            self.fields['students'].queryset = Student.objects.filter(tutor=user)
+            self.fields['students'].queryset = Student.objects.filter(tutor=user).order_by('name', 'id')
 
 
 class SectionStep1Form(forms.ModelForm):
@@ -70,7 +70,7 @@ class SectionStep3Form(forms.ModelForm):
         user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
         if user:
-            self.fields['students'].queryset = Student.objects.filter(tutor=user)
+            self.fields['students'].queryset = Student.objects.filter(tutor=user).order_by('name', 'id')
 
 
 class InlineStudentForm(forms.ModelForm):
@@ -0,0 +1,159 @@
+"""
+Background generation of syllabi and lesson plans.
+
+Views call `enqueue_syllabus` / `enqueue_lesson_plan`, which only insert a
+`GenerationJob` row and return immediately. The `run_generation_worker`
+management command runs a pool of worker processes that claim queued jobs and
+call the (slow) LLM helpers. The queue lives in the regular database, so no
+external broker is needed.
+"""
+import logging
+import time
+import traceback
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import GenerationJob
+
+logger = logging.getLogger(__name__)
+
+
+def _enqueue(tutor_id, kind, force=False, **target):
+    """
+    Create a queued job unless an identical one is already waiting.
+
+    Args:
+        tutor_id (int): The owner of the section or lesson.
+        kind (str): One of `GenerationJob.Kind`.
+        force (bool): Bypass the AI response cache when the job runs.
+        **target: Either `section=` or `lesson=`.
+
+    Returns:
+        GenerationJob: The new or already-pending job.
+    """
+    existing = GenerationJob.objects.filter(
+        kind=kind, status=GenerationJob.Status.QUEUED, **target
+    ).first()
+    if existing:
+        if force and not existing.force:
+            existing.force = True
+            existing.save(update_fields=['force'])
+        return existing
+    return GenerationJob.objects.create(tutor_id=tutor_id, kind=kind, force=force, **target)
+
+
+def enqueue_syllabus(section, force=False):
+    return _enqueue(section.tutor_id, GenerationJob.Kind.SYLLABUS, force=force, section=section)
+
+
+def enqueue_lesson_plan(lesson, force=False):
+    return _enqueue(lesson.section.tutor_id, GenerationJob.Kind.LESSON_PLAN, force=force, lesson=lesson)
+
+
+def enqueue_all_lesson_plans(section, force=False):
+    return _enqueue(section.tutor_id, GenerationJob.Kind.ALL_LESSON_PLANS, force=force, section=section)
+
+
+def latest_job(**target):
+    """
+    Return the most recent job for a section or lesson, or None.
+    """
+    return GenerationJob.objects.filter(**target).order_by('-created_at', '-id').first()
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to RUNNING and return it.
+
+    The conditional UPDATE means two workers can never claim the same job,
+    even on SQLite.
+
+    Returns:
+        GenerationJob or None: The claimed job, or None if the queue is empty.
+    """
+    while True:
+        job = GenerationJob.objects.filter(status=GenerationJob.Status.QUEUED).order_by('created_at', 'id').first()
+        if job is None:
+            return None
+        claimed = GenerationJob.objects.filter(pk=job.pk, status=GenerationJob.Status.QUEUED).update(
+            status=GenerationJob.Status.RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    """
+    Run a claimed job and record its outcome.
+
+    Any exception raised by the generator marks the job FAILED instead of
+    crashing the worker.
+    """
+    try:
+        job.run()
+    except Exception:
+        logger.exception("Generation job %s failed", job.pk)
+        job.status = GenerationJob.Status.FAILED
+        job.error = traceback.format_exc(limit=5)
+    else:
+        job.status = GenerationJob.Status.DONE
+        job.error = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def run_pending_jobs(limit=None):
+    """
+    Drain the queue in the current process.
+
+    Args:
+        limit (int, optional): Stop after this many jobs.
+
+    Returns:
+        int: The number of jobs processed.
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
+
+
+def requeue_stale_jobs(older_than):
+    """
+    Put RUNNING jobs whose worker died back on the queue.
+
+    Args:
+        older_than (timedelta): How long a job may run before it is considered stale.
+
+    Returns:
+        int: The number of jobs requeued.
+    """
+    cutoff = timezone.now() - older_than
+    return GenerationJob.objects.filter(
+        status=GenerationJob.Status.RUNNING, started_at__lt=cutoff
+    ).update(status=GenerationJob.Status.QUEUED, started_at=None)
+
+
+def worker_loop(poll_interval=2.0, once=False):
+    """
+    Entry point of a single worker process.
+
+    Args:
+        poll_interval (float): Seconds to sleep when the queue is empty.
+        once (bool): Exit as soon as the queue is empty instead of polling.
+    """
+    while True:
+        close_old_connections()
+        if run_pending_jobs() == 0:
+            if once:
+                return
+            time.sleep(poll_interval)
+
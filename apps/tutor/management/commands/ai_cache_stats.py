@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.response_cache import get_response_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit / miss counters of the AI response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Reset the counters after printing them.")
+        parser.add_argument('--clear', action='store_true', help="Delete every cached response.")
+
+    def handle(self, *args, **options):
+        cache = get_response_cache()
+        if cache is None:
+            raise CommandError("The AI response cache is disabled (settings.AI_RESPONSE_CACHE).")
+
+        stats = cache.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} bypasses={stats['bypasses']} "
+            f"hit_rate={stats['hit_rate']:.1%}"
+        )
+
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write("Counters reset.")
+        if options['clear']:
+            cache.clear()
+            self.stdout.write("Cache cleared.")
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from apps.tutor.batch import generate_syllabi
+from apps.tutor.models import Section
+
+
+class Command(BaseCommand):
+    help = "Generate syllabi for many sections concurrently."
+
+    def add_arguments(self, parser):
+        parser.add_argument('section_ids', nargs='*', type=int, help="Sections to generate (default: all).")
+        parser.add_argument('--tutor', help="Only sections of the tutor with this username.")
+        parser.add_argument('--missing-only', action='store_true', help="Skip sections that already have a syllabus.")
+        parser.add_argument('--concurrency', type=int, help="Maximum simultaneous AI requests.")
+        parser.add_argument('--retries', type=int, default=2, help="Extra attempts per section.")
+        parser.add_argument('--force', action='store_true', help="Bypass the AI response cache.")
+
+    def handle(self, *args, **options):
+        sections = Section.objects.all()
+        if options['section_ids']:
+            sections = sections.filter(pk__in=options['section_ids'])
+        if options['tutor']:
+            sections = sections.filter(tutor__username=options['tutor'])
+        if options['missing_only']:
+            sections = sections.filter(Q(syllabus__isnull=True) | Q(syllabus=''))
+        if not sections.exists():
+            raise CommandError("No matching sections.")
+
+        def progress(done, total, section, error):
+            status = self.style.SUCCESS("ok") if error is None else self.style.ERROR(f"failed: {error}")
+            self.stdout.write(f"[{done}/{total}] {section} (#{section.pk}) {status}")
+
+        result = generate_syllabi(
+            sections.order_by('pk'),
+            concurrency=options['concurrency'],
+            retries=options['retries'],
+            force=options['force'],
+            progress=progress,
+        )
+        self.stdout.write(result.summary())
@@ -0,0 +1,49 @@
+import multiprocessing
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.tutor.jobs import requeue_stale_jobs, worker_loop
+
+
+class Command(BaseCommand):
+    help = "Run a pool of worker processes that drain the syllabus / lesson plan generation queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="Number of worker processes.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Seconds to wait between polls when the queue is empty.")
+        parser.add_argument('--stale-after', type=int, default=600,
+                            help="Requeue RUNNING jobs older than this many seconds on startup.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue is empty instead of polling forever.")
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(timedelta(seconds=options['stale_after']))
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        workers = max(1, options['workers'])
+        if workers == 1:
+            worker_loop(options['poll_interval'], options['once'])
+            return
+
+        # Children inherit the parent's DB connection on fork; close it so each
+        # worker opens its own.
+        connections.close_all()
+        ctx = multiprocessing.get_context('fork')
+        processes = [
+            ctx.Process(target=worker_loop, args=(options['poll_interval'], options['once']), daemon=True)
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {workers} generation worker(s).")
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
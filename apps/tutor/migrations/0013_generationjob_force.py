@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutor', '0012_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='force',
+            field=models.BooleanField(default=False, help_text='Bypass the AI response cache.'),
+        ),
+    ]
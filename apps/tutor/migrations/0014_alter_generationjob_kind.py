@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutor', '0013_generationjob_force'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generationjob',
+            name='kind',
+            field=models.CharField(choices=[('syllabus', 'Syllabus'), ('lesson_plan', 'Lesson Plan'), ('all_lesson_plans', 'All Lesson Plans')], max_length=20),
+        ),
+    ]
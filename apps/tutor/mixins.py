@@ -0,0 +1,31 @@
+from django.views.generic.detail import SingleObjectMixin
+
+
+class TutorOwnedMixin(SingleObjectMixin):
+    """
+    Limits a single-object view to objects owned by the logged-in tutor.
+
+    The owner filter is part of the queryset, so the object is loaded and
+    checked with one query and other tutors' objects are a 404. The object is
+    cached on the view, so repeated `get_object()` calls do not query again.
+    Use after `LoginRequiredMixin`.
+
+    Attributes:
+        owner_field (str): Lookup from the model to its tutor, e.g. 'section__tutor'.
+        related_fields (tuple): Passed to `select_related`.
+    """
+    owner_field = 'tutor'
+    related_fields = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset().filter(**{self.owner_field: self.request.user})
+        if self.related_fields:
+            queryset = queryset.select_related(*self.related_fields)
+        return queryset
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_owned_object'):
+            self._owned_object = super().get_object()
+        return self._owned_object
@@ -1,8 +1,9 @@
 from django.db import models
+from django.db.models import Q, prefetch_related_objects
 from django.contrib.auth.models import User
 from utils.syllabus import SyllabusHelper
 from utils.lesson_plan import LessonPlanHelper
-from utils.lesson_plan import LessonPlanHelper
+from .batch import run_batch
 
 
 class Student(models.Model):
@@ -17,10 +18,31 @@ class Student(models.Model):
     current_grades = models.TextField(null=True, blank=True, verbose_name="Current Grade Level")
     weak_areas = models.TextField(null=True, blank=True, verbose_name="Identified Weak Areas")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tutor', 'name'], name='student_tutor_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class SectionQuerySet(models.QuerySet):
+
+    def with_students(self, *fields):
+        """
+        Load the students of every section in one extra query.
+
+        Args:
+            *fields: Student fields to load, e.g. 'name' for lists. All fields
+                are loaded when omitted, as prompt building needs them.
+        """
+        students = Student.objects.all()
+        if fields:
+            students = students.only('id', *fields)
+        return self.prefetch_related(models.Prefetch('students', queryset=students))
+
+
 class Section(models.Model):
     tutor = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=1000, verbose_name="Course Name")
@@ -43,23 +65,72 @@ class Section(models.Model):
     length_of_session = models.IntegerField(help_text="in minutes")
     syllabus = models.TextField(null=True, blank=True)
 
+    objects = SectionQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Course"
         verbose_name_plural = "Courses"
+        indexes = [
+            models.Index(fields=['tutor', 'name'], name='section_tutor_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
-    def generate_syllabus(self):
+    def generate_syllabus(self, force=False):
         self.syllabus = f"""📘 Syllabus for {self.name}
         ✨ Theme: {self.theme}
         🎯 Objective: {self.learning_objective}
         📚 Lessons: {self.number_of_lessons}
         ⏱️ Session Length: {self.length_of_session} minutes"""
         syllabus_helper = SyllabusHelper()
-        self.syllabus = syllabus_helper.generate(self)
+        self.syllabus = syllabus_helper.generate(self, force=force)
         self.save()
 
+    def stream_syllabus(self, force=False):
+        """
+        Generate the syllabus, yielding text as it arrives, and save the full
+        result once the model has finished.
+        """
+        chunks = []
+        for chunk in SyllabusHelper().generate_stream(self, force=force):
+            chunks.append(chunk)
+            yield chunk
+        self.syllabus = "".join(chunks) or None
+        self.save(update_fields=['syllabus'])
+
+    def generate_lesson_plans(self, force=False, **kwargs):
+        """
+        Generate plans for every lesson of the section in one concurrent run.
+
+        Session numbers, the student description, the research passages and
+        the syllabus are worked out once and shared by all prompts, and the
+        plans are written with a single bulk update. Extra keyword arguments go to `run_batch`.
+
+        Returns:
+            BatchResult: What succeeded and what failed.
+        """
+        section = Section.objects.with_students().get(pk=self.pk)
+        lessons = list(section.lessons.order_by('date', 'pk'))
+        session_numbers = {lesson.pk: i for i, lesson in enumerate(lessons, start=1)}
+
+        helper = LessonPlanHelper()
+        student_context = helper.build_student_context(section)
+        research = helper.build_research_context(section)
+        completed = []
+
+        def build_prompt(lesson):
+            return helper.build_prompt(section, session_numbers[lesson.pk], section.syllabus, student_context,
+                                       research)
+
+        def save(lesson, plan):
+            lesson.lesson_plan = plan
+            completed.append(lesson)
+
+        result = run_batch(lessons, build_prompt, save, force=force, helper=helper, **kwargs)
+        Lesson.objects.bulk_update(completed, ['lesson_plan'])
+        return result
+
     def student_names(self):
         return ", ".join(student.name for student in self.students.all())
 
@@ -78,15 +149,26 @@ class Lesson(models.Model):
 
     lesson_plan = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['section', 'date'], name='lesson_section_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.date.date()})"
 
-    def generate_lesson_plan(self):
+    def session_number(self):
+        if self.pk is None:
+            return 1
+        earlier = Q(date__lt=self.date) | Q(date=self.date, pk__lt=self.pk)
+        return self.section.lessons.filter(earlier).count() + 1
+
+    def generate_lesson_plan(self, force=False):
         section = self.section
+        prefetch_related_objects([section], 'students')
         syllabus_content = section.syllabus
 
-        lessons = list(section.lessons.order_by('date'))
-        session_number = lessons.index(self) + 1 if self in lessons else 1
+        session_number = self.session_number()
 
         self.lesson_plan = f"""📘 Lesson Plan for {self.name}
         📅 Date: {self.date.strftime('%B %d, %Y at %I:%M %p')}
@@ -95,10 +177,24 @@ class Lesson(models.Model):
         ⏱️ Duration: {self.duration} minutes
         """
         lesson_plan_helper = LessonPlanHelper()
-        self.lesson_plan = lesson_plan_helper.generate(section, session_number, syllabus_content)
+        self.lesson_plan = lesson_plan_helper.generate(section, session_number, syllabus_content, force=force)
         print(self.lesson_plan)
         self.save()
 
+    def stream_lesson_plan(self, force=False):
+        """
+        Generate the lesson plan, yielding text as it arrives, and save the
+        full result once the model has finished.
+        """
+        section = self.section
+        prefetch_related_objects([section], 'students')
+        chunks = []
+        for chunk in LessonPlanHelper().generate_stream(section, self.session_number(), section.syllabus, force=force):
+            chunks.append(chunk)
+            yield chunk
+        self.lesson_plan = "".join(chunks) or None
+        self.save(update_fields=['lesson_plan'])
+
 
 class Resource(models.Model):
     section = models.ForeignKey('Section', on_delete=models.CASCADE, null=True, blank=True)
@@ -111,3 +207,59 @@ class Resource(models.Model):
 
     def __str__(self):
         return self.name
+
+
+
+class GenerationJob(models.Model):
+    """
+    A queued request to generate a syllabus or lesson plan outside the request cycle.
+
+    Jobs are created by the views and drained by the `run_generation_worker`
+    management command (see apps/tutor/jobs.py).
+    """
+
+    class Kind(models.TextChoices):
+        SYLLABUS = 'syllabus', 'Syllabus'
+        LESSON_PLAN = 'lesson_plan', 'Lesson Plan'
+        ALL_LESSON_PLANS = 'all_lesson_plans', 'All Lesson Plans'
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    tutor = models.ForeignKey(User, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    section = models.ForeignKey(Section, on_delete=models.CASCADE, null=True, blank=True, related_name="generation_jobs")
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, blank=True, related_name="generation_jobs")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+    force = models.BooleanField(default=False, help_text="Bypass the AI response cache.")
+    error = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'created_at', 'id'], name='generationjob_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} job #{self.pk} ({self.status})"
+
+    @property
+    def is_pending(self):
+        return self.status in (self.Status.QUEUED, self.Status.RUNNING)
+
+    def run(self):
+        if self.kind == self.Kind.SYLLABUS:
+            self.section.generate_syllabus(force=self.force)
+        elif self.kind == self.Kind.ALL_LESSON_PLANS:
+            result = self.section.generate_lesson_plans(force=self.force)
+            if result.failed:
+                raise RuntimeError(f"Lesson plan generation: {result.summary()}")
+        else:
+            self.lesson.generate_lesson_plan(force=self.force)
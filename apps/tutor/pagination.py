@@ -0,0 +1,134 @@
+"""
+Keyset (cursor) pagination for the tutor's lists.
+
+Pages are cut with a WHERE on the ordering columns instead of an OFFSET, so
+every page costs the same, index-backed query however deep the tutor has
+scrolled. The cursor is the ordering values of the last row shown, encoded
+into an opaque URL-safe string.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Turn a cursor back into ordering values.
+
+    Returns:
+        list: One value per ordering field, or None if the cursor is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            return None
+        return [model._meta.get_field(name).to_python(value) for name, value in zip(ordering, values)]
+    except (ValueError, TypeError, ValidationError, FieldDoesNotExist):
+        return None
+
+
+def after(ordering, values):
+    """
+    Filter for rows strictly after `values` in ascending `ordering`.
+
+    For ('name', 'id') this is: name >= v0 AND (name > v0 OR (name = v0 AND id > v1)).
+    The redundant leading `name >= v0` lets the database start an index range
+    scan at the cursor; without it SQLite scans the whole section from the top.
+    """
+    condition = Q()
+    for i in range(len(ordering)):
+        equal = {name: value for name, value in zip(ordering[:i], values[:i])}
+        condition |= Q(**equal, **{f"{ordering[i]}__gt": values[i]})
+    return Q(**{f"{ordering[0]}__gte": values[0]}) & condition
+
+
+class KeysetPage:
+    """
+    One page of rows and the cursor of the next one.
+
+    Attributes:
+        items (list): The rows on this page.
+        next_cursor (str): Cursor for the following page, or None on the last page.
+    """
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def paginate_keyset(queryset, ordering, cursor=None, per_page=50):
+    """
+    Returns the page of `queryset` after `cursor`.
+
+    Args:
+        queryset (QuerySet): Rows to page through; its own ordering is replaced.
+        ordering (tuple): Ascending field names ending in a unique one, e.g. ('date', 'id').
+        cursor (str, optional): `next_cursor` of the previous page.
+        per_page (int): Rows per page.
+
+    Returns:
+        KeysetPage
+    """
+    values = decode_cursor(cursor, queryset.model, ordering)
+    queryset = queryset.order_by(*ordering)
+    if values is not None:
+        queryset = queryset.filter(after(ordering, values))
+
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, name) for name in ordering])
+    return KeysetPage(items, next_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    Keyset pagination for a ListView, with an infinite-scroll partial.
+
+    The first request renders `template_name`. Requests sent by htmx (or the
+    fallback script in partials/load_more.html) carry an `HX-Request` header
+    and get `partial_template_name`: just the next rows and a new
+    "load more" sentinel.
+
+    Attributes:
+        keyset_ordering (tuple): Ordering fields, the last one unique.
+        page_size (int): Rows per page.
+        partial_template_name (str): Template for the rows alone.
+    """
+    keyset_ordering = ('id',)
+    page_size = 50
+    partial_template_name = None
+
+    def is_partial(self):
+        return self.request.headers.get('HX-Request') == 'true'
+
+    def get_template_names(self):
+        if self.is_partial() and self.partial_template_name:
+            return [self.partial_template_name]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        page = paginate_keyset(self.object_list, self.keyset_ordering, self.request.GET.get('cursor'), self.page_size)
+        context = super().get_context_data(object_list=page.items, **kwargs)
+        context['page'] = page
+        if page.has_next:
+            query = self.request.GET.copy()
+            query['cursor'] = page.next_cursor
+            context['next_page_url'] = f"{self.request.path}?{query.urlencode()}"
+        return context
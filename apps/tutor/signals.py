@@ -0,0 +1,53 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .calendar_service import invalidate_tutor
+from .models import Lesson, Section
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def invalidate_calendar_for_lesson(sender, instance, update_fields=None, **kwargs):
+    """
+    Drop the cached calendar months of the lesson's tutor when a lesson is added, moved or removed.
+    """
+    if update_fields is not None and not {'date', 'section'} & set(update_fields):
+        return
+    if Lesson.section.is_cached(instance):
+        tutor_id = instance.section.tutor_id
+    else:
+        tutor_id = Section.objects.filter(pk=instance.section_id).values_list('tutor_id', flat=True).first()
+    if tutor_id is not None:
+        invalidate_tutor(tutor_id)
+
+
+@receiver(post_init, sender=Section)
+def remember_section_tutor(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred tutor_id is not loaded just for this.
+    instance._saved_tutor_id = instance.__dict__.get('tutor_id')
+
+
+@receiver(post_save, sender=Section)
+def invalidate_calendar_for_section(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Drop the cached calendar months of both tutors when a section changes hands.
+
+    Other saves (a new section has no lessons yet; renames and generated
+    syllabi don't show on the calendar) keep the cache.
+    """
+    previous = instance._saved_tutor_id
+    instance._saved_tutor_id = instance.tutor_id
+    if created or (update_fields is not None and not {'tutor', 'tutor_id'} & set(update_fields)):
+        return
+    if previous != instance.tutor_id:
+        invalidate_tutor(instance.tutor_id)
+        if previous is not None:
+            invalidate_tutor(previous)
+
+
+@receiver(post_delete, sender=Section)
+def invalidate_calendar_for_deleted_section(sender, instance, **kwargs):
+    """
+    Drop the cached calendar months of the section's tutor when a section is removed.
+    """
+    invalidate_tutor(instance.tutor_id)
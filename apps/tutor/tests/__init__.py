@@ -0,0 +1,10 @@
+from .job_tests import *
+from .streaming_tests import *
+from .client_tests import *
+from .cache_tests import *
+from .batch_tests import *
+from .calendar_tests import *
+from .query_plan_tests import *
+from .ownership_tests import *
+from .prefetch_tests import *
+from .pagination_tests import *
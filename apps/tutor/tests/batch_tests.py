@@ -0,0 +1,273 @@
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.tutor.models import Student, Section, Lesson, GenerationJob
+from apps.tutor.batch import generate_syllabi
+from apps.tutor.jobs import run_pending_jobs
+from apps.tutor.tests.fake_openai import FakeOpenAIServer
+from utils.syllabus import SyllabusHelper
+
+
+class SlowAI:
+    """
+    Stands in for AI.ask: sleeps like a network call and tracks peak concurrency.
+    """
+
+    def __init__(self, delay=0.2, fail_first=0, always_fail=()):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.always_fail = always_fail
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt, is_json=True, force=False):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if call <= self.fail_first or any(name in prompt for name in self.always_fail):
+                raise RuntimeError("provider down")
+            return f"Syllabus for {prompt.split('subject of:')[1].split()[0]}"
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@override_settings(AI_RESPONSE_CACHE={'BACKEND': None}, RAG={'PROMPT_CONTEXT': False})
+class BatchSyllabusTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass', is_staff=True, is_superuser=True)
+        student = Student.objects.create(tutor=self.user, name='Alice')
+        self.sections = []
+        for i in range(8):
+            section = Section.objects.create(
+                tutor=self.user, name=f'Course {i}', theme=f'Topic{i}',
+                number_of_lessons=4, length_of_session=60,
+            )
+            section.students.add(student)
+            self.sections.append(section)
+
+    def test_generates_every_section(self):
+        with mock.patch('utils.AI.AI.ask', new=SlowAI(delay=0)):
+            result = generate_syllabi(Section.objects.all())
+        self.assertEqual(len(result.succeeded), 8)
+        for section in Section.objects.all():
+            self.assertEqual(section.syllabus, f"Syllabus for {section.theme}")
+
+    def test_throughput_scales_with_concurrency(self):
+        ai = SlowAI(delay=0.2)
+        with mock.patch('utils.AI.AI.ask', new=ai):
+            result = generate_syllabi(Section.objects.all(), concurrency=4)
+        self.assertEqual(ai.peak, 4)
+        # 8 calls of 0.2s each take ~1.6s sequentially, ~0.4s with 4 at a time.
+        self.assertLess(result.elapsed, 1.0)
+
+    def test_concurrency_limit_is_respected(self):
+        ai = SlowAI(delay=0.05)
+        with mock.patch('utils.AI.AI.ask', new=ai):
+            generate_syllabi(Section.objects.all(), concurrency=2)
+        self.assertEqual(ai.peak, 2)
+
+    def test_prompts_are_built_in_the_pool(self):
+        def slow_lookup(query):
+            time.sleep(0.2)
+            return ""
+
+        with mock.patch('utils.syllabus.research_context', side_effect=slow_lookup), \
+                mock.patch('utils.AI.AI.ask', new=SlowAI(delay=0)):
+            result = generate_syllabi(Section.objects.all(), concurrency=8)
+        self.assertEqual(len(result.succeeded), 8)
+        # Eight research lookups of 0.2s each would take 1.6s one after another.
+        self.assertLess(result.elapsed, 0.8)
+
+    def test_failed_items_are_retried(self):
+        ai = SlowAI(delay=0, fail_first=2)
+        with mock.patch('utils.AI.AI.ask', new=ai):
+            result = generate_syllabi(Section.objects.all(), concurrency=1, retries=2, backoff=0)
+        self.assertEqual(len(result.succeeded), 8)
+        self.assertEqual(ai.calls, 10)
+
+    def test_client_does_not_retry_under_the_batch(self):
+        clients = []
+
+        def ask(helper, prompt, is_json=True, force=False):
+            clients.append(helper.get_client()[0])
+            return "Syllabus"
+
+        with FakeOpenAIServer() as server, override_settings(**server.provider_settings()):
+            with mock.patch('utils.AI.AI.ask', autospec=True, side_effect=ask):
+                generate_syllabi(Section.objects.all())
+            self.assertEqual(SyllabusHelper().get_client()[0].max_retries, settings.AI_CLIENT['max_retries'])
+        self.assertEqual({client.max_retries for client in clients}, {0})
+
+    def test_failure_does_not_stop_batch(self):
+        ai = SlowAI(delay=0, always_fail=('Topic3',))
+        progress = []
+        with mock.patch('utils.AI.AI.ask', new=ai):
+            result = generate_syllabi(
+                Section.objects.all(), retries=1, backoff=0,
+                progress=lambda done, total, section, error: progress.append((done, total, error)),
+            )
+        self.assertEqual(len(result.succeeded), 7)
+        self.assertEqual([section.theme for section, error in result.failed], ['Topic3'])
+        self.assertEqual([done for done, total, error in progress], list(range(1, 9)))
+        self.assertIsNone(Section.objects.get(theme='Topic3').syllabus)
+
+    def test_management_command(self):
+        Section.objects.filter(pk=self.sections[0].pk).update(syllabus='Existing')
+        out = StringIO()
+        with mock.patch('utils.AI.AI.ask', new=SlowAI(delay=0)):
+            call_command('generate_syllabi', '--missing-only', '--concurrency', '3', stdout=out)
+        self.assertIn('[7/7]', out.getvalue())
+        self.assertIn('7 succeeded, 0 failed out of 7', out.getvalue())
+        self.assertEqual(Section.objects.get(pk=self.sections[0].pk).syllabus, 'Existing')
+
+    def test_admin_action(self):
+        client = Client()
+        client.login(username='tutor', password='testpass')
+        with mock.patch('utils.AI.AI.ask') as ask:
+            response = client.post(reverse('admin:tutor_section_changelist'), {
+                'action': 'generate_syllabi_action',
+                '_selected_action': [self.sections[0].pk, self.sections[1].pk],
+            }, follow=True)
+        ask.assert_not_called()
+        self.assertContains(response, 'queued for 2 course(s)')
+        self.assertEqual(GenerationJob.objects.filter(kind=GenerationJob.Kind.SYLLABUS).count(), 2)
+
+        with mock.patch('utils.AI.AI.ask', new=SlowAI(delay=0)):
+            run_pending_jobs()
+        self.assertEqual(Section.objects.exclude(syllabus=None).count(), 2)
+
+
+def plan_for_session(prompt, is_json=True, force=False):
+    return "Plan for session " + re.search(r"Session (\d+) of the following course", prompt).group(1)
+
+
+@override_settings(AI_RESPONSE_CACHE={'BACKEND': None}, RAG={'PROMPT_CONTEXT': False})
+class BatchLessonPlanTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Linear equations',
+            number_of_lessons=12, length_of_session=60, syllabus='The syllabus',
+        )
+        for name in ('Alice', 'Bob'):
+            self.section.students.add(Student.objects.create(tutor=self.user, name=name))
+
+    def add_lessons(self, count, section=None):
+        start = timezone.now()
+        # Create them newest first so session order differs from pk order.
+        return [
+            Lesson.objects.create(
+                section=section or self.section, date=start + timedelta(days=count - i), name=f'Lesson {count - i}',
+                topic='Topic', grade_level='9', duration=60,
+            )
+            for i in range(count)
+        ]
+
+    def test_plans_follow_date_order(self):
+        self.add_lessons(5)
+        with mock.patch('utils.AI.AI.ask', side_effect=plan_for_session) as ask:
+            result = self.section.generate_lesson_plans()
+        self.assertEqual(len(result.succeeded), 5)
+        self.assertEqual(ask.call_count, 5)
+        for session, lesson in enumerate(self.section.lessons.order_by('date'), start=1):
+            self.assertEqual(lesson.lesson_plan, f"Plan for session {session}")
+            self.assertEqual(lesson.session_number(), session)
+        prompt = ask.call_args[0][0]
+        self.assertIn('The syllabus', prompt)
+        self.assertEqual(prompt.count('Student '), 2)
+
+    def test_research_context_is_looked_up_once(self):
+        self.add_lessons(4)
+        context = "\n### Research on teaching and learning (use where relevant):\n[1] (spacing.pdf) Space it out.\n"
+        with mock.patch('utils.lesson_plan.research_context', return_value=context) as lookup, \
+                mock.patch('utils.AI.AI.ask', side_effect=plan_for_session) as ask:
+            self.section.generate_lesson_plans()
+        lookup.assert_called_once()
+        self.assertIn('Linear equations', lookup.call_args[0][0])
+        self.assertTrue(all('[1] (spacing.pdf) Space it out.' in call[0][0] for call in ask.call_args_list))
+
+    def test_query_count_does_not_grow_with_lessons(self):
+        other = Section.objects.create(
+            tutor=self.user, name='Geometry', theme='Shapes', number_of_lessons=12, length_of_session=60,
+        )
+        other.students.set(self.section.students.all())
+        self.add_lessons(3)
+        self.add_lessons(12, section=other)
+
+        counts = []
+        for section in (self.section, other):
+            with mock.patch('utils.AI.AI.ask', side_effect=plan_for_session):
+                with CaptureQueriesContext(connection) as queries:
+                    section.generate_lesson_plans()
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Lesson.objects.filter(lesson_plan=None).exists())
+
+    def test_rate_limit_spaces_requests(self):
+        self.add_lessons(6)
+        with FakeOpenAIServer(reply="A plan") as server, override_settings(**server.provider_settings()):
+            result = self.section.generate_lesson_plans(rate_limit=20, concurrency=6)
+        self.assertEqual(len(server.requests), 6)
+        # Six starts at most 20 per second need at least 5 intervals of 50ms.
+        self.assertGreaterEqual(result.elapsed, 0.25)
+
+    def test_cached_responses_skip_the_rate_limit(self):
+        self.add_lessons(6)
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        cache_settings = override_settings(AI_RESPONSE_CACHE={
+            'BACKEND': 'utils.response_cache.SQLiteBackend',
+            'OPTIONS': {'path': f"{tmpdir}/cache.sqlite3"},
+        })
+        with FakeOpenAIServer(reply="A plan") as server, override_settings(**server.provider_settings()), \
+                cache_settings:
+            self.section.generate_lesson_plans(concurrency=6)
+            result = self.section.generate_lesson_plans(rate_limit=2, concurrency=6)
+        self.assertEqual(len(server.requests), 6)
+        self.assertEqual(len(result.succeeded), 6)
+        # Charging the limiter for the six hits would take 2.5s at 2 per second.
+        self.assertLess(result.elapsed, 1.0)
+
+    def test_session_number_is_a_single_query(self):
+        lessons = self.add_lessons(4)
+        with self.assertNumQueries(1):
+            self.assertEqual(lessons[0].session_number(), 4)
+
+    def test_view_queues_job(self):
+        self.add_lessons(3)
+        client = Client()
+        client.login(username='tutor', password='testpass')
+        response = client.post(reverse('generate_all_lesson_plans', args=[self.section.pk]))
+        self.assertRedirects(response, reverse('lesson_list', args=[self.section.pk]))
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.kind, GenerationJob.Kind.ALL_LESSON_PLANS)
+
+        with mock.patch('utils.AI.AI.ask', side_effect=plan_for_session):
+            run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertFalse(self.section.lessons.filter(lesson_plan=None).exists())
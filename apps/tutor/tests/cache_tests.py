@@ -0,0 +1,196 @@
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from apps.tutor.models import Section, GenerationJob
+from apps.tutor.tests.fake_openai import FakeOpenAIServer
+from utils.AI import AI
+from utils.response_cache import (
+    make_key, DjangoCacheBackend, SQLiteBackend, FileBackend, get_response_cache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+class ResponseCacheBackendTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def backends(self, ttl=60, max_entries=10):
+        return {
+            'django': DjangoCacheBackend(ttl, max_entries),
+            'sqlite': SQLiteBackend(ttl, max_entries, path=f"{self.tmpdir}/cache.sqlite3"),
+            'file': FileBackend(ttl, max_entries, path=f"{self.tmpdir}/files"),
+        }
+
+    def test_make_key_depends_on_every_part(self):
+        key = make_key('model', 'system', 'prompt')
+        self.assertEqual(key, make_key('model', 'system', 'prompt'))
+        self.assertNotEqual(key, make_key('other', 'system', 'prompt'))
+        self.assertNotEqual(key, make_key('model', 'other', 'prompt'))
+        self.assertNotEqual(key, make_key('model', 'system', 'other'))
+
+    def test_roundtrip_and_stats(self):
+        for name, backend in self.backends().items():
+            with self.subTest(backend=name):
+                backend.clear()
+                backend.reset_stats()
+                self.assertIsNone(backend.get('a'))
+                backend.set('a', 'response')
+                self.assertEqual(backend.get('a'), 'response')
+                backend.incr_stat('hits')
+                backend.incr_stat('hits')
+                backend.incr_stat('misses')
+                self.assertEqual(backend.get_stats(), {'hits': 2, 'misses': 1, 'bypasses': 0})
+                backend.clear()
+                self.assertIsNone(backend.get('a'))
+
+    def test_sqlite_hits_do_not_write(self):
+        clock = FakeClock()
+        with mock.patch('utils.response_cache.time.time', clock):
+            backend = SQLiteBackend(60, 10, path=f"{self.tmpdir}/cache.sqlite3")
+            backend.set('a', 'A')
+            conn = backend.connect()
+            changes = conn.total_changes
+            for _ in range(5):
+                self.assertEqual(backend.get('a'), 'A')
+                backend.incr_stat('hits')
+            self.assertEqual(conn.total_changes, changes)
+
+            # Held counts go in with the next write; old entries are touched again.
+            backend.set('b', 'B')
+            self.assertEqual(backend.get_stats()['hits'], 5)
+            clock.now += 100
+            backend.get('a')
+            self.assertEqual(conn.total_changes, changes + 2)
+
+    def test_file_counters_stay_small(self):
+        backend = FileBackend(60, 10, path=f"{self.tmpdir}/files")
+        threads = [threading.Thread(target=lambda: [backend.incr_stat('hits') for _ in range(50)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(backend.get_stats()['hits'], 200)
+        self.assertEqual(os.path.getsize(backend.stat_path('hits')), len('200'))
+
+        # Counters in the old one-byte-per-event format carry on from their count.
+        with open(backend.stat_path('misses'), 'wb') as f:
+            f.write(b'...')
+        backend.incr_stat('misses')
+        self.assertEqual(backend.get_stats()['misses'], 4)
+        backend.reset_stats()
+        self.assertEqual(backend.get_stats(), {'hits': 0, 'misses': 0, 'bypasses': 0})
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        with mock.patch('utils.response_cache.time.time', clock):
+            backends = self.backends(ttl=100)
+            del backends['django']  # expiry is handled by Django's cache
+            for name, backend in backends.items():
+                with self.subTest(backend=name):
+                    backend.set('a', 'response')
+                    self.assertEqual(backend.get('a'), 'response')
+                    clock.now += 200
+                    self.assertIsNone(backend.get('a'))
+
+    def test_least_recently_used_is_evicted(self):
+        clock = FakeClock()
+        with mock.patch('utils.response_cache.time.time', clock):
+            backends = self.backends(ttl=1000, max_entries=2)
+            del backends['django']
+            for name, backend in backends.items():
+                with self.subTest(backend=name):
+                    backend.set('a', 'A')
+                    backend.set('b', 'B')
+                    clock.now += 100  # past SQLiteBackend's touch_interval
+                    backend.get('a')
+                    backend.set('c', 'C')
+                    self.assertEqual(backend.get('a'), 'A')
+                    self.assertIsNone(backend.get('b'))
+                    self.assertEqual(backend.get('c'), 'C')
+
+
+class AIResponseCacheTest(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_settings = override_settings(AI_RESPONSE_CACHE={
+            'BACKEND': 'utils.response_cache.SQLiteBackend',
+            'TTL': 3600,
+            'MAX_ENTRIES': 100,
+            'OPTIONS': {'path': f"{self.tmpdir}/cache.sqlite3"},
+        })
+        self.cache_settings.enable()
+
+    def tearDown(self):
+        self.cache_settings.disable()
+        shutil.rmtree(self.tmpdir)
+
+    def test_identical_prompt_is_served_from_cache(self):
+        with FakeOpenAIServer(reply="A syllabus") as server:
+            with override_settings(**server.provider_settings()):
+                self.assertEqual(AI().ask("same prompt"), "A syllabus")
+                self.assertEqual(AI().ask("same prompt"), "A syllabus")
+                AI().ask("another prompt")
+        self.assertEqual(len(server.requests), 2)
+        stats = get_response_cache().stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertAlmostEqual(stats['hit_rate'], 1 / 3)
+
+    def test_force_bypasses_cache(self):
+        with FakeOpenAIServer(reply="A syllabus") as server:
+            with override_settings(**server.provider_settings()):
+                AI().ask("same prompt")
+                server.reply = "A better syllabus"
+                self.assertEqual(AI().ask("same prompt", force=True), "A better syllabus")
+                # The forced response replaces the cached one.
+                self.assertEqual(AI().ask("same prompt"), "A better syllabus")
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(get_response_cache().stats()['bypasses'], 1)
+
+    def test_stream_uses_cache(self):
+        with FakeOpenAIServer(reply="one two three") as server:
+            with override_settings(**server.provider_settings()):
+                self.assertEqual(list(AI().stream("prompt")), ["one", " two", " three"])
+                self.assertEqual(list(AI().stream("prompt")), ["one two three"])
+                self.assertEqual(AI().ask("prompt"), "one two three")
+        self.assertEqual(len(server.requests), 1)
+
+    def test_stats_command(self):
+        get_response_cache().backend.incr_stat('hits')
+        out = StringIO()
+        call_command('ai_cache_stats', '--reset', stdout=out)
+        self.assertIn('hits=1 misses=0', out.getvalue())
+        self.assertEqual(get_response_cache().stats()['hits'], 0)
+
+    def test_force_regenerate_button_queues_forced_job(self):
+        user = User.objects.create_user(username='tutor', password='testpass')
+        section = Section.objects.create(
+            tutor=user, name='Algebra', theme='Linear equations', number_of_lessons=4, length_of_session=60,
+        )
+        client = Client()
+        client.login(username='tutor', password='testpass')
+        client.post(reverse('generate_syllabus', args=[section.pk]))
+        self.assertFalse(GenerationJob.objects.get().force)
+        client.post(reverse('generate_syllabus', args=[section.pk]), {'force': '1'})
+        self.assertTrue(GenerationJob.objects.get().force)
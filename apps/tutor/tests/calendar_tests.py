@@ -0,0 +1,181 @@
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.tutor.models import Section, Lesson
+from apps.tutor.calendar_service import (
+    normalize_month, grid_start, get_calendar_context, get_cache_stats, reset_cache_stats, lessons_on_day,
+)
+
+
+class CalendarServiceTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        other = User.objects.create_user(username='other', password='testpass')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Linear equations', number_of_lessons=4, length_of_session=60,
+        )
+        self.other_section = Section.objects.create(
+            tutor=other, name='Other', theme='Other', number_of_lessons=4, length_of_session=60,
+        )
+
+    def add_lesson(self, when, section=None):
+        return Lesson.objects.create(
+            section=section or self.section, date=timezone.make_aware(when), name='Lesson',
+            topic='Topic', grade_level='9', duration=60,
+        )
+
+    def test_normalize_month(self):
+        self.assertEqual(normalize_month(2025, 5), (2025, 5))
+        self.assertEqual(normalize_month(2025, 0), (2024, 12))
+        self.assertEqual(normalize_month(2025, 13), (2026, 1))
+
+    def test_grid_starts_on_sunday(self):
+        self.assertEqual(grid_start(2025, 6), date(2025, 6, 1))  # June 1st 2025 is a Sunday
+        self.assertEqual(grid_start(2025, 5), date(2025, 4, 27))
+
+    def test_days_with_lessons_are_flagged(self):
+        self.add_lesson(datetime(2025, 5, 7, 9))
+        self.add_lesson(datetime(2025, 5, 7, 15))
+        self.add_lesson(datetime(2025, 5, 20, 9))
+        self.add_lesson(datetime(2025, 5, 21, 9), section=self.other_section)
+
+        context = get_calendar_context(self.user, 2025, 5, today=date(2025, 5, 20))
+        days = {day['date']: day for week in context['calendar_weeks'] for day in week}
+
+        self.assertEqual(len(context['calendar_weeks']), 6)
+        self.assertEqual(context['calendar_month_name'], 'May 2025')
+        self.assertEqual(days[date(2025, 5, 7)]['lesson_count'], 2)
+        self.assertTrue(days[date(2025, 5, 20)]['has_event'])
+        self.assertTrue(days[date(2025, 5, 20)]['is_today'])
+        self.assertFalse(days[date(2025, 5, 21)]['has_event'])
+        self.assertFalse(days[date(2025, 4, 27)]['in_current_month'])
+
+    def test_calendar_is_one_query(self):
+        for day in range(1, 29):
+            self.add_lesson(datetime(2025, 2, day, 10))
+        with self.assertNumQueries(1):
+            get_calendar_context(self.user, 2025, 2)
+
+    def test_lessons_on_day_covers_whole_local_day(self):
+        first = self.add_lesson(datetime(2025, 5, 7, 0, 0))
+        last = self.add_lesson(datetime(2025, 5, 7, 23, 59, 59))
+        self.add_lesson(datetime(2025, 5, 8, 0, 0))
+        self.add_lesson(datetime(2025, 5, 7, 12), section=self.other_section)
+        self.assertEqual(list(lessons_on_day(self.user, date(2025, 5, 7))), [first, last])
+
+    def test_month_summary_is_cached(self):
+        self.add_lesson(datetime(2025, 5, 7, 9))
+        reset_cache_stats()
+        get_calendar_context(self.user, 2025, 5)
+        with self.assertNumQueries(0):
+            context = get_calendar_context(self.user, 2025, 5)
+        days = {day['date']: day for week in context['calendar_weeks'] for day in week}
+        self.assertEqual(days[date(2025, 5, 7)]['lesson_count'], 1)
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1, 'invalidations': 0})
+
+    def test_lesson_changes_invalidate_summary(self):
+        get_calendar_context(self.user, 2025, 5)
+        lesson = self.add_lesson(datetime(2025, 5, 7, 9))
+        context = get_calendar_context(self.user, 2025, 5)
+        self.assertEqual(context['calendar_weeks'][1][3]['lesson_count'], 1)
+
+        lesson.date = timezone.make_aware(datetime(2025, 5, 8, 9))
+        lesson.save()
+        context = get_calendar_context(self.user, 2025, 5)
+        self.assertEqual(context['calendar_weeks'][1][3]['lesson_count'], 0)
+        self.assertEqual(context['calendar_weeks'][1][4]['lesson_count'], 1)
+
+        lesson.delete()
+        context = get_calendar_context(self.user, 2025, 5)
+        self.assertEqual(context['calendar_weeks'][1][4]['lesson_count'], 0)
+
+    def test_section_delete_invalidates_summary(self):
+        self.add_lesson(datetime(2025, 5, 7, 9))
+        self.assertEqual(get_calendar_context(self.user, 2025, 5)['calendar_weeks'][1][3]['lesson_count'], 1)
+        self.section.delete()
+        self.assertEqual(get_calendar_context(self.user, 2025, 5)['calendar_weeks'][1][3]['lesson_count'], 0)
+
+    def test_section_changing_hands_invalidates_both_tutors(self):
+        self.add_lesson(datetime(2025, 5, 7, 9))
+        other = self.other_section.tutor
+        get_calendar_context(self.user, 2025, 5)
+        get_calendar_context(other, 2025, 5)
+        self.section.tutor = other
+        self.section.save()
+        self.assertEqual(get_calendar_context(self.user, 2025, 5)['calendar_weeks'][1][3]['lesson_count'], 0)
+        self.assertEqual(get_calendar_context(other, 2025, 5)['calendar_weeks'][1][3]['lesson_count'], 1)
+
+    def test_other_section_saves_keep_summary(self):
+        self.add_lesson(datetime(2025, 5, 7, 9))
+        get_calendar_context(self.user, 2025, 5)
+        reset_cache_stats()
+        self.section.syllabus = 'Generated'
+        self.section.save(update_fields=['syllabus'])
+        section = Section.objects.get(pk=self.section.pk)
+        section.name = 'Renamed'
+        section.save()
+        with self.assertNumQueries(0):
+            get_calendar_context(self.user, 2025, 5)
+        self.assertEqual(get_cache_stats()['invalidations'], 0)
+
+    def test_other_tutors_changes_keep_summary(self):
+        get_calendar_context(self.user, 2025, 5)
+        self.add_lesson(datetime(2025, 5, 7, 9), section=self.other_section)
+        with self.assertNumQueries(0):
+            get_calendar_context(self.user, 2025, 5)
+
+
+class CalendarViewTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Linear equations', number_of_lessons=4, length_of_session=60,
+        )
+        self.client.login(username='tutor', password='testpass')
+
+    def add_lessons(self, days):
+        for day in days:
+            Lesson.objects.create(
+                section=self.section, date=timezone.make_aware(datetime(2025, 3, day, 10)), name='Lesson',
+                topic='Topic', grade_level='9', duration=60,
+            )
+
+    def test_home_query_count_is_constant(self):
+        url = reverse('home') + '?year=2025&month=3&date=2025-03-10'
+        self.add_lessons([10])
+        # session, user, sections, their students, calendar counts, lessons for the selected day
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        self.add_lessons(range(1, 29))
+        with self.assertNumQueries(6):
+            response = self.client.get(url)
+        self.assertContains(response, 'has-event')
+
+        # Unchanged month: the calendar counts come from the cache.
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertContains(response, 'has-event')
+
+    def test_home_wraps_month(self):
+        response = self.client.get(reverse('home') + '?year=2025&month=13')
+        self.assertEqual(response.context['calendar_month_name'], 'January 2026')
+
+    def test_calendar_partial(self):
+        self.add_lessons([5])
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('calendar_partial') + '?year=2025&month=3')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'event-dot', count=1)
+        self.assertContains(response, '?year=2025&month=3&date=2025-03-05')
@@ -0,0 +1,45 @@
+from django.test import TestCase, override_settings
+
+from apps.tutor.tests.fake_openai import FakeOpenAIServer
+from utils.AI import AI
+from utils.clients import get_client, reset_clients
+from utils.syllabus import SyllabusHelper
+from utils.lesson_plan import LessonPlanHelper
+
+
+@override_settings(AI_RESPONSE_CACHE={'BACKEND': None})
+class ClientRegistryTest(TestCase):
+
+    def tearDown(self):
+        reset_clients()
+
+    def test_same_provider_shares_client(self):
+        first = get_client('fake', 'key', 'http://127.0.0.1:1/v1')
+        second = get_client('fake', 'key', 'http://127.0.0.1:1/v1')
+        self.assertIs(first, second)
+
+    def test_different_base_url_gets_new_client(self):
+        first = get_client('fake', 'key', 'http://127.0.0.1:1/v1')
+        second = get_client('fake', 'key', 'http://127.0.0.1:2/v1')
+        self.assertIsNot(first, second)
+
+    @override_settings(AI_CLIENT={'max_retries': 0, 'timeout': 5.0})
+    def test_settings_configure_client(self):
+        client = get_client('fake', 'key', 'http://127.0.0.1:1/v1')
+        self.assertEqual(client.max_retries, 0)
+        self.assertEqual(client.timeout.read, 5.0)
+
+    def test_helpers_share_one_client(self):
+        with FakeOpenAIServer() as server:
+            with override_settings(**server.provider_settings()):
+                syllabus_client, _ = SyllabusHelper().get_client()
+                lesson_client, _ = LessonPlanHelper().get_client()
+        self.assertIs(syllabus_client, lesson_client)
+
+    def test_connection_is_kept_alive_between_calls(self):
+        with FakeOpenAIServer(reply="ok") as server:
+            with override_settings(**server.provider_settings()):
+                for _ in range(5):
+                    self.assertEqual(AI().ask("prompt"), "ok")
+        self.assertEqual(len(server.requests), 5)
+        self.assertEqual(server.connections, 1)
@@ -0,0 +1,128 @@
+"""
+A tiny OpenAI-compatible chat completions server for tests and benchmarks.
+
+It answers `POST /v1/chat/completions` with a canned reply, either as a single
+JSON body or, when `stream` is requested, as server-sent events with one
+chunk per word. `chunk_delay` adds a pause between streamed chunks so tests
+can tell the first byte apart from the end of the response.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without this, Nagle's
+        # algorithm adds ~40ms to every keep-alive response.
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        self.server.requests.append(body)
+
+        if body.get('stream'):
+            self.send_stream(body)
+        else:
+            self.send_completion(body)
+
+    def send_completion(self, body):
+        payload = json.dumps({
+            'id': 'chatcmpl-fake',
+            'object': 'chat.completion',
+            'created': 0,
+            'model': body.get('model'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': self.server.reply},
+                'finish_reason': 'stop',
+            }],
+        }).encode()
+        time.sleep(self.server.response_delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_stream(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        words = self.server.reply.split(' ')
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.server.chunk_delay)
+            delta = word if i == 0 else ' ' + word
+            self.write_event({
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion.chunk',
+                'created': 0,
+                'model': body.get('model'),
+                'choices': [{'index': 0, 'delta': {'content': delta}, 'finish_reason': None}],
+            })
+        self.write_chunk(b'data: [DONE]\n\n')
+        self.write_chunk(b'')
+
+    def write_event(self, data):
+        self.write_chunk(f"data: {json.dumps(data)}\n\n".encode())
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    Runs the fake API on a free localhost port in a background thread.
+
+    Usage:
+        with FakeOpenAIServer(reply="Hello world") as server:
+            server.base_url  # -> "http://127.0.0.1:<port>/v1"
+    """
+    daemon_threads = True
+
+    def __init__(self, reply="Hello from the fake model", chunk_delay=0.0, response_delay=0.0):
+        super().__init__(('127.0.0.1', 0), FakeOpenAIHandler)
+        self.reply = reply
+        self.chunk_delay = chunk_delay
+        self.response_delay = response_delay
+        self.requests = []
+        self.connections = 0
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def provider_settings(self):
+        """
+        Settings overrides that point utils.AI at this server.
+        """
+        return {
+            'AI_PROVIDERS': {'fake': {'base_url': self.base_url, 'api_key': 'test', 'model': 'fake-model'}},
+            'AI_PROVIDER': 'fake',
+        }
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,152 @@
+from unittest import mock
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.tutor.models import Student, Section, Lesson, GenerationJob
+from apps.tutor.jobs import (
+    enqueue_syllabus, enqueue_lesson_plan, claim_next_job, run_pending_jobs, requeue_stale_jobs,
+)
+
+
+@override_settings(RAG={'PROMPT_CONTEXT': False})
+class GenerationJobTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        self.other = User.objects.create_user(username='other', password='testpass')
+        self.student = Student.objects.create(tutor=self.user, name='Alice')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Linear equations',
+            number_of_lessons=4, length_of_session=60,
+        )
+        self.section.students.add(self.student)
+        self.lesson = Lesson.objects.create(
+            section=self.section, date=timezone.now(), name='Lesson 1',
+            topic='Slopes', grade_level='9', duration=60,
+        )
+
+
+class GenerationQueueTest(GenerationJobTestCase):
+
+    def test_enqueue_does_not_call_ai(self):
+        with mock.patch('utils.AI.AI.ask') as ask:
+            job = enqueue_syllabus(self.section)
+        ask.assert_not_called()
+        self.assertEqual(job.status, GenerationJob.Status.QUEUED)
+        self.assertEqual(job.tutor, self.user)
+
+    def test_enqueue_reuses_queued_job(self):
+        first = enqueue_syllabus(self.section)
+        second = enqueue_syllabus(self.section)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(GenerationJob.objects.count(), 1)
+
+    def test_claim_marks_running_once(self):
+        job = enqueue_syllabus(self.section)
+        claimed = claim_next_job()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, GenerationJob.Status.RUNNING)
+        self.assertIsNotNone(claimed.started_at)
+        self.assertIsNone(claim_next_job())
+
+    @mock.patch('utils.AI.AI.ask', return_value="Generated syllabus")
+    def test_run_pending_jobs_saves_syllabus(self, ask):
+        job = enqueue_syllabus(self.section)
+        self.assertEqual(run_pending_jobs(), 1)
+        job.refresh_from_db()
+        self.section.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(self.section.syllabus, "Generated syllabus")
+        self.assertIn('Student 1:', ask.call_args[0][0])
+
+    @mock.patch('utils.AI.AI.ask', return_value="Generated plan")
+    def test_run_pending_jobs_saves_lesson_plan(self, ask):
+        job = enqueue_lesson_plan(self.lesson)
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.lesson.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+        self.assertEqual(self.lesson.lesson_plan, "Generated plan")
+
+    @mock.patch('utils.AI.AI.ask', side_effect=RuntimeError("provider down"))
+    def test_failed_job_records_error(self, ask):
+        job = enqueue_syllabus(self.section)
+        enqueue_lesson_plan(self.lesson)
+        self.assertEqual(run_pending_jobs(), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.FAILED)
+        self.assertIn('provider down', job.error)
+        self.assertIsNotNone(job.finished_at)
+
+    @mock.patch('utils.AI.AI.ask', return_value="Generated syllabus")
+    def test_worker_command_drains_queue(self, ask):
+        job = enqueue_syllabus(self.section)
+        call_command('run_generation_worker', workers=1, once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.DONE)
+
+    def test_requeue_stale_jobs(self):
+        job = enqueue_syllabus(self.section)
+        claim_next_job()
+        GenerationJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(timedelta(minutes=10)), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.Status.QUEUED)
+
+
+class GenerationViewTest(GenerationJobTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='tutor', password='testpass')
+
+    def test_generate_syllabus_view_enqueues(self):
+        with mock.patch('utils.AI.AI.ask') as ask:
+            response = self.client.post(reverse('generate_syllabus', args=[self.section.pk]))
+        ask.assert_not_called()
+        self.assertRedirects(response, reverse('section_detail', args=[self.section.pk]))
+        job = GenerationJob.objects.get()
+        self.assertEqual(job.kind, GenerationJob.Kind.SYLLABUS)
+        self.assertEqual(job.section, self.section)
+
+    def test_generate_lesson_plan_view_enqueues(self):
+        with mock.patch('utils.AI.AI.ask') as ask:
+            self.client.post(reverse('generate_lesson_plan', args=[self.lesson.pk]))
+        ask.assert_not_called()
+        self.assertEqual(GenerationJob.objects.get().lesson, self.lesson)
+
+    def test_section_create_view_enqueues_after_students_saved(self):
+        with mock.patch('utils.AI.AI.ask') as ask:
+            response = self.client.post(reverse('section_add'), {
+                'name': 'Geometry', 'theme': 'Triangles', 'number_of_lessons': 3,
+                'length_of_session': 45, 'students': [self.student.pk],
+            })
+        ask.assert_not_called()
+        section = Section.objects.get(name='Geometry')
+        self.assertRedirects(response, reverse('section_detail', args=[section.pk]))
+        self.assertEqual(list(section.students.all()), [self.student])
+        self.assertEqual(GenerationJob.objects.get().section, section)
+
+    def test_detail_page_polls_pending_job(self):
+        job = enqueue_syllabus(self.section)
+        response = self.client.get(reverse('section_detail', args=[self.section.pk]))
+        self.assertEqual(response.context['generation_job'], job)
+        self.assertContains(response, reverse('generation_job_status', args=[job.pk]))
+
+    def test_status_endpoint(self):
+        job = enqueue_syllabus(self.section)
+        response = self.client.get(reverse('generation_job_status', args=[job.pk]))
+        self.assertEqual(response.json(), {
+            'id': job.pk, 'kind': 'syllabus', 'status': 'queued', 'error': None,
+        })
+
+    def test_status_endpoint_is_owner_only(self):
+        job = enqueue_syllabus(self.section)
+        self.client.login(username='other', password='testpass')
+        response = self.client.get(reverse('generation_job_status', args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
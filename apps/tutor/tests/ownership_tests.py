@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.tutor.models import Student, Section, Lesson, GenerationJob
+
+
+class OwnershipQueryTest(TestCase):
+    """
+    Each owned-object view loads its object once, filtered by tutor.
+
+    Every request also spends two queries on the session and the user.
+    """
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        User.objects.create_user(username='other', password='testpass')
+        self.student = Student.objects.create(tutor=self.user, name='Alice')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Linear equations',
+            number_of_lessons=4, length_of_session=60, syllabus='Week one',
+        )
+        self.section.students.add(self.student)
+        self.lesson = Lesson.objects.create(
+            section=self.section, date=timezone.make_aware(datetime(2025, 5, 7, 9)), name='Lesson 1',
+            topic='Slopes', grade_level='9', duration=60,
+        )
+        self.client.login(username='tutor', password='testpass')
+
+    def get(self, name, pk, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse(name, args=[pk]))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_student_views(self):
+        self.get('student_detail', self.student.pk, 3)
+        self.get('student_edit', self.student.pk, 3)
+        self.get('student_delete', self.student.pk, 3)
+
+    def test_section_views(self):
+        # section, its students, latest syllabus job
+        self.get('section_detail', self.section.pk, 5)
+        # section, the student choices of the form
+        self.get('section_edit', self.section.pk, 5)
+        self.get('section_delete', self.section.pk, 3)
+
+    def test_lesson_views(self):
+        # lesson with its section, latest job
+        self.get('lesson_detail', self.lesson.pk, 4)
+        self.get('lesson_edit', self.lesson.pk, 3)
+
+    def test_generate_views(self):
+        # section, pending job lookup, job insert
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('generate_syllabus', args=[self.section.pk]))
+        self.assertRedirects(response, reverse('section_detail', args=[self.section.pk]), fetch_redirect_response=False)
+        # lesson with its section, pending job lookup, job insert
+        with self.assertNumQueries(5):
+            self.client.post(reverse('generate_lesson_plan', args=[self.lesson.pk]))
+        self.assertEqual(GenerationJob.objects.filter(tutor=self.user).count(), 2)
+
+    def test_other_tutors_get_404(self):
+        self.client.login(username='other', password='testpass')
+        for name, pk in [
+            ('student_detail', self.student.pk), ('student_edit', self.student.pk),
+            ('student_delete', self.student.pk), ('section_detail', self.section.pk),
+            ('section_edit', self.section.pk), ('section_delete', self.section.pk),
+            ('lesson_detail', self.lesson.pk), ('lesson_edit', self.lesson.pk),
+        ]:
+            with self.assertNumQueries(3):
+                response = self.client.get(reverse(name, args=[pk]))
+            self.assertEqual(response.status_code, 404, name)
+        response = self.client.post(reverse('generate_syllabus', args=[self.section.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse('generate_lesson_plan', args=[self.lesson.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(reverse('student_delete', args=[self.student.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Student.objects.filter(pk=self.student.pk).exists())
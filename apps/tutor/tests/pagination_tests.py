@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.tutor.models import Student, Section, Lesson
+from apps.tutor.pagination import paginate_keyset, encode_cursor, decode_cursor
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        # Repeated names make the id tie-breaker matter.
+        for i in range(25):
+            Student.objects.create(tutor=self.user, name=f"Student {i % 10}")
+
+    def walk(self, queryset, ordering, per_page):
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = paginate_keyset(queryset, ordering, cursor, per_page)
+            seen += page.items
+            pages += 1
+            if not page.has_next:
+                return seen, pages
+            cursor = page.next_cursor
+
+    def test_walks_every_row_once_in_order(self):
+        queryset = Student.objects.filter(tutor=self.user)
+        seen, pages = self.walk(queryset, ('name', 'id'), 7)
+        self.assertEqual(pages, 4)
+        self.assertEqual(seen, list(queryset.order_by('name', 'id')))
+
+    def test_datetime_cursor(self):
+        section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Theme', number_of_lessons=4, length_of_session=60,
+        )
+        start = timezone.make_aware(datetime(2025, 5, 7, 9, 30, 0, 123456))
+        for i in range(12):
+            Lesson.objects.create(
+                section=section, date=start + timedelta(hours=i // 3), name=f"Lesson {i}",
+                topic='Topic', grade_level='9', duration=60,
+            )
+        seen, pages = self.walk(section.lessons.all(), ('date', 'id'), 5)
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, list(section.lessons.order_by('date', 'id')))
+
+    def test_page_is_one_query(self):
+        queryset = Student.objects.filter(tutor=self.user)
+        cursor = paginate_keyset(queryset, ('name', 'id'), per_page=10).next_cursor
+        with self.assertNumQueries(1):
+            paginate_keyset(queryset, ('name', 'id'), cursor, per_page=10)
+
+    def test_bad_cursor_starts_over(self):
+        self.assertIsNone(decode_cursor('not a cursor!', Student, ('name', 'id')))
+        self.assertIsNone(decode_cursor(encode_cursor(['only one']), Student, ('name', 'id')))
+        self.assertIsNone(decode_cursor(encode_cursor(['x', 'not-an-id']), Student, ('name', 'id')))
+        page = paginate_keyset(Student.objects.all(), ('name', 'id'), 'garbage', per_page=5)
+        self.assertEqual(page.items, list(Student.objects.order_by('name', 'id')[:5]))
+
+
+class PaginatedListViewTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        self.client.login(username='tutor', password='testpass')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Theme', number_of_lessons=4, length_of_session=60,
+        )
+
+    def test_student_list_first_page_and_partial(self):
+        Student.objects.bulk_create([Student(tutor=self.user, name=f"Student {i:03}") for i in range(120)])
+        response = self.client.get(reverse('student_list'))
+        self.assertEqual(len(response.context['students']), 50)
+        self.assertContains(response, 'Student 049')
+        self.assertNotContains(response, 'Student 050')
+        self.assertContains(response, 'hx-trigger="revealed"')
+        next_url = response.context['next_page_url']
+
+        # session, user, one page of students
+        with self.assertNumQueries(3):
+            partial = self.client.get(next_url, HTTP_HX_REQUEST='true')
+        self.assertTemplateUsed(partial, 'students/student_rows.html')
+        self.assertTemplateNotUsed(partial, 'base.html')
+        self.assertContains(partial, 'Student 050')
+        self.assertContains(partial, 'Student 099')
+        self.assertNotContains(partial, 'Student 100')
+
+        last = self.client.get(partial.context['next_page_url'], HTTP_HX_REQUEST='true')
+        self.assertEqual(len(last.context['students']), 20)
+        self.assertNotIn('next_page_url', last.context)
+        self.assertNotContains(last, 'load-more')
+
+    def test_section_list_is_paginated(self):
+        for i in range(55):
+            Section.objects.create(
+                tutor=self.user, name=f"Course {i:02}", theme='Theme', number_of_lessons=4, length_of_session=60,
+            )
+        response = self.client.get(reverse('section_list'))
+        self.assertEqual(len(response.context['sections']), 50)
+        partial = self.client.get(response.context['next_page_url'], HTTP_HX_REQUEST='true')
+        self.assertEqual(len(partial.context['sections']), 6)
+
+    def test_lesson_list_is_paginated_by_date(self):
+        start = timezone.make_aware(datetime(2025, 1, 1, 9))
+        Lesson.objects.bulk_create([
+            Lesson(section=self.section, date=start - timedelta(days=i), name=f"Lesson {i}",
+                   topic='Topic', grade_level='9', duration=60)
+            for i in range(60)
+        ])
+        response = self.client.get(reverse('lesson_list', args=[self.section.pk]))
+        lessons = response.context['lessons']
+        self.assertEqual(len(lessons), 50)
+        self.assertEqual(lessons[0].name, 'Lesson 59')
+        self.assertContains(response, 'Generate All Lesson Plans')
+
+        partial = self.client.get(response.context['next_page_url'], HTTP_HX_REQUEST='true')
+        self.assertTemplateUsed(partial, 'lessons/lesson_rows.html')
+        self.assertEqual([lesson.name for lesson in partial.context['lessons']][-1], 'Lesson 0')
+
+    def test_lesson_list_is_owner_only(self):
+        User.objects.create_user(username='other', password='testpass')
+        self.client.login(username='other', password='testpass')
+        response = self.client.get(reverse('lesson_list', args=[self.section.pk]), HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,92 @@
+from datetime import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.tutor.models import Student, Section, Lesson
+from utils.lesson_plan import LessonPlanHelper
+from utils.syllabus import SyllabusHelper
+
+
+@override_settings(RAG={'PROMPT_CONTEXT': False})
+class WithStudentsTest(TestCase):
+    """
+    Pages and prompts that show students cost the same number of queries
+    however many sections and students there are.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        self.client.login(username='tutor', password='testpass')
+
+    def add_sections(self, sections, students_each):
+        created = []
+        for i in range(sections):
+            section = Section.objects.create(
+                tutor=self.user, name=f"Course {i}", theme='Theme', number_of_lessons=4, length_of_session=60,
+            )
+            section.students.set([
+                Student.objects.create(tutor=self.user, name=f"Student {i}-{j}") for j in range(students_each)
+            ])
+            created.append(section)
+        return created
+
+    def test_with_students_loads_only_requested_fields(self):
+        self.add_sections(2, 3)
+        with self.assertNumQueries(2):
+            sections = list(Section.objects.with_students('name'))
+            names = [section.student_names() for section in sections]
+        self.assertEqual(names[0], 'Student 0-0, Student 0-1, Student 0-2')
+        self.assertEqual(sections[0].students.all()[0].get_deferred_fields(),
+                         {'tutor_id', 'language', 'country', 'goals', 'personality', 'interests', 'hobbies',
+                          'current_grades', 'weak_areas'})
+
+    def test_section_list_is_constant(self):
+        self.add_sections(1, 1)
+        # session, user, sections, their students
+        with self.assertNumQueries(4):
+            self.client.get(reverse('section_list'))
+        self.add_sections(10, 5)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('section_list'))
+        self.assertContains(response, 'Student 9-4')
+
+    def test_home_is_constant(self):
+        self.add_sections(1, 1)
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(5):
+            self.client.get(reverse('home'))
+        self.add_sections(10, 5)
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'For: Student 9-0')
+
+    def test_prompts_need_no_queries(self):
+        section = self.add_sections(1, 5)[0]
+        section = Section.objects.with_students().get(pk=section.pk)
+        with self.assertNumQueries(0):
+            SyllabusHelper().build_prompt(section)
+            LessonPlanHelper().build_prompt(section, 1, 'Syllabus')
+
+    def test_lesson_plan_generation_is_constant(self):
+        counts = []
+        for students in (1, 6):
+            section = self.add_sections(1, students)[0]
+            lesson = Lesson.objects.create(
+                section=section, date=timezone.make_aware(datetime(2025, 5, 7, 9)), name='Lesson',
+                topic='Topic', grade_level='9', duration=60,
+            )
+            lesson = Lesson.objects.get(pk=lesson.pk)
+            with mock.patch.object(LessonPlanHelper, 'ask', return_value='Plan'):
+                with self.assertNumQueries(4) as queries:
+                    # section, its students, session number, save
+                    lesson.generate_lesson_plan()
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
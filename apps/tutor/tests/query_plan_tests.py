@@ -0,0 +1,65 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.tutor.models import Student, Section, GenerationJob
+from apps.tutor.calendar_service import lessons_on_day, lesson_counts_by_day
+from apps.tutor.pagination import after
+
+
+class QueryPlanTest(TestCase):
+    """
+    The hot-path queries must be answered from the composite indexes in migration 0015.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Linear equations', number_of_lessons=4, length_of_session=60,
+        )
+
+    def assertUsesIndex(self, plan, index, constraint):
+        lines = [line for line in plan.splitlines() if index in line]
+        self.assertTrue(lines, f"{index} not used:\n{plan}")
+        self.assertIn(constraint, lines[0])
+
+    def test_lessons_on_day_uses_date_range(self):
+        plan = lessons_on_day(self.user, date(2025, 5, 7)).explain()
+        self.assertUsesIndex(plan, 'lesson_section_date_idx', 'date>? AND date<?')
+
+    def test_calendar_counts_use_date_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            lesson_counts_by_day(self.user, date(2025, 4, 27), date(2025, 6, 8))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[0]['sql'])
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        self.assertUsesIndex(plan, 'lesson_section_date_idx', 'date>? AND date<?')
+
+    def test_section_lessons_in_date_order(self):
+        plan = self.section.lessons.order_by('date', 'pk').explain()
+        self.assertUsesIndex(plan, 'lesson_section_date_idx', 'section_id=?')
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_keyset_page_starts_at_cursor(self):
+        lesson_plan = (self.section.lessons.filter(after(('date', 'id'), [timezone.now(), 1]))
+                       .order_by('date', 'id')[:51].explain())
+        self.assertUsesIndex(lesson_plan, 'lesson_section_date_idx', 'section_id=? AND date>?')
+        self.assertNotIn('TEMP B-TREE', lesson_plan)
+        student_plan = (Student.objects.filter(tutor=self.user).filter(after(('name', 'id'), ['B', 1]))
+                        .order_by('name', 'id')[:51].explain())
+        self.assertUsesIndex(student_plan, 'student_tutor_name_idx', 'tutor_id=? AND name>?')
+
+    def test_lists_by_tutor_and_name(self):
+        plan = Student.objects.filter(tutor=self.user).order_by('name', 'id').explain()
+        self.assertUsesIndex(plan, 'student_tutor_name_idx', 'tutor_id=?')
+        plan = Section.objects.filter(tutor=self.user).order_by('name', 'id').explain()
+        self.assertUsesIndex(plan, 'section_tutor_name_idx', 'tutor_id=?')
+
+    def test_claiming_jobs(self):
+        plan = GenerationJob.objects.filter(status=GenerationJob.Status.QUEUED).order_by('created_at', 'id').explain()
+        self.assertUsesIndex(plan, 'generationjob_status_idx', 'status=?')
+        self.assertNotIn('TEMP B-TREE', plan)
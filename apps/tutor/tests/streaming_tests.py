@@ -0,0 +1,161 @@
+import json
+import time
+from unittest import mock
+
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from apps.tutor.models import Student, Section, Lesson
+from apps.tutor.tests.fake_openai import FakeOpenAIServer
+from utils.AI import AI
+
+
+def read_events(response):
+    """
+    Split a streaming SSE response into (event, data) tuples.
+    """
+    body = b"".join(response.streaming_content).decode()
+    events = []
+    for block in body.split("\n\n"):
+        if not block or block.startswith(":"):
+            continue
+        event, data = "message", None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+@override_settings(AI_RESPONSE_CACHE={'BACKEND': None})
+class AIStreamTest(TestCase):
+
+    def test_ask_against_fake_server(self):
+        with FakeOpenAIServer(reply="A full syllabus") as server:
+            with override_settings(**server.provider_settings()):
+                self.assertEqual(AI().ask("prompt"), "A full syllabus")
+        self.assertFalse(server.requests[0]['stream'])
+        self.assertEqual(server.requests[0]['model'], 'fake-model')
+
+    def test_stream_yields_deltas_before_completion_ends(self):
+        with FakeOpenAIServer(reply="one two three four", chunk_delay=0.2) as server:
+            with override_settings(**server.provider_settings()):
+                start = time.perf_counter()
+                chunks = []
+                first_chunk_at = None
+                for chunk in AI().stream("prompt"):
+                    if first_chunk_at is None:
+                        first_chunk_at = time.perf_counter() - start
+                    chunks.append(chunk)
+                total = time.perf_counter() - start
+
+        self.assertEqual(chunks, ["one", " two", " three", " four"])
+        self.assertTrue(server.requests[0]['stream'])
+        # The first token must not wait for the remaining 3 * 0.2s of output.
+        self.assertLess(first_chunk_at, total - 0.4)
+
+
+@override_settings(AI_RESPONSE_CACHE={'BACKEND': None}, RAG={'PROMPT_CONTEXT': False})
+class StreamingViewTest(TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='tutor', password='testpass')
+        User.objects.create_user(username='other', password='testpass')
+        student = Student.objects.create(tutor=self.user, name='Alice')
+        self.section = Section.objects.create(
+            tutor=self.user, name='Algebra', theme='Linear equations',
+            number_of_lessons=4, length_of_session=60, syllabus='Old syllabus',
+        )
+        self.section.students.add(student)
+        self.lesson = Lesson.objects.create(
+            section=self.section, date=timezone.now(), name='Lesson 1',
+            topic='Slopes', grade_level='9', duration=60,
+        )
+        self.client.login(username='tutor', password='testpass')
+
+    def start_stream(self, name, pk, **data):
+        """
+        POST to start a regeneration, then GET its stream as the browser's EventSource would.
+        """
+        response = self.client.post(reverse(name, args=[pk]), data)
+        return self.client.get(response.json()['url'])
+
+    def test_stream_syllabus_persists_result(self):
+        with FakeOpenAIServer(reply="Week one slopes") as server:
+            with override_settings(**server.provider_settings()):
+                response = self.start_stream('stream_syllabus', self.section.pk)
+                self.assertEqual(response['Content-Type'], 'text/event-stream')
+                events = read_events(response)
+
+        self.assertEqual(events[-1][0], 'done')
+        text = "".join(data for event, data in events if event == 'message')
+        self.assertEqual(text, "Week one slopes")
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.syllabus, "Week one slopes")
+
+    def test_stream_lesson_plan_persists_result(self):
+        with FakeOpenAIServer(reply="Warm up then practice") as server:
+            with override_settings(**server.provider_settings()):
+                response = self.start_stream('stream_lesson_plan', self.lesson.pk)
+                events = read_events(response)
+
+        self.assertEqual(events[-1][0], 'done')
+        self.lesson.refresh_from_db()
+        self.assertEqual(self.lesson.lesson_plan, "Warm up then practice")
+        self.assertIn('Session 1', server.requests[0]['messages'][1]['content'])
+
+    def test_first_byte_is_sent_before_generation(self):
+        with FakeOpenAIServer(reply="a b c", chunk_delay=0.3) as server:
+            with override_settings(**server.provider_settings()):
+                response = self.start_stream('stream_syllabus', self.section.pk)
+                stream = iter(response.streaming_content)
+                start = time.perf_counter()
+                first = next(stream)
+                first_byte = time.perf_counter() - start
+                list(stream)
+        self.assertTrue(first.startswith(b":"))
+        self.assertLess(first_byte, 0.3)
+
+    def test_error_event_keeps_old_syllabus(self):
+        with mock.patch('utils.AI.AI.stream', side_effect=RuntimeError("provider down")):
+            response = self.start_stream('stream_syllabus', self.section.pk)
+            events = read_events(response)
+        self.assertEqual(events[-1][0], 'error')
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.syllabus, 'Old syllabus')
+
+    def test_stream_is_owner_only(self):
+        self.client.login(username='other', password='testpass')
+        for name, pk in (('stream_syllabus', self.section.pk), ('stream_lesson_plan', self.lesson.pk)):
+            self.assertEqual(self.client.post(reverse(name, args=[pk])).status_code, 404)
+            self.assertEqual(self.client.get(reverse(name, args=[pk])).status_code, 404)
+
+    def test_get_alone_does_not_regenerate(self):
+        with mock.patch('utils.AI.AI.stream') as stream:
+            response = self.client.get(reverse('stream_syllabus', args=[self.section.pk]))
+            self.assertEqual(response.status_code, 204)
+            response = self.client.get(reverse('stream_syllabus', args=[self.section.pk]), {'token': 'guess'})
+            self.assertEqual(response.status_code, 204)
+        stream.assert_not_called()
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.syllabus, 'Old syllabus')
+
+    def test_stream_url_is_single_use(self):
+        url = self.client.post(reverse('stream_syllabus', args=[self.section.pk])).json()['url']
+        with FakeOpenAIServer(reply="Week one slopes") as server:
+            with override_settings(**server.provider_settings()):
+                read_events(self.client.get(url))
+                # An EventSource reconnect asks for the same URL again.
+                self.assertEqual(self.client.get(url, HTTP_LAST_EVENT_ID='1').status_code, 204)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_token_is_for_one_object(self):
+        url = self.client.post(reverse('stream_syllabus', args=[self.section.pk])).json()['url']
+        token = url.split('?')[1]
+        response = self.client.get(f"{reverse('stream_lesson_plan', args=[self.lesson.pk])}?{token}")
+        self.assertEqual(response.status_code, 204)
@@ -14,10 +14,14 @@ from .views import (
     GenerateSyllabusView,
     StartLessonWizardView,
     LessonListView,
+    GenerateAllLessonPlansView,
     LessonUpdateView,
     GenerateLessonPlanView,
     LessonDetailView,
     CalendarPartialView,
+    GenerationJobStatusView,
+    StreamSyllabusView,
+    StreamLessonPlanView,
 )
 from .class_start_views import StartSectionWizardView
 
@@ -34,11 +38,15 @@ urlpatterns = [
     path('sections/<int:pk>/edit/', SectionUpdateView.as_view(), name='section_edit'),
     path('sections/<int:pk>/delete/', SectionDeleteView.as_view(), name='section_delete'),
     path('sections/<int:pk>/generate_syllabus/', GenerateSyllabusView.as_view(), name='generate_syllabus'),
+    path('sections/<int:pk>/generate_syllabus/stream/', StreamSyllabusView.as_view(), name='stream_syllabus'),
     path('sections/start/<int:step>/', StartSectionWizardView.as_view(), name='start_section'),
     path('sections/<int:section_id>/lessons/start/<int:step>/', StartLessonWizardView.as_view(), name='start_lesson'),
     path('sections/<int:section_id>/lessons/', LessonListView.as_view(), name='lesson_list'),
+    path('sections/<int:section_id>/lessons/generate-plans/', GenerateAllLessonPlansView.as_view(), name='generate_all_lesson_plans'),
     path('lessons/<int:pk>/edit/', LessonUpdateView.as_view(), name='lesson_edit'),
     path('lessons/<int:pk>/generate-plan/', GenerateLessonPlanView.as_view(), name='generate_lesson_plan'),
+    path('lessons/<int:pk>/generate-plan/stream/', StreamLessonPlanView.as_view(), name='stream_lesson_plan'),
     path('lessons/<int:pk>/', LessonDetailView.as_view(), name='lesson_detail'),
     path('calendar/partial/', CalendarPartialView.as_view(), name='calendar_partial'),
+    path('jobs/<int:pk>/status/', GenerationJobStatusView.as_view(), name='generation_job_status'),
 ]
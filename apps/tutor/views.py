@@ -1,13 +1,50 @@
+import json
+import logging
+import secrets
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, TemplateView, RedirectView, UpdateView, FormView, CreateView, DeleteView
-from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
-from .models import Student, Section, Lesson
+from .models import Student, Section, Lesson, GenerationJob
 from .forms import StudentForm, SectionForm, LessonStep1Form, LessonStep2Form, LessonForm, LessonResourceFormSet
 from django.views import View
 from django.contrib import messages
-from datetime import datetime, timedelta
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from datetime import datetime
 from django.utils import timezone
+from .calendar_service import get_calendar_context, lessons_on_day
+from .jobs import enqueue_syllabus, enqueue_lesson_plan, enqueue_all_lesson_plans, latest_job
+from .mixins import TutorOwnedMixin
+from .pagination import KeysetPaginationMixin
+
+logger = logging.getLogger(__name__)
+
+
+def event_stream_response(chunks):
+    """
+    Wrap an iterator of text chunks in a server-sent events response.
+
+    Each chunk is sent as a JSON-encoded `data:` event. A final `done` event is
+    sent once the iterator is exhausted, or an `error` event if it raises.
+    """
+    def events():
+        # Send something straight away so the browser gets headers and the
+        # first byte before the model has produced anything.
+        yield ": stream opened\n\n"
+        try:
+            for chunk in chunks:
+                yield f"data: {json.dumps(chunk)}\n\n"
+        except Exception:
+            logger.exception("Streaming generation failed")
+            yield "event: error\ndata: {}\n\n"
+        else:
+            yield "event: done\ndata: {}\n\n"
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 class HomeView(TemplateView):
@@ -17,7 +54,9 @@ class HomeView(TemplateView):
         context = super().get_context_data(**kwargs)
 
         if self.request.user.is_authenticated:
-            context['sections'] = Section.objects.filter(tutor=self.request.user)
+            context['sections'] = (
+                Section.objects.filter(tutor=self.request.user).order_by('name', 'id').with_students('name')
+            )
 
             today = timezone.localtime().date()
             year = int(self.request.GET.get('year', today.year))
@@ -25,78 +64,33 @@ class HomeView(TemplateView):
             selected_date_str = self.request.GET.get('date')
             selected_date = datetime.strptime(selected_date_str, "%Y-%m-%d").date() if selected_date_str else today
 
-            # Month metadata
-            context['year'] = year
-            context['month'] = month
-            context['calendar_month_name'] = datetime(year, month, 1).strftime('%B %Y')
-
-            # Lessons
-            lessons = Lesson.objects.filter(
-                section__tutor=self.request.user,
-                date__year=year,
-                date__month=month
-            )
+            # Month metadata and calendar grid (weeks of day dicts)
+            context.update(get_calendar_context(self.request.user, year, month, today))
 
             # Lessons for selected date
             context['selected_date'] = selected_date
-            context['lessons_for_selected_day'] = Lesson.objects.filter(
-                section__tutor=self.request.user,
-                date__date=selected_date
-            ).order_by('date')
-
-            # Build calendar grid (weeks of [date, is_current_month, has_lessons])
-            first_of_month = datetime(year, month, 1).date()
-            start_day = first_of_month - timedelta(days=first_of_month.weekday() + 1 if first_of_month.weekday() != 6 else 0)
-            calendar_days = []
-            for week in range(6):
-                week_days = []
-                for day in range(7):
-                    date = start_day + timedelta(days=week * 7 + day)
-                    has_event = lessons.filter(date__date=date).exists()
-                    week_days.append({
-                        'date': date,
-                        'in_current_month': date.month == month,
-                        'is_today': date == today,
-                        'has_event': has_event,
-                    })
-                calendar_days.append(week_days)
-
-            context['calendar_weeks'] = calendar_days
+            context['lessons_for_selected_day'] = lessons_on_day(self.request.user, selected_date)
 
         return context
 
 
 class CalendarPartialView(LoginRequiredMixin, View):
     def get(self, request):
-        year = int(request.GET.get('year'))
-        month = int(request.GET.get('month'))
-
         today = timezone.localtime().date()
-        lessons = Lesson.objects.filter(
-            section__tutor=request.user,
-            date__year=year,
-            date__month=month
-        )
-
-        lessons_by_day = {}
-        for lesson in lessons:
-            lessons_by_day.setdefault(lesson.date.day, []).append(lesson)
-
-        calendar_weeks = get_calendar_weeks(year, month)
-
-        return render(request, 'partials/calendar.html', {
-            'calendar_weeks': calendar_weeks,
-            'lessons_by_day': lessons_by_day,
-            'today': today
-        })
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
 
+        return render(request, 'partials/calendar.html', get_calendar_context(request.user, year, month, today))
 
 
 
-class StudentListView(LoginRequiredMixin, ListView):
+
+class StudentListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Student
     template_name = 'students/student_list.html'
+    partial_template_name = 'students/student_rows.html'
     context_object_name = 'students'
+    keyset_ordering = ('name', 'id')
 
     def get_queryset(self):
         return Student.objects.filter(tutor=self.request.user)
@@ -113,41 +107,34 @@ class StudentCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class StudentDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+class StudentDetailView(LoginRequiredMixin, TutorOwnedMixin, DetailView):
     model = Student
     template_name = 'students/student_detail.html'
     context_object_name = 'student'
 
-    def test_func(self):
-        return self.get_object().tutor == self.request.user
-
 
-class StudentUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class StudentUpdateView(LoginRequiredMixin, TutorOwnedMixin, UpdateView):
     model = Student
     form_class = StudentForm
     template_name = 'students/student_form.html'
     success_url = reverse_lazy('student_list')
 
-    def test_func(self):
-        return self.get_object().tutor == self.request.user
 
-
-class StudentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class StudentDeleteView(LoginRequiredMixin, TutorOwnedMixin, DeleteView):
     model = Student
     template_name = 'students/student_confirm_delete.html'
     success_url = reverse_lazy('student_list')
 
-    def test_func(self):
-        return self.get_object().tutor == self.request.user
-
 
-class SectionListView(LoginRequiredMixin, ListView):
+class SectionListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Section
     template_name = 'sections/section_list.html'
+    partial_template_name = 'sections/section_rows.html'
     context_object_name = 'sections'
+    keyset_ordering = ('name', 'id')
 
     def get_queryset(self):
-        return Section.objects.filter(tutor=self.request.user)
+        return Section.objects.filter(tutor=self.request.user).with_students('name')
 
 
 class SectionCreateView(LoginRequiredMixin, CreateView):
@@ -165,12 +152,12 @@ class SectionCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.tutor = self.request.user
-        section = form.save(commit=False)
+        response = super().form_valid(form)
 
         # Generate syllabus during creation only
-        section.generate_syllabus()
-        form.save_m2m()
-        return super().form_valid(form)
+        enqueue_syllabus(self.object)
+        messages.info(self.request, "Your syllabus is being generated.")
+        return response
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -178,16 +165,21 @@ class SectionCreateView(LoginRequiredMixin, CreateView):
         return context
 
 
-class SectionDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+class SectionDetailView(LoginRequiredMixin, TutorOwnedMixin, DetailView):
     model = Section
     template_name = 'sections/section_detail.html'
     context_object_name = 'section'
 
-    def test_func(self):
-        return self.get_object().tutor == self.request.user
+    def get_queryset(self):
+        return super().get_queryset().with_students('name')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['generation_job'] = latest_job(section=self.object, kind=GenerationJob.Kind.SYLLABUS)
+        return context
 
-class SectionUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+
+class SectionUpdateView(LoginRequiredMixin, TutorOwnedMixin, UpdateView):
     model = Section
     form_class = SectionForm
     template_name = 'sections/section_form.html'
@@ -204,41 +196,28 @@ class SectionUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         form.instance.tutor = self.request.user
         return super().form_valid(form)
 
-    def test_func(self):
-        return self.get_object().tutor == self.request.user
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['is_create_view'] = False
         return context
 
 
-class SectionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class SectionDeleteView(LoginRequiredMixin, TutorOwnedMixin, DeleteView):
     model = Section
     template_name = 'sections/section_confirm_delete.html'
     success_url = reverse_lazy('section_list')
 
-    def test_func(self):
-        return self.get_object().tutor == self.request.user
 
+class GenerateSyllabusView(LoginRequiredMixin, TutorOwnedMixin, View):
+    model = Section
 
-class GenerateSyllabusView(LoginRequiredMixin, UserPassesTestMixin, View):
     def post(self, request, pk):
-        section = get_object_or_404(Section, pk=pk)
-
-        # Basic check to make sure the user owns the section
-        if section.tutor != request.user:
-            return self.handle_no_permission()
-
-        section.generate_syllabus()
-        messages.success(request, "Syllabus generated!")
+        section = self.get_object()
+        enqueue_syllabus(section, force=request.POST.get('force') == '1')
+        messages.info(request, "Syllabus generation started.")
 
         return redirect('section_detail', pk=pk)
 
-    def test_func(self):
-        section = get_object_or_404(Section, pk=self.kwargs['pk'])
-        return section.tutor == self.request.user
-
 
 class StartLessonWizardView(LoginRequiredMixin, View):
     def get_section(self, request, section_id):
@@ -276,8 +255,7 @@ class StartLessonWizardView(LoginRequiredMixin, View):
             index = step - 3
 
             if index >= len(students):
-                lesson.generate_lesson_plan()
-                lesson.save()
+                enqueue_lesson_plan(lesson)
                 request.session.pop('lesson_id', None)
                 return redirect('lesson_detail', pk=lesson.id)
 
@@ -342,53 +320,137 @@ class StartLessonWizardView(LoginRequiredMixin, View):
         })
 
 
-class LessonListView(LoginRequiredMixin, UserPassesTestMixin, View):
-    def get(self, request, section_id):
-        section = get_object_or_404(Section, id=section_id, tutor=request.user)
-        lessons = section.lessons.all().order_by('date')
-        return render(request, 'lessons/lesson_list.html', {
-            'section': section,
-            'lessons': lessons
-        })
+class LessonListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    template_name = 'lessons/lesson_list.html'
+    partial_template_name = 'lessons/lesson_rows.html'
+    context_object_name = 'lessons'
+    keyset_ordering = ('date', 'id')
+
+    def get_queryset(self):
+        sections = Section.objects.filter(tutor=self.request.user)
+        if not self.is_partial():
+            sections = sections.with_students('name')
+        self.section = get_object_or_404(sections, id=self.kwargs['section_id'])
+        return self.section.lessons.all()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['section'] = self.section
+        if not self.is_partial():
+            context['generation_job'] = latest_job(section=self.section, kind=GenerationJob.Kind.ALL_LESSON_PLANS)
+        return context
+
 
-    def test_func(self):
-        section = get_object_or_404(Section, id=self.kwargs['section_id'])
-        return section.tutor == self.request.user
+class GenerateAllLessonPlansView(LoginRequiredMixin, View):
+    """
+    Queues plan generation for every lesson of a section.
+    """
+
+    def post(self, request, section_id):
+        section = get_object_or_404(Section, id=section_id, tutor=request.user)
+        enqueue_all_lesson_plans(section, force=request.POST.get('force') == '1')
+        messages.info(request, "Lesson plan generation started for all lessons.")
+        return redirect('lesson_list', section_id=section.id)
 
 
-class LessonUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class LessonUpdateView(LoginRequiredMixin, TutorOwnedMixin, UpdateView):
     model = Lesson
+    owner_field = 'section__tutor'
+    related_fields = ('section',)
     form_class = LessonForm
     template_name = 'lessons/lesson_form.html'
 
     def get_success_url(self):
         return reverse_lazy('lesson_detail', kwargs={'pk': self.object.id})
 
-    def test_func(self):
-        return self.get_object().section.tutor == self.request.user
 
+class GenerateLessonPlanView(LoginRequiredMixin, TutorOwnedMixin, View):
+    model = Lesson
+    owner_field = 'section__tutor'
+    related_fields = ('section',)
 
-class GenerateLessonPlanView(LoginRequiredMixin, UserPassesTestMixin, View):
     def post(self, request, pk):
-        lesson = get_object_or_404(Lesson, pk=pk)
-
-        if lesson.section.tutor != request.user:
-            return self.handle_no_permission()
-
-        lesson.generate_lesson_plan()
-        messages.success(request, "Lesson plan regenerated!")
+        lesson = self.get_object()
+        enqueue_lesson_plan(lesson, force=request.POST.get('force') == '1')
+        messages.info(request, "Lesson plan generation started.")
 
         return redirect('lesson_detail', pk=lesson.id)
 
-    def test_func(self):
-        lesson = get_object_or_404(Lesson, pk=self.kwargs['pk'])
-        return lesson.section.tutor == self.request.user
-
 
-class LessonDetailView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+class LessonDetailView(LoginRequiredMixin, TutorOwnedMixin, DetailView):
     model = Lesson
+    owner_field = 'section__tutor'
+    related_fields = ('section',)
     template_name = 'lessons/lesson_detail.html'
     context_object_name = 'lesson'
 
-    def test_func(self):
-        return self.get_object().section.tutor == self.request.user
\ No newline at end of file
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['generation_job'] = latest_job(lesson=self.object)
+        return context
+
+
+class GenerationJobStatusView(LoginRequiredMixin, View):
+    """
+    Returns the state of a generation job as JSON so pages can poll it.
+    """
+
+    def get(self, request, pk):
+        job = get_object_or_404(GenerationJob, pk=pk, tutor=request.user)
+        return JsonResponse({
+            'id': job.pk,
+            'kind': job.kind,
+            'status': job.status,
+            'error': job.error if job.status == GenerationJob.Status.FAILED else None,
+        })
+
+
+class StreamGenerationView(LoginRequiredMixin, TutorOwnedMixin, View):
+    """
+    Regenerates an object's text and streams it to the browser as it is written.
+
+    Regenerating calls the paid API and overwrites saved content, so it is
+    started by a POST, which returns a single-use stream URL for an
+    EventSource to GET. A GET without an unused token (a prefetch, a crawler,
+    an EventSource reconnect) gets 204 No Content, which also tells
+    EventSource to stop reconnecting.
+    """
+    session_key = 'stream_tokens'
+    # Unused tokens kept per session; older ones are dropped.
+    max_tokens = 10
+
+    def stream(self, obj, force):
+        raise NotImplementedError
+
+    def post(self, request, pk):
+        self.get_object()
+        token = secrets.token_urlsafe()
+        tokens = request.session.get(self.session_key, {})
+        tokens[token] = {'path': request.path, 'force': request.POST.get('force') == '1'}
+        request.session[self.session_key] = dict(list(tokens.items())[-self.max_tokens:])
+        return JsonResponse({'url': f"{request.path}?token={token}"})
+
+    def get(self, request, pk):
+        obj = self.get_object()
+        tokens = request.session.get(self.session_key, {})
+        started = tokens.pop(request.GET.get('token', ''), None)
+        if started is None or started['path'] != request.path:
+            return HttpResponse(status=204)
+        request.session[self.session_key] = tokens
+        return event_stream_response(self.stream(obj, started['force']))
+
+
+class StreamSyllabusView(StreamGenerationView):
+    model = Section
+
+    def stream(self, section, force):
+        return section.stream_syllabus(force=force)
+
+
+class StreamLessonPlanView(StreamGenerationView):
+    model = Lesson
+    owner_field = 'section__tutor'
+    related_fields = ('section',)
+
+    def stream(self, lesson, force):
+        return lesson.stream_lesson_plan(force=force)
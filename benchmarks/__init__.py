@@ -0,0 +1,43 @@
+"""
+Stand-alone micro-benchmarks. Run each module from the project root, e.g.
+
+    python -m benchmarks.ai_client_pooling
+"""
+import os
+import statistics
+import sys
+from contextlib import contextmanager
+
+
+def setup_django():
+    """
+    Configure Django so benchmarks can use the project's settings and models.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorbase.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Run the block against a freshly migrated throwaway database, like the test runner does.
+    """
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def summarize(label, samples):
+    """
+    Print mean / p50 / p95 of a list of durations in seconds.
+    """
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<28} n={len(samples):<5} mean={statistics.mean(samples) * 1000:8.2f}ms "
+          f"p50={statistics.median(samples) * 1000:8.2f}ms p95={p95 * 1000:8.2f}ms")
@@ -0,0 +1,56 @@
+"""
+Per-call latency of AI requests with a new client per call vs the shared pool.
+
+    python -m benchmarks.ai_client_pooling [calls]
+
+Runs against the local fake OpenAI server, so it measures client construction
+and connection setup only, not model time.
+"""
+import sys
+import time
+
+from benchmarks import setup_django, summarize
+
+setup_django()
+
+from django.test import override_settings  # noqa: E402
+
+from apps.tutor.tests.fake_openai import FakeOpenAIServer  # noqa: E402
+from utils.AI import AI  # noqa: E402
+from utils.clients import build_client, reset_clients  # noqa: E402
+
+
+def cold_call(server):
+    client = build_client('test', server.base_url)
+    try:
+        client.chat.completions.create(model='fake-model', messages=[{'role': 'user', 'content': 'hi'}])
+    finally:
+        client.close()
+
+
+def main(calls=200):
+    with FakeOpenAIServer(reply="ok") as server:
+        with override_settings(**server.provider_settings()):
+            cold = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                cold_call(server)
+                cold.append(time.perf_counter() - start)
+            cold_connections = server.connections
+
+            reset_clients()
+            ai = AI()
+            pooled = []
+            for _ in range(calls):
+                start = time.perf_counter()
+                client, model = ai.get_client()
+                client.chat.completions.create(model=model, messages=ai.get_messages('hi'))
+                pooled.append(time.perf_counter() - start)
+            pooled_connections = server.connections - cold_connections
+
+    summarize(f"cold ({cold_connections} conns)", cold)
+    summarize(f"pooled ({pooled_connections} conns)", pooled)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,63 @@
+"""
+Retrieval for many queries at once (e.g. every lesson of a course): one
+retrieve_documents call per query vs retrieve_documents_batch.
+
+    python -m benchmarks.batch_retrieval [queries] [indexed chunks]
+
+The index holds random vectors with a matching chunk store; the queries are
+real sentences run through the embedding model (see benchmarks/models.py),
+which dominates the cost.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.models import WORDS, embedding_model
+from rag.chunk_store import ChunkStore
+from rag.index import IndexBuilder
+from rag.retriever import retrieve_documents, retrieve_documents_batch
+
+
+def time_runs(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(n_queries=32, n=20000):
+    workdir = tempfile.mkdtemp()
+    try:
+        model = embedding_model()
+        dimension = model.get_sentence_embedding_dimension()
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(n, dimension)).astype('float32')
+        builder = IndexBuilder('flat')
+        builder.add(vectors / np.linalg.norm(vectors, axis=1, keepdims=True), np.arange(n, dtype='int64'))
+        index = builder.finish()
+        store = ChunkStore(os.path.join(workdir, 'chunks.sqlite3'))
+        store.add(range(n), ({'text': f"chunk {i}"} for i in range(n)))
+
+        words = random.Random(0)
+        queries = [f"Lesson {i}: " + " ".join(words.choice(WORDS) for _ in range(12)) for i in range(n_queries)]
+        print(f"{n_queries} queries, {n} indexed chunks, top_k=5")
+
+        loop = time_runs(lambda: [retrieve_documents(query, index, store, model) for query in queries])
+        batch = time_runs(lambda: retrieve_documents_batch(queries, index, store, model))
+        for label, samples in (("per-query loop", loop), ("batch", batch)):
+            best = min(samples)
+            print(f"{label:<16} best={best * 1000:8.1f}ms  {n_queries / best:7.1f} queries/s")
+        store.close()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,76 @@
+"""
+Month switching on the home calendar with and without the month summary cache.
+
+    python -m benchmarks.calendar_cache [lessons]
+
+Creates one tutor with `lessons` lessons spread over two years in a throwaway
+database, then walks through all 24 months cold (cache cleared before every
+month) and warm (every month already cached).
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import setup_django, summarize, test_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.tutor.calendar_service import get_calendar_context, get_cache_stats, reset_cache_stats  # noqa: E402
+from apps.tutor.models import Section, Lesson  # noqa: E402
+
+MONTHS = [(2024 + i // 12, i % 12 + 1) for i in range(24)]
+
+
+def populate(lessons):
+    tutor = User.objects.create_user(username='bench-tutor', password='bench')
+    sections = [
+        Section.objects.create(tutor=tutor, name=f"Section {i}", theme='Theme', number_of_lessons=10,
+                               length_of_session=60)
+        for i in range(20)
+    ]
+    start = timezone.make_aware(datetime(2024, 1, 1, 9))
+    step = timedelta(days=730) / lessons
+    Lesson.objects.bulk_create([
+        Lesson(section=sections[i % len(sections)], date=start + step * i, name=f"Lesson {i}",
+               topic='Topic', grade_level='9', duration=60)
+        for i in range(lessons)
+    ], batch_size=1000)
+    return tutor
+
+
+def walk_months(tutor, clear):
+    samples = []
+    for year, month in MONTHS:
+        if clear:
+            cache.clear()
+        start = time.perf_counter()
+        get_calendar_context(tutor, year, month)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(lessons=5000):
+    with test_database():
+        tutor = populate(lessons)
+        cache.clear()
+        reset_cache_stats()
+
+        cold = walk_months(tutor, clear=True)
+        walk_months(tutor, clear=False)
+        reset_cache_stats()
+        warm = []
+        for _ in range(10):
+            warm += walk_months(tutor, clear=False)
+        stats = get_cache_stats()
+
+    summarize(f"cold ({lessons} lessons)", cold)
+    summarize("warm (cached)", warm)
+    print(f"warm run: {stats['hits']} hits, {stats['misses']} misses")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,72 @@
+"""
+Looking up retrieved chunks: loading the metadata pickle vs the SQLite chunk store.
+
+    python -m benchmarks.chunk_store [chunks]
+
+A process used to unpickle every chunk before it could answer one query;
+the chunk store reads only the ids FAISS returned.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks import summarize
+from rag.chunk_store import ChunkStore
+from rag.utils import load_pickle, save_pickle
+
+
+def main(n=100000, queries=200, top_k=5):
+    workdir = tempfile.mkdtemp()
+    try:
+        rng = random.Random(0)
+        chunks = {i: {'file': f"paper_{i // 500}.pdf", 'page': i % 500 // 10, 'chunk': i % 500,
+                      'offset': i % 10 * 500, 'text': f"chunk {i} " + "x" * 490} for i in range(n)}
+        pickle_path = os.path.join(workdir, 'metadata.pkl')
+        save_pickle(chunks, pickle_path)
+        store = ChunkStore(os.path.join(workdir, 'chunks.sqlite3'))
+        store.add(chunks.keys(), chunks.values())
+        del chunks
+        hits = [[rng.randrange(n) for _ in range(top_k)] for _ in range(queries)]
+        print(f"{n} chunks; pickle {os.path.getsize(pickle_path) / 2 ** 20:.0f} MiB, "
+              f"store {os.path.getsize(store.path) / 2 ** 20:.0f} MiB")
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        metadata = load_pickle(pickle_path)
+        load_time = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"pickle load: {load_time * 1000:.0f}ms, {peak:.0f} MiB Python heap")
+        samples = []
+        for ids in hits:
+            start = time.perf_counter()
+            [metadata[i] for i in ids]
+            samples.append(time.perf_counter() - start)
+        summarize("pickle dict lookup", samples)
+        del metadata
+
+        store.close()
+        tracemalloc.start()
+        start = time.perf_counter()
+        store = ChunkStore(store.path)
+        open_time = time.perf_counter() - start
+        samples = []
+        for ids in hits:
+            start = time.perf_counter()
+            store.get_many(ids)
+            samples.append(time.perf_counter() - start)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"store open: {open_time * 1000:.1f}ms, {peak:.1f} MiB Python heap including lookups")
+        summarize("store get_many", samples)
+        store.close()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
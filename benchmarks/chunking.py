@@ -0,0 +1,89 @@
+"""
+Chunking throughput and downstream retrieval recall: the previous fixed
+500-character slices vs rag.chunking (sentence / paragraph boundaries, token
+budget, overlap).
+
+    python -m benchmarks.chunking [pages]
+
+The corpus is synthetic pages of paragraphs with one labeled "fact" sentence
+per paragraph; each query asks for one fact. A hit is a retrieved chunk that
+contains the whole fact sentence, so a fact cut in two by a chunk boundary is
+a miss. Retrieval uses the bag-of-words HashingEncoder from the rag tests, so
+recall reflects chunk boundaries rather than a model's quality. Token counts
+use the embedding model's WordPiece tokenizer from benchmarks/models.py.
+"""
+import random
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.models import WORDS, embedding_model
+from rag.chunking import iter_page_chunks
+from rag.tests.encoders import HashingEncoder
+
+KS = (1, 3, 5)
+
+
+def fixed_chunks(pages, chunk_size=500):
+    # The previous rag.utils.split_text.
+    for page_number, text in pages:
+        for offset in range(0, len(text), chunk_size):
+            piece = text[offset:offset + chunk_size]
+            if piece.strip():
+                yield {'page': page_number, 'offset': offset, 'text': piece}
+
+
+def make_corpus(n_pages, rng):
+    """
+    Returns (pages, facts): page texts and (page number, fact sentence, query) triples.
+    """
+    pages, facts = [], []
+    for page_number in range(1, n_pages + 1):
+        paragraphs = []
+        for _ in range(rng.randint(3, 6)):
+            sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20))).capitalize() + "."
+                         for _ in range(rng.randint(2, 6))]
+            key = f"topic{len(facts)} term{len(facts)}"
+            fact = f"The {key} {' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 16)))} matters."
+            sentences.insert(rng.randrange(len(sentences) + 1), fact)
+            facts.append((page_number, fact, key))
+            paragraphs.append(" ".join(sentences))
+        pages.append((page_number, "\n\n".join(paragraphs)))
+    return pages, facts
+
+
+def recall(chunks, facts, encoder):
+    vectors = encoder.encode([chunk['text'] for chunk in chunks])
+    queries = encoder.encode([query for _, _, query in facts])
+    top = np.argsort(-(queries @ vectors.T), axis=1)[:, :max(KS)]
+    return {k: np.mean([any(fact in chunks[i]['text'] for i in row[:k]) for row, (_, fact, _) in zip(top, facts)])
+            for k in KS}
+
+
+def main(n_pages=300):
+    rng = random.Random(0)
+    pages, facts = make_corpus(n_pages, rng)
+    characters = sum(len(text) for _, text in pages)
+    tokenizer = embedding_model().tokenizer
+    encoder = HashingEncoder(dimension=1 << 15)
+    print(f"{n_pages} pages, {characters / 1e6:.2f}M characters, {len(facts)} facts")
+
+    variants = [
+        ("500 chars (previous)", lambda: fixed_chunks(pages)),
+        ("128 tok, words", lambda: iter_page_chunks(pages, 128, 0)),
+        ("128 tok", lambda: iter_page_chunks(pages, 128, 0, tokenizer)),
+        ("128 tok, overlap 32", lambda: iter_page_chunks(pages, 128, 32, tokenizer)),
+        ("200 tok, overlap 32", lambda: iter_page_chunks(pages, 200, 32, tokenizer)),
+    ]
+    for label, chunker in variants:
+        start = time.perf_counter()
+        chunks = list(chunker())
+        seconds = time.perf_counter() - start
+        hits = recall(chunks, facts, encoder)
+        print(f"{label:<22} {n_pages / seconds:8.0f} pages/s {characters / seconds / 1e6:6.2f} MB/s "
+              f"{len(chunks):6} chunks  " + "  ".join(f"recall@{k}={hits[k]:.3f}" for k in KS))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
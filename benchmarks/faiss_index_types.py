@@ -0,0 +1,77 @@
+"""
+Recall@k against search latency for the FAISS index types in rag/index.py,
+with the exact flat index as the baseline.
+
+    python -m benchmarks.faiss_index_types [vectors] [queries]
+
+Uses synthetic clustered 384-dimensional vectors (the size of all-MiniLM-L6-v2
+embeddings) and searches one query at a time, as retrieval does. Sweeps
+`nprobe` for the IVF indexes and `ef_search` for HNSW.
+"""
+import sys
+import time
+
+import faiss
+import numpy as np
+
+from benchmarks import summarize
+from rag.index import IndexBuilder, set_search_params
+
+DIMENSION = 384
+K = 10
+SWEEPS = {
+    'flat': [{}],
+    'ivf_flat': [{'nprobe': n} for n in (1, 4, 16, 64)],
+    'ivf_pq': [{'nprobe': n} for n in (1, 4, 16, 64)],
+    'hnsw': [{'ef_search': n} for n in (16, 32, 64, 128, 256)],
+}
+
+
+def make_vectors(n, clusters=1000, spread=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIMENSION)).astype('float32')
+    vectors = centers[rng.integers(clusters, size=n)] + spread * rng.normal(size=(n, DIMENSION)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build(index_type, vectors, batch_size=1000):
+    builder = IndexBuilder(index_type)
+    for start in range(0, len(vectors), batch_size):
+        end = min(start + batch_size, len(vectors))
+        builder.add(vectors[start:end], np.arange(start, end, dtype='int64'))
+    return builder.finish()
+
+
+def search_each(index, queries):
+    samples, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], K)
+        samples.append(time.perf_counter() - start)
+        found.append(ids[0])
+    return samples, found
+
+
+def main(n=50000, n_queries=200):
+    vectors = make_vectors(n + n_queries)
+    vectors, queries = vectors[:n], vectors[n:]
+    print(f"{n} vectors x {DIMENSION} dims, {n_queries} queries, recall@{K}, {faiss.omp_get_max_threads()} threads")
+
+    truth = None
+    for index_type, sweep in SWEEPS.items():
+        start = time.perf_counter()
+        index = build(index_type, vectors)
+        size = len(faiss.serialize_index(index)) / 2 ** 20
+        print(f"\n{index_type}: built in {time.perf_counter() - start:.1f}s, {size:.1f} MiB on disk")
+        for params in sweep:
+            set_search_params(index, **params)
+            samples, found = search_each(index, queries)
+            if truth is None:
+                truth = found
+            recall = np.mean([len(set(t) & set(f)) / K for t, f in zip(truth, found)])
+            label = ", ".join(f"{key}={value}" for key, value in params.items()) or "exact"
+            summarize(f"  {label:<14} r={recall:.3f}", samples)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
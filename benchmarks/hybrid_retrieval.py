@@ -0,0 +1,147 @@
+"""
+Dense vs BM25 vs hybrid (reciprocal-rank fusion) retrieval: latency and
+recall on a labeled toy set.
+
+    python -m benchmarks.hybrid_retrieval [pages]
+
+The toy corpus mimics what each retriever is good at. Every paragraph holds
+one fact: a course code plus a few concept words. Each concept has two
+spellings (think "feedback" / "critique"); the dense side is a hashing
+encoder that maps both spellings to the same features, like an embedder
+would, but with a small dimension, so hash collisions blur it. BM25 only
+matches exact spellings but resolves course codes. Queries paraphrase one
+fact (each concept in either spelling); half also name its course code. The
+label is the chunk holding the fact.
+
+Timings are per query and exclude query embedding. "easy" is the share of
+hybrid queries whose top hit both retrievers rank first (which skip the
+reranker with SKIP_EASY_RERANK) and how often that hit is right.
+"""
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.models import WORDS
+from rag.chunk_store import ChunkStore
+from rag.chunking import iter_page_chunks
+from rag.index import IndexBuilder
+from rag.lexical import build_lexical_index
+from rag.retriever import hybrid_search_documents, is_easy_query, search_documents
+from rag.tests.encoders import HashingEncoder
+
+KS = (1, 5)
+CONCEPTS = 3000
+
+
+class SynonymEncoder(HashingEncoder):
+    """
+    A HashingEncoder that reads both spellings of a concept as the first one.
+    """
+
+    def __init__(self, synonyms, dimension=256):
+        super().__init__(dimension)
+        self.synonyms = synonyms
+
+    def encode(self, sentences, **kwargs):
+        if isinstance(sentences, str):
+            return self.encode([sentences], **kwargs)[0]
+        return super().encode([" ".join(self.synonyms.get(word, word) for word in sentence.split())
+                               for sentence in sentences], **kwargs)
+
+
+def pseudo_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9)))
+
+
+def make_toy_set(n_pages, rng):
+    """
+    Returns (pages, queries, facts, synonyms): page texts, query texts, the
+    (page, fact sentence) each query asks for, and {second spelling: first}.
+    """
+    spellings = [(pseudo_word(rng), pseudo_word(rng)) for _ in range(CONCEPTS)]
+    synonyms = {second: first for first, second in spellings}
+    pages, queries, facts = [], [], []
+    for page_number in range(1, n_pages + 1):
+        paragraphs = []
+        for _ in range(rng.randint(3, 6)):
+            code = f"edu{len(facts):05d}"
+            concepts = rng.sample(range(CONCEPTS), 5)
+            fact = f"Course {code} covers {' '.join(spellings[c][0] for c in concepts)} in depth."
+            filler = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 16))).capitalize() + "."
+                      for _ in range(rng.randint(2, 5))]
+            filler.insert(rng.randrange(len(filler) + 1), fact)
+            paragraphs.append(" ".join(filler))
+            query = " ".join(spellings[c][rng.random() < 0.5] for c in rng.sample(concepts, 3))
+            queries.append(f"{code} {query}" if len(facts) % 2 else query)
+            facts.append((page_number, fact))
+        pages.append((page_number, "\n\n".join(paragraphs)))
+    return pages, queries, facts, synonyms
+
+
+def evaluate(label, search, queries, labels):
+    start = time.perf_counter()
+    results = [search(number, query) for number, query in enumerate(queries)]
+    seconds = time.perf_counter() - start
+    recall = {k: np.mean([any(hit['file'] in wanted for hit in hits[:k]) for hits, wanted in zip(results, labels)])
+              for k in KS}
+    print(f"{label:<26} {seconds / len(queries) * 1000:6.2f}ms/query  "
+          + "  ".join(f"recall@{k}={recall[k]:.3f}" for k in KS))
+    return results
+
+
+def main(n_pages=300):
+    workdir = tempfile.mkdtemp()
+    try:
+        rng = random.Random(0)
+        pages, queries, facts, synonyms = make_toy_set(n_pages, rng)
+        chunks = list(iter_page_chunks(pages, 128, 32))
+        encoder = SynonymEncoder(synonyms)
+
+        # The chunk's `file` holds "page:offset", which the labels refer to.
+        store = ChunkStore(os.path.join(workdir, 'chunks.sqlite3'))
+        store.add(range(len(chunks)), [{**chunk, 'file': f"{chunk['page']}:{chunk['offset']}"} for chunk in chunks])
+        builder = IndexBuilder('flat')
+        builder.add(encoder.encode([chunk['text'] for chunk in chunks]), np.arange(len(chunks), dtype='int64'))
+        index = builder.finish()
+        labels = [{f"{chunk['page']}:{chunk['offset']}" for chunk in chunks
+                   if chunk['page'] == page and fact in chunk['text']} for page, fact in facts]
+
+        lexical_path = os.path.join(workdir, 'bm25.npz')
+        start = time.perf_counter()
+        lexical = build_lexical_index(store, lexical_path)
+        build_seconds = time.perf_counter() - start
+        text_bytes = sum(len(chunk['text'].encode()) for chunk in chunks)
+        print(f"{len(chunks)} chunks ({text_bytes / 1e6:.2f} MB of text), {len(queries)} queries; "
+              f"BM25 index built in {build_seconds:.2f}s, {os.path.getsize(lexical_path) / 1e6:.2f} MB on disk")
+
+        vectors = encoder.encode(queries)
+
+        def bm25(number, query):
+            ids, _ = lexical.search(query, 5)
+            return store.get_many(ids.tolist())
+
+        evaluate("dense", lambda n, q: search_documents(vectors[n], index, store, 5)[0], queries, labels)
+        evaluate("bm25", bm25, queries, labels)
+        for candidates in (5, 10, 20):
+            results = evaluate(
+                f"hybrid candidates={candidates}",
+                lambda n, q, c=candidates: hybrid_search_documents([q], vectors[n], index, lexical, store, top_k=5,
+                                                                  candidates=c)[0],
+                queries, labels,
+            )
+            easy = [is_easy_query(hits) for hits in results]
+            right = [hits[0]['file'] in wanted for hits, wanted, is_easy in zip(results, labels, easy) if is_easy]
+            print(f"{'':<26} easy: {np.mean(easy):.1%} of queries, top hit right on {np.mean(right or [0]):.1%}")
+        store.close()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
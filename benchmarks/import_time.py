@@ -0,0 +1,62 @@
+"""
+Import cost of the rag package and of Django startup, from `python -X importtime`.
+
+    python -m benchmarks.import_time [--max-ms N]
+
+Each target is imported in a fresh interpreter. Prints the cumulative import
+time, the peak RSS and the slowest top-level packages pulled in. With
+--max-ms, exits non-zero when a target takes longer, so it can guard startup
+in CI.
+"""
+import subprocess
+import sys
+
+TARGETS = {
+    'rag.pipeline': "import rag.pipeline",
+    'rag.ingest': "import rag.ingest",
+    'django setup + urls': (
+        "import os, django; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorbase.settings'); "
+        "django.setup(); import tutorbase.urls"
+    ),
+}
+HEAVY_MODULES = ('torch', 'transformers', 'sentence_transformers', 'faiss', 'openai')
+
+
+def profile(code):
+    """
+    Returns (total seconds, peak RSS in MiB, {top-level package: cumulative seconds}).
+    """
+    code += "\nimport resource, sys; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, file=sys.stdout)"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], capture_output=True, text=True, check=True)
+    total, packages = 0, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        seconds = int(cumulative) / 1e6
+        if not name.startswith('  '):
+            # Imported directly by the target code, not by another module.
+            total += seconds
+        # The outermost import of a package includes all of its submodules.
+        package = name.strip().split('.')[0]
+        packages[package] = max(packages.get(package, 0), seconds)
+    return total, int(result.stdout.split()[-1]) / 1024, packages
+
+
+def main(max_ms=None):
+    failed = False
+    for label, code in TARGETS.items():
+        total, rss, packages = profile(code)
+        heavy = [name for name in HEAVY_MODULES if name in packages]
+        slowest = sorted(packages.items(), key=lambda item: -item[1])[:4]
+        print(f"{label:<22} {total * 1000:8.0f}ms {rss:6.0f} MiB  heavy: {', '.join(heavy) or 'none'}")
+        print(f"{'':<22} slowest: " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in slowest))
+        if max_ms is not None and total * 1000 > max_ms:
+            failed = True
+    if failed:
+        sys.exit(f"Import time above {max_ms}ms.")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    main(int(args[args.index('--max-ms') + 1]) if '--max-ms' in args else None)
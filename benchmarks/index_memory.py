@@ -0,0 +1,83 @@
+"""
+Memory per worker process serving the same FAISS index, read into the heap vs
+memory-mapped (rag.index.load_index(mmap=True)).
+
+    python -m benchmarks.index_memory [vectors] [workers] [index type]
+
+Each worker loads the index, runs queries over every inverted list, then
+reports while all workers are still alive:
+
+    RSS  resident pages, counting shared pages in full for every worker
+    PSS  resident pages with shared pages split between the processes using
+         them; the sum over workers is what the index really costs
+
+Linux only (reads /proc/self/smaps_rollup).
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from benchmarks.faiss_index_types import build, make_vectors
+from rag.index import index_type_of, save_index
+
+
+def memory_mib():
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0]) / 1024
+    return values
+
+
+def worker(path, mmap, queries, barrier, results):
+    from rag.index import load_index, set_search_params
+    before = memory_mib()
+    index = load_index(path, mmap=mmap)
+    if index_type_of(index).startswith('ivf'):
+        # Touch every list, as a long-running worker eventually does.
+        set_search_params(index, nprobe=1 << 20)
+    index.search(queries, 10)
+    barrier.wait()
+    after = memory_mib()
+    results.put({key: after[key] - before[key] for key in after})
+    barrier.wait()
+
+
+def measure(path, mmap, queries, workers):
+    context = multiprocessing.get_context('spawn')
+    barrier, results = context.Barrier(workers), context.Queue()
+    processes = [context.Process(target=worker, args=(path, mmap, queries, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return samples
+
+
+def main(n=100000, workers=4, index_type='ivf_flat'):
+    workdir = tempfile.mkdtemp()
+    try:
+        vectors = make_vectors(n + 20)
+        path = os.path.join(workdir, 'faiss.index')
+        save_index(build(index_type, vectors[:n]), path)
+        print(f"{index_type}, {n} vectors, {os.path.getsize(path) / 2 ** 20:.0f} MiB file, {workers} workers")
+        for mmap in (False, True):
+            samples = measure(path, mmap, vectors[n:], workers)
+            rss = np.mean([sample['Rss'] for sample in samples])
+            pss = [sample['Pss'] for sample in samples]
+            print(f"{'mmap' if mmap else 'heap':<5} RSS/worker={rss:7.1f}MiB PSS/worker={np.mean(pss):7.1f}MiB "
+                  f"PSS total={sum(pss):7.1f}MiB")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:4]
+    main(*(int(arg) for arg in args[:2]), *args[2:])
@@ -0,0 +1,86 @@
+"""
+Lesson list rendering for a tutor with a very large section.
+
+    python -m benchmarks.lesson_pagination [lessons]
+
+Creates one section with `lessons` lessons in a throwaway database and
+renders the lesson list through the test client: the first page, the
+infinite-scroll partial for a page near the end, the keyset and OFFSET
+queries for that page on their own, and, for reference, a render of every
+lesson at once. Peak Python memory is measured with tracemalloc.
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks import setup_django, summarize, test_database
+
+setup_django()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from apps.tutor.models import Section, Lesson  # noqa: E402
+from apps.tutor.pagination import encode_cursor, paginate_keyset  # noqa: E402
+
+
+def populate(lessons):
+    tutor = User.objects.create_user(username='bench-tutor', password='bench')
+    section = Section.objects.create(tutor=tutor, name='Big course', theme='Theme', number_of_lessons=lessons,
+                                     length_of_session=60)
+    start = timezone.make_aware(datetime(2020, 1, 1, 9))
+    Lesson.objects.bulk_create([
+        Lesson(section=section, date=start + timedelta(hours=i), name=f"Lesson {i}", topic='Topic',
+               grade_level='9', duration=60)
+        for i in range(lessons)
+    ], batch_size=2000)
+    return tutor, section
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return samples, peak
+
+
+def main(lessons=50000):
+    setup_test_environment()
+    with test_database():
+        tutor, section = populate(lessons)
+        client = Client()
+        client.force_login(tutor)
+        url = reverse('lesson_list', args=[section.pk])
+
+        deep = section.lessons.order_by('date', 'id')[lessons - 100]
+        cursor = encode_cursor([deep.date, deep.id])
+
+        results = [
+            ("first page", measure(lambda: client.get(url), 20)),
+            ("deep page (keyset)", measure(lambda: client.get(f"{url}?cursor={cursor}", HTTP_HX_REQUEST='true'), 20)),
+            ("deep query (keyset)",
+             measure(lambda: paginate_keyset(section.lessons.all(), ('date', 'id'), cursor, 50), 20)),
+            ("deep query (OFFSET)",
+             measure(lambda: list(section.lessons.order_by('date', 'id')[lessons - 99:lessons - 48]), 20)),
+            ("all lessons (reference)", measure(lambda: render_to_string(
+                'lessons/lesson_rows.html', {'lessons': section.lessons.order_by('date', 'id')}), 1)),
+        ]
+
+    for label, (samples, peak) in results:
+        summarize(label, samples)
+        print(f"{'':<28} peak memory {peak / 1024 / 1024:8.2f} MiB")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,81 @@
+"""
+CPU throughput and accuracy drift of the model backends (settings.RAG['MODEL_BACKEND']):
+fp32 torch, dynamic int8 torch and ONNX Runtime, for the embedding model and
+the cross-encoder.
+
+    python -m benchmarks.model_backends [repeats]
+
+Throughput is chunk-length texts embedded per second and (query, chunk) pairs
+scored per second. Drift compares each backend with fp32 torch on the same
+inputs: cosine similarity of embeddings, and Pearson / Spearman correlation
+of reranker scores. Uses benchmarks/models.py for the models; with the random
+stand-ins the drift numbers say little about real retrieval quality. The onnx
+rows need the optional onnx and onnxruntime packages.
+"""
+import importlib.util
+import random
+import sys
+import tempfile
+import time
+
+import torch
+
+from benchmarks.models import EMBEDDING_MODEL, RERANKER_MODEL, embedding_model, reranker_model
+from benchmarks.reranker import make_docs
+from rag.backends import embedding_drift, embedding_model_for_backend, reranker_for_backend, score_drift
+from rag.reranker import score_pairs
+
+TEXTS = 256
+PAIRS = 100
+QUERY = "how does spacing review help students learn"
+
+
+def throughput(fn, items, repeats):
+    fn()
+    best = min(_timed(fn) for _ in range(repeats))
+    return items / best
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(repeats=3):
+    from django.test import override_settings
+
+    print(f"torch threads: {torch.get_num_threads()}")
+    backends = ['torch', 'int8']
+    if all(importlib.util.find_spec(name) for name in ('onnx', 'onnxruntime')):
+        backends.append('onnx')
+    else:
+        print("(onnx / onnxruntime not installed; skipping the onnx backend)")
+
+    rng = random.Random(0)
+    texts = make_docs(TEXTS, rng)
+    docs = make_docs(PAIRS, rng)
+    encoder = embedding_model()
+    reranker = reranker_model()
+    reranker[1].eval()
+
+    with override_settings(RAG={'ONNX_DIR': tempfile.mkdtemp(prefix='onnx-')}):
+        for backend in backends:
+            candidate = embedding_model_for_backend(encoder, EMBEDDING_MODEL, backend)
+            rate = throughput(lambda: candidate.encode(texts, batch_size=32), TEXTS, repeats)
+            drift = embedding_drift(encoder, candidate, texts[:64])
+            print(f"embed  {backend:<6} {rate:8.1f} texts/s   cosine mean={drift['mean_cosine']:.5f} "
+                  f"min={drift['min_cosine']:.5f}")
+
+        for backend in backends:
+            candidate = reranker_for_backend(*reranker, RERANKER_MODEL, backend)
+            rate = throughput(lambda: score_pairs(QUERY, docs, *candidate), PAIRS, repeats)
+            drift = score_drift(reranker, candidate, QUERY, docs)
+            print(f"rerank {backend:<6} {rate:8.1f} pairs/s   pearson={drift['pearson']:.4f} "
+                  f"spearman={drift['spearman']:.4f} max|diff|={drift['max_abs_diff']:.4f}")
+
+
+if __name__ == '__main__':
+    from benchmarks import setup_django
+    setup_django()
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,77 @@
+"""
+The embedding and reranker models for benchmarks.
+
+Loads the real models when they are available (downloaded or cached from the
+Hugging Face hub). Otherwise builds randomly initialised models with the same
+architecture (6-layer, 384-wide BERT, like all-MiniLM-L6-v2 and
+ms-marco-MiniLM-L-6-v2) and a small WordPiece vocabulary, so timings are
+representative even though the scores are meaningless.
+"""
+import os
+import string
+import tempfile
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+RERANKER_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+WORDS = ("learning retrieval practice spacing feedback scaffolding schema memory attention motivation "
+         "assessment curriculum objective lesson student teacher concept skill the a of and to in is for "
+         "on with as by that this are be how what why which when students learn reading writing math "
+         "science history language plan week unit goal review quiz project group").split()
+
+_local_dir = None
+
+
+def _local_model_dir(num_labels=None):
+    """
+    Save a random MiniLM-shaped BERT (with a classification head if `num_labels`) and its tokenizer.
+    """
+    from transformers import BertConfig, BertForSequenceClassification, BertModel, BertTokenizerFast
+
+    global _local_dir
+    if _local_dir is None:
+        _local_dir = tempfile.mkdtemp(prefix='minilm-')
+    path = os.path.join(_local_dir, 'reranker' if num_labels else 'embedding')
+    if os.path.exists(path):
+        return path
+    os.makedirs(path)
+    vocab = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + list(string.ascii_lowercase + string.digits + string.punctuation)
+    vocab += ['##' + char for char in string.ascii_lowercase + string.digits] + WORDS
+    vocab += [word + suffix for word in WORDS for suffix in ('s', 'ing', 'ed')]
+    with open(os.path.join(path, 'vocab.txt'), 'w') as f:
+        f.write('\n'.join(dict.fromkeys(vocab)))
+    tokenizer = BertTokenizerFast(os.path.join(path, 'vocab.txt'), model_max_length=512)
+    tokenizer.save_pretrained(path)
+    config = BertConfig(vocab_size=len(tokenizer), hidden_size=384, num_hidden_layers=6, num_attention_heads=12,
+                        intermediate_size=1536, max_position_embeddings=512)
+    if num_labels:
+        config.num_labels = num_labels
+        BertForSequenceClassification(config).save_pretrained(path)
+    else:
+        BertModel(config).save_pretrained(path)
+    return path
+
+
+def embedding_model():
+    from sentence_transformers import SentenceTransformer, models
+    try:
+        return SentenceTransformer(EMBEDDING_MODEL)
+    except OSError:
+        print(f"({EMBEDDING_MODEL} is not available; using a random model of the same shape)")
+    transformer = models.Transformer(_local_model_dir(), max_seq_length=256)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), 'mean')
+    return SentenceTransformer(modules=[transformer, pooling, models.Normalize()])
+
+
+def reranker_model():
+    """
+    Returns:
+        tuple: (tokenizer, model), as rag.reranker.load_reranker_model does.
+    """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    try:
+        return AutoTokenizer.from_pretrained(RERANKER_MODEL), AutoModelForSequenceClassification.from_pretrained(RERANKER_MODEL)
+    except OSError:
+        print(f"({RERANKER_MODEL} is not available; using a random model of the same shape)")
+    path = _local_model_dir(num_labels=1)
+    return AutoTokenizer.from_pretrained(path), AutoModelForSequenceClassification.from_pretrained(path)
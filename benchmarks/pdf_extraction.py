@@ -0,0 +1,74 @@
+"""
+PDF text extraction for index builds: one file at a time vs the process pool
+vs the extracted-text cache.
+
+    python -m benchmarks.pdf_extraction [files] [pages per file]
+
+Generates a synthetic corpus of text PDFs in a temporary directory.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from PyPDF2 import PdfReader
+
+from benchmarks import summarize
+from rag.extract import TextCache, extract_corpus
+from rag.ingest import file_hash
+from rag.tests.pdfs import make_pdf
+
+WORDS = ("learning retrieval practice spacing feedback scaffolding schema memory attention "
+         "motivation assessment curriculum objective lesson student teacher concept skill").split()
+
+
+def make_corpus(path, files, pages):
+    rng = random.Random(0)
+    corpus = []
+    for i in range(files):
+        pdf_path = os.path.join(path, f"paper_{i:03}.pdf")
+        make_pdf(pdf_path, [" ".join(rng.choice(WORDS) for _ in range(400)) for _ in range(pages)])
+        corpus.append((os.path.basename(pdf_path), pdf_path, file_hash(pdf_path)))
+    return corpus
+
+
+def extract_one_by_one(corpus):
+    # What build_and_save_index_from_papers did before: one file at a time,
+    # growing a single string page by page.
+    for name, path, sha256 in corpus:
+        text = ""
+        for page in PdfReader(path).pages:
+            text += page.extract_text() or ""
+
+
+def time_runs(fn, repeat=3):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main(files=40, pages=25):
+    workdir = tempfile.mkdtemp()
+    try:
+        corpus = make_corpus(workdir, files, pages)
+        workers = os.cpu_count()
+        print(f"{files} files x {pages} pages, {workers} workers")
+
+        summarize("one file at a time", time_runs(lambda: extract_one_by_one(corpus)))
+        summarize("page lists, 1 process", time_runs(lambda: list(extract_corpus(corpus, workers=1))))
+        summarize(f"process pool ({workers})", time_runs(lambda: list(extract_corpus(corpus, workers=workers))))
+
+        cache = TextCache(os.path.join(workdir, 'cache'))
+        list(extract_corpus(corpus, workers=workers, cache=cache))
+        summarize("cached rerun", time_runs(lambda: list(extract_corpus(corpus, workers=workers, cache=cache))))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,65 @@
+"""
+Query embedding cost per RAGPipeline.run, up to retrieval: the old path
+(embed_query, then retrieve_documents embedding the query again) vs the
+staged pipeline with a cold and a warm query embedding cache.
+
+    python -m benchmarks.query_embedding [queries]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks import summarize
+from benchmarks.models import WORDS, embedding_model
+from rag.chunk_store import ChunkStore
+from rag.index import IndexBuilder
+from rag.query_cache import QueryEmbeddingCache
+from rag.retriever import embed_query, retrieve_documents, search_documents
+
+
+def main(n_queries=50, n=20000):
+    workdir = tempfile.mkdtemp()
+    try:
+        model = embedding_model()
+        dimension = model.get_sentence_embedding_dimension()
+        vectors = np.random.default_rng(0).normal(size=(n, dimension)).astype('float32')
+        builder = IndexBuilder('flat')
+        builder.add(vectors, np.arange(n, dtype='int64'))
+        index = builder.finish()
+        store = ChunkStore(os.path.join(workdir, 'chunks.sqlite3'))
+        store.add(range(n), ({'text': f"chunk {i}"} for i in range(n)))
+        words = random.Random(0)
+        queries = [" ".join(words.choice(WORDS) for _ in range(12)) for _ in range(n_queries)]
+
+        def time_each(fn):
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                fn(query)
+                samples.append(time.perf_counter() - start)
+            return samples
+
+        def old_run(query):
+            embed_query(model, query)
+            retrieve_documents(query, index, store, model)
+
+        cache = QueryEmbeddingCache(model)
+
+        def staged_run(query):
+            search_documents(cache.encode([query]), index, store)
+
+        summarize("embed twice (old run)", time_each(old_run))
+        summarize("staged, cold cache", time_each(staged_run))
+        summarize("staged, warm cache", time_each(staged_run))
+        store.close()
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,94 @@
+"""
+Research context per request: a RAGService built for every request (what
+constructing a RAGPipeline per request amounted to) vs the shared service,
+and what the time budget does to latency.
+
+    python -m benchmarks.rag_service [chunks] [requests]
+
+The index holds synthetic chunks embedded with the embedding model from
+benchmarks/models.py; every request is a new query, so none hits the query
+embedding cache. Models are set once (rag.models caches them per process),
+so the per-request row pays only for loading the index, chunk store and BM25
+index. Stage timings are the means of what RAGService.search reports;
+"skipped" counts requests that left out a stage to stay within the budget.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.models import WORDS, embedding_model, reranker_model
+from rag.chunk_store import ChunkStore
+from rag.index import IndexBuilder, save_index
+from rag.lexical import build_lexical_index
+from rag.models import set_model
+from rag.service import RAGService
+
+STAGES = ('load', 'embed', 'retrieve', 'rerank', 'total')
+
+
+def sentence(rng, low=8, high=24):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize() + "."
+
+
+def build(workdir, n_chunks, model, rng):
+    paths = {
+        'index_path': os.path.join(workdir, 'faiss.index'),
+        'chunks_path': os.path.join(workdir, 'chunks.sqlite3'),
+        'lexical_path': os.path.join(workdir, 'bm25.npz'),
+    }
+    chunks = [{'file': f"paper{i // 50}.pdf", 'page': i % 50 + 1, 'offset': 0,
+               'text': " ".join(sentence(rng) for _ in range(rng.randint(4, 8)))} for i in range(n_chunks)]
+    store = ChunkStore(paths['chunks_path'])
+    store.add(range(n_chunks), chunks)
+    builder = IndexBuilder('flat')
+    builder.add(model.encode([chunk['text'] for chunk in chunks], convert_to_numpy=True, normalize_embeddings=True),
+                np.arange(n_chunks, dtype='int64'))
+    save_index(builder.finish(), paths['index_path'])
+    build_lexical_index(store, paths['lexical_path'])
+    store.close()
+    return paths
+
+
+def report(label, results, seconds):
+    timings = {stage: np.mean([result['timings'].get(stage, 0.0) for result in results]) for stage in STAGES}
+    skipped = {stage: sum(stage in result['skipped'] for result in results) for stage in ('retrieval', 'rerank')}
+    totals = [result['timings']['total'] for result in results]
+    print(f"{label:<26} {seconds / len(results) * 1000:7.1f}ms/request  p95 {np.percentile(totals, 95):7.1f}ms  "
+          + "  ".join(f"{stage} {timings[stage]:6.1f}" for stage in STAGES)
+          + f"  skipped retrieval {skipped['retrieval']}, rerank {skipped['rerank']}")
+
+
+def main(n_chunks=2000, n_requests=30):
+    workdir = tempfile.mkdtemp()
+    try:
+        rng = random.Random(0)
+        model = embedding_model()
+        set_model('embedding', 'benchmark', model)
+        set_model('reranker', 'benchmark', reranker_model())
+        paths = build(workdir, n_chunks, model, rng)
+        names = {'embedding_model_name': 'benchmark', 'reranker_model_name': 'benchmark'}
+        print(f"{n_chunks} chunks, {n_requests} requests")
+
+        queries = [sentence(rng, 4, 10) for _ in range(n_requests)]
+        start = time.perf_counter()
+        results = [RAGService(**paths, **names).search(query, budget=60) for query in queries]
+        report("service per request", results, time.perf_counter() - start)
+
+        service = RAGService(**paths, **names)
+        service.search("warm up", budget=60)
+        for budget in (60, 0.2, 0.01):
+            queries = [sentence(rng, 4, 10) for _ in range(n_requests)]
+            start = time.perf_counter()
+            results = [service.search(query, budget=budget) for query in queries]
+            report(f"shared, budget {budget}s", results, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
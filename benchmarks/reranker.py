@@ -0,0 +1,58 @@
+"""
+Cross-encoder reranking latency for k candidate chunks: the previous
+implementation (every pair padded into one tensor, one forward pass) vs
+rag.reranker.rerank (length-sorted micro-batches under inference_mode).
+
+    python -m benchmarks.reranker [repeats]
+
+Candidate lengths follow real chunks: most are near the chunk size, some
+(page tails) are short. Uses benchmarks/models.py for the model.
+"""
+import random
+import sys
+import time
+
+import torch
+
+from benchmarks import summarize
+from benchmarks.models import WORDS, reranker_model
+from rag.reranker import rerank
+
+KS = (5, 10, 20, 50, 100, 200)
+
+
+def rerank_previous(query, docs, tokenizer, model, top_n=3):
+    pairs = [(query, doc) for doc in docs]
+    inputs = tokenizer([q for q, d in pairs], [d for q, d in pairs], return_tensors='pt', padding=True, truncation=True)
+    with torch.no_grad():
+        scores = model(**inputs).logits.squeeze().tolist()
+    ranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
+    return [doc for doc, score in ranked[:top_n]]
+
+
+def make_docs(k, rng):
+    docs = []
+    for _ in range(k):
+        words = rng.randint(80, 100) if rng.random() < 0.7 else rng.randint(5, 80)
+        docs.append(" ".join(rng.choice(WORDS) for _ in range(words)))
+    return docs
+
+
+def main(repeats=3):
+    tokenizer, model = reranker_model()
+    print(f"torch threads: {torch.get_num_threads()}")
+    rng = random.Random(0)
+    query = "how does spacing review help students learn"
+    for k in KS:
+        docs = make_docs(k, rng)
+        for label, fn in (("previous", rerank_previous), ("bucketed", rerank)):
+            samples = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn(query, docs, tokenizer, model, top_n=3)
+                samples.append(time.perf_counter() - start)
+            summarize(f"k={k:<4} {label}", samples)
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,226 @@
+"""
+Inference backends for the embedding and reranker models.
+
+settings.RAG['MODEL_BACKEND'] picks how rag/models.py runs the models it loads:
+
+* 'torch' - the models as loaded, in fp32.
+* 'int8'  - torch with dynamic int8 quantization of every Linear layer.
+            No extra dependencies; weights shrink about 4x.
+* 'onnx'  - exported once to ONNX (under settings.RAG['ONNX_DIR']) and run
+            with onnxruntime on the CPU. Needs the optional `onnx` and
+            `onnxruntime` packages. Delete the exported files to re-export
+            after a model changes.
+
+Both alternatives keep the interfaces the rest of the package uses: the
+embedding model has a sentence-transformers style `encode`, and the reranker
+stays a (tokenizer, model) pair whose model returns `.logits`. Use
+embedding_drift and score_drift to check how far a backend moves results from
+fp32 torch; benchmarks/model_backends.py reports both alongside throughput.
+"""
+import inspect
+import os
+import re
+from types import SimpleNamespace
+
+import numpy as np
+
+from rag.config import get_setting
+
+BACKENDS = ('torch', 'int8', 'onnx')
+
+
+def quantize_int8(model):
+    """
+    Returns a copy of torch `model` with its Linear layers dynamically quantized to int8.
+    """
+    import torch
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def onnx_path(kind, name, onnx_dir=None):
+    filename = re.sub(r'[^\w.-]+', '_', name.strip('/')) + f'.{kind}.onnx'
+    return os.path.join(onnx_dir or get_setting('ONNX_DIR'), filename)
+
+
+def export_onnx(model, sample, path, output_name):
+    """
+    Export a transformers model to `path`, with dynamic batch and sequence axes.
+
+    Args:
+        model: A transformers model (e.g. BertModel, BertForSequenceClassification).
+        sample (dict): Tokenizer output (torch tensors) to trace with.
+        path (str): Where to write the .onnx file; written atomically.
+        output_name (str): Name of the first output, e.g. 'last_hidden_state' or 'logits'.
+    """
+    import torch
+
+    # Inputs are passed by keyword, so name them in the order of forward()'s parameters.
+    names = [name for name in inspect.signature(model.forward).parameters if name in sample]
+    axes = {name: {0: 'batch', 1: 'sequence'} for name in names}
+    axes[output_name] = {0: 'batch'} if output_name == 'logits' else {0: 'batch', 1: 'sequence'}
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with torch.no_grad():
+        torch.onnx.export(
+            model, ({name: sample[name] for name in names},), tmp_path, input_names=names,
+            output_names=[output_name], dynamic_axes=axes, opset_version=14,
+        )
+    os.replace(tmp_path, path)
+
+
+def _session(path):
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError("MODEL_BACKEND 'onnx' needs the onnx and onnxruntime packages.") from None
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+
+def _run(session, features):
+    inputs = {item.name: np.asarray(features[item.name], dtype='int64') for item in session.get_inputs()}
+    return session.run(None, inputs)[0]
+
+
+class OnnxEncoder:
+    """
+    A sentence-transformers model (transformer, pooling, optional Normalize) run by onnxruntime.
+
+    Only the transformer is exported; mean or CLS pooling and normalization are done in numpy.
+    """
+
+    def __init__(self, path, tokenizer, max_seq_length, pooling='mean', normalize=True):
+        self.session = _session(path)
+        self.tokenizer = tokenizer
+        self.max_seq_length = max_seq_length
+        self.pooling = pooling
+        self.normalize = normalize
+
+    @classmethod
+    def from_sentence_transformer(cls, model, path):
+        modules = list(model)
+        transformer, pooling = modules[0], modules[1]
+        mode = pooling.get_pooling_mode_str()
+        if mode not in ('mean', 'cls'):
+            raise ValueError(f"The ONNX backend supports mean or cls pooling, not {mode!r}.")
+        if not os.path.exists(path):
+            sample = model.tokenizer(['an example sentence', 'another'], padding=True, return_tensors='pt')
+            export_onnx(transformer.auto_model, sample, path, 'last_hidden_state')
+        normalize = any(type(module).__name__ == 'Normalize' for module in modules)
+        return cls(path, model.tokenizer, transformer.max_seq_length, mode, normalize)
+
+    def get_sentence_embedding_dimension(self):
+        return self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **kwargs):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        # Like sentence-transformers: encode in length order so batches pad little.
+        order = np.argsort([-len(sentence) for sentence in sentences], kind='stable')
+        embeddings = [None] * len(sentences)
+        for start in range(0, len(sentences), batch_size):
+            rows = order[start:start + batch_size]
+            features = self.tokenizer([sentences[row] for row in rows], padding=True, truncation=True,
+                                      max_length=self.max_seq_length, return_tensors='np')
+            hidden = _run(self.session, features)
+            if self.pooling == 'cls':
+                pooled = hidden[:, 0]
+            else:
+                mask = features['attention_mask'][..., None].astype(hidden.dtype)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for row, vector in zip(rows, pooled):
+                embeddings[row] = vector
+        vectors = np.stack(embeddings).astype('float32') if embeddings else np.empty((0, 0), dtype='float32')
+        return vectors[0] if single else vectors
+
+
+class OnnxSequenceClassifier:
+    """
+    A cross-encoder run by onnxruntime. Called like the transformers model it was
+    exported from, it returns an object whose `.logits` is a torch tensor.
+    """
+
+    def __init__(self, path):
+        self.session = _session(path)
+
+    @classmethod
+    def from_transformers(cls, tokenizer, model, path):
+        if not os.path.exists(path):
+            sample = tokenizer(['a query', 'a query'], ['a document', 'another document'], padding=True,
+                               return_tensors='pt')
+            export_onnx(model, sample, path, 'logits')
+        return cls(path)
+
+    def __call__(self, **features):
+        import torch
+        return SimpleNamespace(logits=torch.from_numpy(_run(self.session, features)))
+
+
+def embedding_model_for_backend(model, name, backend=None):
+    """
+    Returns sentence-transformers `model` (loaded as `name`) converted to `backend`.
+    """
+    backend = backend or get_setting('MODEL_BACKEND')
+    if backend == 'torch':
+        return model
+    if backend == 'int8':
+        return quantize_int8(model)
+    if backend == 'onnx':
+        return OnnxEncoder.from_sentence_transformer(model, onnx_path('embedding', name))
+    raise ValueError(f"Unknown MODEL_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}.")
+
+
+def reranker_for_backend(tokenizer, model, name, backend=None):
+    """
+    Returns the (tokenizer, model) of cross-encoder `name` converted to `backend`.
+    """
+    backend = backend or get_setting('MODEL_BACKEND')
+    if backend == 'torch':
+        return tokenizer, model
+    if backend == 'int8':
+        return tokenizer, quantize_int8(model)
+    if backend == 'onnx':
+        return tokenizer, OnnxSequenceClassifier.from_transformers(tokenizer, model, onnx_path('reranker', name))
+    raise ValueError(f"Unknown MODEL_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}.")
+
+
+def _ranks(values):
+    ranks = np.empty(len(values))
+    ranks[np.argsort(values, kind='stable')] = np.arange(len(values))
+    return ranks
+
+
+def embedding_drift(reference, candidate, sentences):
+    """
+    Cosine similarity between the embeddings two models give the same sentences.
+
+    Returns:
+        dict: 'mean_cosine' and 'min_cosine' over `sentences`.
+    """
+    a = np.asarray(reference.encode(list(sentences), convert_to_numpy=True), dtype='float64')
+    b = np.asarray(candidate.encode(list(sentences), convert_to_numpy=True), dtype='float64')
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return {'mean_cosine': float(cosine.mean()), 'min_cosine': float(cosine.min())}
+
+
+def score_drift(reference, candidate, query, docs):
+    """
+    How closely two cross-encoders agree on the scores of (query, doc) pairs.
+
+    Args:
+        reference, candidate (tuple): (tokenizer, model) pairs.
+
+    Returns:
+        dict: Pearson and Spearman correlation of the scores, and 'max_abs_diff'.
+    """
+    from rag.reranker import score_pairs
+    a = score_pairs(query, docs, *reference).astype('float64')
+    b = score_pairs(query, docs, *candidate).astype('float64')
+    return {
+        'pearson': float(np.corrcoef(a, b)[0, 1]),
+        'spearman': float(np.corrcoef(_ranks(a), _ranks(b))[0, 1]),
+        'max_abs_diff': float(np.abs(a - b).max()),
+    }
@@ -0,0 +1,208 @@
+"""
+Chunk texts and provenance in SQLite, keyed by FAISS id.
+
+Replaces the pickled {faiss id: chunk} dict, which had to be loaded whole
+into every process and rewritten whole on every change. Retrieval looks up
+only the ids FAISS returned, and ingestion appends new rows and deletes the
+id ranges of changed files.
+
+Migrate an existing pickle without re-embedding anything:
+
+    python -m rag.chunk_store [metadata.pkl] [chunks.sqlite3] [papers dir]
+
+The first pickles only held {'file', 'chunk'} per chunk, not its text. Their
+texts are rebuilt from the PDFs in the papers directory with the original
+split (whole-document text in 500-character slices), which is what those
+vectors were embedded from. If a PDF is gone or no longer has that chunk,
+migration stops and asks for a re-ingest instead of storing empty texts.
+"""
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+from rag.utils import load_pickle
+
+CHUNKS_PATH = 'rag/vectorDB/chunks.sqlite3'
+# SQLite limits the number of parameters in one statement.
+MAX_PARAMS = 500
+# Characters per chunk of the first ingestion, whose pickles lack texts.
+LEGACY_CHUNK_SIZE = 500
+
+
+def _row_to_chunk(row):
+    return {'file': row[1], 'page': row[2], 'chunk': row[3], 'offset': row[4], 'text': row[5]}
+
+
+class ChunkStore:
+    """
+    Chunks by FAISS id: `file`, `page`, `chunk` (number within the file),
+    `offset` (character offset within the page) and `text`.
+
+    Connections are per thread. Writes commit immediately unless they run
+    inside `transaction()`, which commits or rolls back as a whole.
+    """
+
+    def __init__(self, path=CHUNKS_PATH):
+        self.path = path
+        self.local = threading.local()
+        with self.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id INTEGER PRIMARY KEY, file TEXT, page INTEGER, chunk INTEGER,"
+                " char_offset INTEGER, text TEXT NOT NULL)"
+            )
+
+    def connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.path, timeout=30)
+            # Readers keep working while ingestion writes.
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connect()
+        if getattr(self.local, 'in_transaction', False):
+            yield conn
+            return
+        self.local.in_transaction = True
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.local.in_transaction = False
+
+    def add(self, ids, chunks):
+        """
+        Append chunks under new ids; an id that is already stored raises sqlite3.IntegrityError.
+        """
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO chunks (id, file, page, chunk, char_offset, text) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (int(faiss_id), chunk.get('file'), chunk.get('page'), chunk.get('chunk'),
+                     chunk.get('offset'), chunk['text'])
+                    for faiss_id, chunk in zip(ids, chunks)
+                ],
+            )
+
+    def delete_range(self, start, end=None):
+        """
+        Delete ids in [start, end); up to the last id when `end` is None.
+        """
+        with self.transaction() as conn:
+            if end is None:
+                conn.execute("DELETE FROM chunks WHERE id >= ?", (start,))
+            else:
+                conn.execute("DELETE FROM chunks WHERE id >= ? AND id < ?", (start, end))
+
+    def clear(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM chunks")
+
+    def get(self, faiss_id):
+        return self.get_many([faiss_id])[0]
+
+    def get_many(self, ids):
+        """
+        Returns the chunks of `ids` in the same order, with None for unknown ids (such as FAISS's -1).
+        """
+        ids = [int(faiss_id) for faiss_id in ids]
+        found = {}
+        conn = self.connect()
+        for start in range(0, len(ids), MAX_PARAMS):
+            batch = ids[start:start + MAX_PARAMS]
+            rows = conn.execute(
+                "SELECT id, file, page, chunk, char_offset, text FROM chunks"
+                f" WHERE id IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            found.update((row[0], _row_to_chunk(row)) for row in rows)
+        return [found.get(faiss_id) for faiss_id in ids]
+
+    def items(self):
+        """
+        Yields (id, chunk) pairs in id order.
+        """
+        rows = self.connect().execute("SELECT id, file, page, chunk, char_offset, text FROM chunks ORDER BY id")
+        for row in rows:
+            yield row[0], _row_to_chunk(row)
+
+    def next_id(self):
+        return self.connect().execute("SELECT COALESCE(MAX(id) + 1, 0) FROM chunks").fetchone()[0]
+
+    def __len__(self):
+        return self.connect().execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+
+def legacy_chunk_texts(pdf_path):
+    """
+    The chunk texts the first ingestion embedded for a PDF: its pages joined, cut every LEGACY_CHUNK_SIZE characters.
+    """
+    from rag.extract import extract_pages
+
+    text = "".join(extract_pages(pdf_path))
+    return [text[i:i + LEGACY_CHUNK_SIZE] for i in range(0, len(text), LEGACY_CHUNK_SIZE)]
+
+
+def migrate_pickle(pickle_path, path=CHUNKS_PATH, papers_dir=None):
+    """
+    Copy chunks from a metadata pickle into a new chunk store.
+
+    Accepts the {faiss id: chunk dict} pickles written by rag.ingest and the
+    older lists (of chunk dicts or plain texts) indexed by position. Chunk
+    dicts without a text get it back from their PDF in `papers_dir`.
+
+    Returns:
+        int: Number of chunks copied.
+
+    Raises:
+        FileExistsError: If `path` already exists.
+        ValueError: If a chunk's text can't be rebuilt; re-ingest instead.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists.")
+    if papers_dir is None:
+        from rag.ingest import PAPERS_DIR as papers_dir
+    metadata = load_pickle(pickle_path)
+    items = metadata.items() if isinstance(metadata, dict) else enumerate(metadata)
+    ids, chunks = [], []
+    texts_file, texts = None, []
+    for faiss_id, chunk in items:
+        if isinstance(chunk, str):
+            chunk = {'text': chunk}
+        elif 'text' not in chunk:
+            if chunk.get('file') != texts_file:
+                texts_file = chunk.get('file')
+                pdf_path = os.path.join(papers_dir, texts_file or '')
+                texts = legacy_chunk_texts(pdf_path) if texts_file and os.path.isfile(pdf_path) else []
+            if not 0 <= chunk.get('chunk', -1) < len(texts):
+                raise ValueError(
+                    f"Can't rebuild the text of chunk {chunk.get('chunk')} of {texts_file!r} from {papers_dir}; "
+                    f"re-ingest with `python -m rag.ingest --rebuild` instead."
+                )
+            chunk = {**chunk, 'offset': chunk['chunk'] * LEGACY_CHUNK_SIZE, 'text': texts[chunk['chunk']]}
+        ids.append(faiss_id)
+        chunks.append(chunk)
+    store = ChunkStore(path)
+    store.add(ids, chunks)
+    store.close()
+    return len(ids)
+
+
+if __name__ == "__main__":
+    from rag.ingest import METADATA_PATH
+    args = sys.argv[1:4]
+    pickle_path = args[0] if args else METADATA_PATH
+    path = args[1] if len(args) > 1 else CHUNKS_PATH
+    papers_dir = args[2] if len(args) > 2 else None
+    print(f"Copied {migrate_pickle(pickle_path, path, papers_dir)} chunks from {pickle_path} to {path}.")
@@ -0,0 +1,138 @@
+"""
+Token-aware chunking of page text.
+
+Pages are cut at sentence and paragraph boundaries into chunks of at most
+`max_tokens` tokens, counted with the embedding model's tokenizer, so chunks
+are never truncated by the embedder and never end mid-word or mid-sentence.
+A chunk is closed early at a paragraph break once it is half full. When a
+chunk has to be cut inside a paragraph, the next one repeats its last
+sentences, up to `overlap` tokens, so text near the cut keeps its context.
+
+Chunking is a generator over (page number, text) pairs and never joins
+pages, so each chunk keeps its page and the character offset where it starts
+on that page. Settings: CHUNK_MAX_TOKENS and CHUNK_OVERLAP_TOKENS; the token
+budget is capped at the embedder's max_seq_length.
+"""
+import re
+
+from rag.config import get_setting
+
+# Blank lines separate paragraphs; sentences end in . ! or ?, maybe followed by a closing quote or bracket.
+_BOUNDARY = re.compile(r'\s*\n[ \t]*\n\s*|(?<=[.!?])\s+|(?<=[.!?]["\')\]])\s+')
+_WORD = re.compile(r'\S+')
+# Without a tokenizer, words and punctuation marks are counted instead.
+_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+
+def token_counter(tokenizer=None):
+    """
+    Returns a function mapping a list of texts to their token counts, without special tokens.
+    """
+    if tokenizer is None:
+        return lambda texts: [len(_TOKEN.findall(text)) for text in texts]
+
+    def count(texts):
+        if not texts:
+            return []
+        return [len(ids) for ids in tokenizer(list(texts), add_special_tokens=False)['input_ids']]
+    return count
+
+
+def chunk_budget(model=None, max_tokens=None):
+    """
+    The token budget for chunks embedded by `model`: `max_tokens` (default CHUNK_MAX_TOKENS),
+    capped so [CLS] chunk [SEP] fits the model's max_seq_length.
+    """
+    max_tokens = max_tokens or get_setting('CHUNK_MAX_TOKENS')
+    limit = getattr(model, 'max_seq_length', None)
+    return min(max_tokens, limit - 2) if limit else max_tokens
+
+
+def _segments(text):
+    """
+    Yields (start, end, starts_paragraph) for the sentences of `text`.
+    """
+    start, paragraph = 0, True
+    for match in _BOUNDARY.finditer(text):
+        if text[start:match.start()].strip():
+            yield start, match.start(), paragraph
+            paragraph = False
+        if match.group().count('\n') >= 2:
+            paragraph = True
+        start = match.end()
+    if text[start:].strip():
+        yield start, len(text), paragraph
+
+
+def _split_long(text, start, end, max_tokens, count):
+    """
+    Split a sentence longer than `max_tokens` at word boundaries. A single word
+    over the budget stays whole; the embedder truncates it.
+    """
+    words = [(start + m.start(), start + m.end()) for m in _WORD.finditer(text, start, end)]
+    pieces, piece_start, total = [], None, 0
+    for (word_start, word_end), tokens in zip(words, count([text[s:e] for s, e in words])):
+        if piece_start is not None and total + tokens > max_tokens:
+            pieces.append((piece_start, piece_end, total))
+            piece_start, total = None, 0
+        if piece_start is None:
+            piece_start = word_start
+        piece_end = word_end
+        total += tokens
+    if piece_start is not None:
+        pieces.append((piece_start, piece_end, total))
+    return pieces
+
+
+def chunk_page(text, max_tokens, overlap, count):
+    """
+    Yields (offset, end, tokens) for the chunks of one page of text.
+    """
+    segments = list(_segments(text))
+    tokens = count([text[start:end] for start, end, _ in segments])
+    units = []
+    for (start, end, paragraph), n in zip(segments, tokens):
+        if n > max_tokens:
+            pieces = _split_long(text, start, end, max_tokens, count)
+            units.extend((s, e, t, paragraph and i == 0) for i, (s, e, t) in enumerate(pieces))
+        else:
+            units.append((start, end, n, paragraph))
+
+    chunk, total = [], 0
+    for unit in units:
+        _, _, n, paragraph = unit
+        if chunk and (total + n > max_tokens or (paragraph and total * 2 >= max_tokens)):
+            yield chunk[0][0], chunk[-1][1], total
+            # Overlap only when cutting inside a paragraph.
+            kept = []
+            if not paragraph:
+                for previous in reversed(chunk):
+                    if sum(u[2] for u in kept) + previous[2] > overlap:
+                        break
+                    kept.insert(0, previous)
+            while kept and sum(u[2] for u in kept) + n > max_tokens:
+                kept.pop(0)
+            chunk, total = kept, sum(u[2] for u in kept)
+        chunk.append(unit)
+        total += n
+    if chunk:
+        yield chunk[0][0], chunk[-1][1], total
+
+
+def iter_page_chunks(pages, max_tokens=None, overlap=None, tokenizer=None):
+    """
+    Yields chunk dicts with `page`, `offset` (characters into the page), `tokens` and `text`.
+
+    Args:
+        pages (iterable): (page number, text) pairs; consumed lazily.
+        max_tokens (int, optional): Token budget per chunk; defaults to CHUNK_MAX_TOKENS.
+        overlap (int, optional): Tokens repeated across a cut; defaults to CHUNK_OVERLAP_TOKENS.
+        tokenizer (optional): A transformers tokenizer to count tokens with; without one,
+            words and punctuation marks are counted.
+    """
+    max_tokens = max_tokens or get_setting('CHUNK_MAX_TOKENS')
+    overlap = get_setting('CHUNK_OVERLAP_TOKENS') if overlap is None else overlap
+    count = token_counter(tokenizer)
+    for page_number, text in pages:
+        for offset, end, tokens in chunk_page(text, max_tokens, overlap, count):
+            yield {'page': page_number, 'offset': offset, 'tokens': tokens, 'text': text[offset:end]}
@@ -0,0 +1,72 @@
+"""
+Settings for the rag package.
+
+Values come from the `RAG` dict in the Django settings when Django is
+configured, and fall back to DEFAULTS otherwise, e.g. when running
+`python -m rag.ingest` on its own.
+"""
+import os
+
+DEFAULTS = {
+    # Loaded on first use and shared per process; see rag/models.py.
+    'EMBEDDING_MODEL': 'all-MiniLM-L6-v2',
+    'RERANKER_MODEL': 'cross-encoder/ms-marco-MiniLM-L-6-v2',
+    # How the models run: 'torch' (fp32), 'int8' (dynamically quantized torch)
+    # or 'onnx' (onnxruntime, exported once to ONNX_DIR); see rag/backends.py.
+    'MODEL_BACKEND': 'torch',
+    'ONNX_DIR': 'rag/vectorDB/onnx',
+    # Vector index: 'flat' (exact), 'ivf_flat', 'ivf_pq' or 'hnsw'; see rag/index.py.
+    'INDEX_TYPE': 'flat',
+    'NLIST': 256,
+    'PQ_M': 16,
+    'PQ_BITS': 8,
+    'NPROBE': 16,
+    'HNSW_M': 32,
+    'EF_CONSTRUCTION': 80,
+    'EF_SEARCH': 64,
+    # Memory-map IVF indexes when serving queries, sharing them between workers.
+    'MMAP_INDEX': True,
+    # Cross-encoder pairs scored per forward pass, the token limit per pair,
+    # and torch CPU threads (None leaves torch's default); see rag/reranker.py.
+    'RERANK_BATCH_SIZE': 16,
+    'RERANK_MAX_LENGTH': 512,
+    'RERANK_THREADS': None,
+    # Query embeddings kept by rag.query_cache.QueryEmbeddingCache.
+    'QUERY_CACHE_SIZE': 1024,
+    # Chunks are cut at sentence / paragraph boundaries to at most this many
+    # tokens (capped at the embedder's limit), repeating up to
+    # CHUNK_OVERLAP_TOKENS across cuts; see rag/chunking.py.
+    'CHUNK_MAX_TOKENS': 200,
+    'CHUNK_OVERLAP_TOKENS': 32,
+    # 'dense' (FAISS only) or 'hybrid': FAISS and BM25 (rag/lexical.py), each
+    # taking HYBRID_CANDIDATES hits, merged by reciprocal-rank fusion with
+    # constant RRF_K. With SKIP_EASY_RERANK, hybrid queries whose top hit both
+    # retrievers rank first skip the cross-encoder; see rag/retriever.py.
+    'RETRIEVAL_MODE': 'dense',
+    'HYBRID_CANDIDATES': 20,
+    'RRF_K': 60,
+    'SKIP_EASY_RERANK': True,
+    'BM25_K1': 1.2,
+    'BM25_B': 0.75,
+    # Research passages injected into syllabus and lesson plan prompts by
+    # rag/service.py: CONTEXT_CANDIDATES chunks retrieved, the best
+    # CONTEXT_PASSAGES kept (each cut to CONTEXT_MAX_CHARS), within
+    # CONTEXT_BUDGET seconds per prompt.
+    'PROMPT_CONTEXT': True,
+    'CONTEXT_BUDGET': 1.0,
+    'CONTEXT_CANDIDATES': 10,
+    'CONTEXT_PASSAGES': 3,
+    'CONTEXT_MAX_CHARS': 1200,
+    # Vectors sampled to train IVF indexes.
+    'TRAIN_SIZE': 20000,
+}
+
+
+def get_setting(name):
+    try:
+        from django.conf import settings
+    except ImportError:
+        return DEFAULTS[name]
+    if settings.configured or os.environ.get('DJANGO_SETTINGS_MODULE'):
+        return getattr(settings, 'RAG', {}).get(name, DEFAULTS[name])
+    return DEFAULTS[name]
@@ -1,55 +1,53 @@
-import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import os
 import pickle
-from PyPDF2 import PdfReader
-from rag.utils import split_text
+from rag.chunking import chunk_budget, iter_page_chunks
+from rag.models import get_embedding_model
 
-# 1. Load embedding model
-def load_embedding_model(model_name="all-MiniLM-L6-v2"):
-    return SentenceTransformer(model_name)
+# 1. Load embedding model (once per process, on first use; see rag/models.py)
+def load_embedding_model(model_name=None):
+    return get_embedding_model(model_name)
 
-model = load_embedding_model()
+def __getattr__(name):
+    # `rag.embedding.model` used to be loaded at import time; it is now
+    # loaded when first accessed.
+    if name == 'model':
+        return get_embedding_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # 2. Set FAISS index path
-INDEX_PATH = 'rag/vectorDB/faiss_index.index'
-METADATA_PATH = 'rag/vectorDB/metadata.pkl'
-PAPERS_DIR = 'rag/papers'
+from rag.ingest import INDEX_PATH, METADATA_PATH, PAPERS_DIR, ingest_papers
+from rag.extract import extract_pages
+from rag.index import IndexBuilder, load_index, save_index
+from rag.config import get_setting
 
 def extract_text_from_pdf(pdf_path):
-    reader = PdfReader(pdf_path)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-        #print(text)
-    return text
-
-def load_all_papers_and_embed(chunk_size=500):
+    return "".join(extract_pages(pdf_path))
+
+def load_all_papers_and_embed(max_tokens=None):
+    model = get_embedding_model()
     documents = []
     metadata = []
     for fname in os.listdir(PAPERS_DIR):
         if fname.endswith('.pdf'):
             pdf_path = os.path.join(PAPERS_DIR, fname)
-            text = extract_text_from_pdf(pdf_path)
-            chunks = split_text(text, chunk_size)
-            documents.extend(chunks)
+            pages = enumerate(extract_pages(pdf_path), start=1)
+            tokenizer = getattr(model, 'tokenizer', None)
+            chunks = list(iter_page_chunks(pages, chunk_budget(model, max_tokens), tokenizer=tokenizer))
+            documents.extend(chunk['text'] for chunk in chunks)
             # 메타데이터: 파일명, chunk 인덱스
-            metadata.extend([{'file': fname, 'chunk': i} for i in range(len(chunks))])
+            metadata.extend([{'file': fname, 'chunk': i, 'page': chunk['page']} for i, chunk in enumerate(chunks)])
     if not documents:
         raise ValueError("No PDF documents found in the papers directory.")
     embeddings = model.encode(documents, convert_to_numpy=True)
     return documents, embeddings, metadata
 
-def build_and_save_index_from_papers():
-    documents, embeddings, metadata = load_all_papers_and_embed()
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
-    faiss.write_index(index, INDEX_PATH)
-    with open(METADATA_PATH, 'wb') as f:
-        pickle.dump(metadata, f)
-    print(f"Indexed {len(documents)} chunks from {len(metadata)} PDF files.")
+def build_and_save_index_from_papers(rebuild=False):
+    # Streams chunks into the index and only processes new or changed PDFs;
+    # see rag/ingest.py.
+    result = ingest_papers(model=get_embedding_model(), rebuild=rebuild)
+    print(f"Indexed {result['chunks']} chunks from {len(result['added'])} new or changed PDF files "
+          f"({len(result['unchanged'])} unchanged, {len(result['removed'])} removed).")
 
 # 3. Embed documents
 def embed_documents(documents):
@@ -57,26 +55,28 @@ def embed_documents(documents):
     documents: List[str]
     returns: np.array of shape (num_docs, embedding_dim)
     """
-    embeddings = model.encode(documents, convert_to_numpy=True)
+    embeddings = get_embedding_model().encode(documents, convert_to_numpy=True)
     return embeddings
 
 
 # 4. Build and save FAISS index
-def build_faiss_index(embeddings, dimension):
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
-    return index
+def build_faiss_index(embeddings, dimension, index_type=None):
+    # Index type and training follow settings.RAG; see rag/index.py.
+    builder = IndexBuilder(index_type or get_setting('INDEX_TYPE'))
+    builder.add(np.asarray(embeddings, dtype='float32').reshape(-1, dimension),
+                np.arange(len(embeddings), dtype='int64'))
+    return builder.finish()
 
 
 def save_faiss_index(index, path=INDEX_PATH):
-    faiss.write_index(index, path)
+    save_index(index, path)
 
 
-def load_faiss_index(path=INDEX_PATH):
-    if os.path.exists(path):
-        return faiss.read_index(path)
-    else:
-        raise FileNotFoundError(f"{path} not found.")
+def load_faiss_index(path=INDEX_PATH, mmap=None):
+    # Also applies the saved nprobe / ef_search; see load_vector_db for mmap.
+    if mmap is None:
+        mmap = get_setting('MMAP_INDEX')
+    return load_index(path, mmap=mmap)
 
 
 # 5. Save / Load metadata
@@ -0,0 +1,159 @@
+"""
+Parallel PDF text extraction with an on-disk cache.
+
+Each PDF is cut into runs of pages that worker processes extract
+independently, so both many small files and a few large ones spread across
+cores. Page texts are kept as lists and only joined when needed. Extracted
+pages are cached as JSON under the file's SHA-256, so re-indexing (for
+example with a new chunker or embedder) skips extraction entirely.
+
+Workers are spawned rather than forked: ingestion has already loaded the
+embedding model and keeps encoding while extraction runs, and forking a
+process with live torch / tokenizers threads can deadlock.
+"""
+import json
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from PyPDF2 import PdfReader
+
+TEXT_CACHE_DIR = 'rag/vectorDB/text_cache'
+PAGES_PER_TASK = 16
+# Page runs submitted per worker ahead of the consumer.
+TASKS_PER_WORKER = 4
+
+
+def extract_pages(pdf_path, start=0, end=None):
+    """
+    Returns the text of pages [start, end) of a PDF as a list of strings.
+    """
+    reader = PdfReader(pdf_path)
+    return [page.extract_text() or "" for page in reader.pages[start:end]]
+
+
+def _extract_task(task):
+    pdf_path, start, end = task
+    return extract_pages(pdf_path, start, end)
+
+
+class TextCache:
+    """
+    Page texts of already-extracted PDFs, one JSON file per content hash.
+    """
+
+    def __init__(self, path=TEXT_CACHE_DIR):
+        self.path = path
+
+    def entry_path(self, sha256):
+        return os.path.join(self.path, sha256 + '.json')
+
+    def __contains__(self, sha256):
+        return os.path.exists(self.entry_path(sha256))
+
+    def get(self, sha256):
+        try:
+            with open(self.entry_path(sha256), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, sha256, pages):
+        os.makedirs(self.path, exist_ok=True)
+        path = self.entry_path(sha256)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(pages, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def _page_tasks(pending, pages_per_task):
+    """
+    Yields (name, (path, start, end)) page runs of the pending files, reading each file's page count lazily.
+    """
+    for name, path, sha256 in pending:
+        page_count = len(PdfReader(path).pages)
+        for start in range(0, max(page_count, 1), pages_per_task):
+            yield name, (path, start, start + pages_per_task)
+
+
+def _windowed_map(executor, fn, tasks, window):
+    """
+    Like `executor.map` over (owner, task) pairs, yielding (owner, result) in order,
+    but with at most `window` tasks submitted and not yet consumed.
+    """
+    tasks = iter(tasks)
+    futures = deque((owner, executor.submit(fn, task)) for owner, task in islice(tasks, window))
+    while futures:
+        owner, future = futures.popleft()
+        result = future.result()
+        for next_owner, task in islice(tasks, 1):
+            futures.append((next_owner, executor.submit(fn, task)))
+        yield owner, result
+
+
+def extract_corpus(files, workers=None, cache=None, pages_per_task=PAGES_PER_TASK):
+    """
+    Extract many PDFs, in parallel and through the cache.
+
+    Memory stays bounded by a few files' text however large the corpus is:
+    cached texts are read one file at a time as they are yielded, and at most
+    `workers * TASKS_PER_WORKER` page runs are in flight or waiting to be
+    consumed.
+
+    Args:
+        files (list): (name, path, sha256) triples.
+        workers (int, optional): Worker processes; defaults to the CPU count.
+            With 1, everything runs in this process.
+        cache (TextCache, optional): Where extracted pages are looked up and stored.
+        pages_per_task (int): Pages a worker extracts per task.
+
+    Yields:
+        tuple: (name, list of page texts), in the order of `files`.
+    """
+    workers = workers or os.cpu_count() or 1
+    files = list(files)
+    pending = [(name, path, sha256) for name, path, sha256 in files if not (cache and sha256 in cache)]
+
+    if workers == 1 or not pending:
+        extracted = ((name, extract_pages(path)) for name, path, sha256 in pending)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        results = _windowed_map(executor, _extract_task, _page_tasks(pending, pages_per_task),
+                                workers * TASKS_PER_WORKER)
+
+        def reassemble():
+            current, buffer = None, []
+            for owner, pages in results:
+                if owner != current and current is not None:
+                    yield current, buffer
+                    buffer = []
+                current = owner
+                buffer.extend(pages)
+            if current is not None:
+                yield current, buffer
+
+        extracted = reassemble()
+
+    pending_names = {name for name, _, _ in pending}
+    try:
+        for name, path, sha256 in files:
+            if name not in pending_names:
+                pages = cache.get(sha256)
+                if pages is None:
+                    # The entry went missing or got corrupted since the check above.
+                    pages = extract_pages(path)
+                    cache.set(sha256, pages)
+                yield name, pages
+                continue
+            # Pending files come out of `extracted` in the same order as `files`.
+            done_name, pages = next(extracted)
+            if cache:
+                cache.set(sha256, pages)
+            yield done_name, pages
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,233 @@
+"""
+FAISS index types for the chunk vectors.
+
+    flat      exact search; cost grows linearly with the number of chunks
+    ivf_flat  inverted lists over k-means cells; searches `nprobe` cells
+    ivf_pq    as ivf_flat, with vectors compressed by product quantization
+    hnsw      graph search; `ef_search` trades recall for speed
+
+IVF indexes are trained before anything is added, on `TRAIN_SIZE` vectors
+drawn at random (with a fixed seed) from the first `TRAIN_SIZE *
+IndexBuilder.POOL_FACTOR` ingested. Chunks arrive in file order, so training
+on the first vectors alone would fit the cells to the first few PDFs. Search parameters are saved next to the
+index in `<index path>.json` and applied again by `load_index`.
+
+`load_index(path, mmap=True)` maps the inverted lists of IVF indexes from the
+file instead of copying them into the heap, so every worker process serving
+the same file shares one copy through the OS page cache. FAISS only supports
+this for IVF indexes; flat and HNSW indexes are always read into memory.
+
+faiss itself is imported on first use, so importing this module is cheap.
+"""
+import json
+import logging
+import os
+
+import numpy as np
+
+from rag.config import get_setting
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+
+logger = logging.getLogger(__name__)
+
+
+def needs_training(index_type):
+    return index_type in ('ivf_flat', 'ivf_pq')
+
+
+def build_index(index_type, dimension, n_train=None):
+    """
+    Create an empty index that accepts `add_with_ids`.
+
+    Args:
+        index_type (str): One of INDEX_TYPES.
+        dimension (int): Vector size.
+        n_train (int, optional): Size of the training sample for IVF indexes;
+            the number of cells (and PQ centroids) is reduced to fit it.
+
+    Returns:
+        faiss.Index
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}.")
+    import faiss
+
+    if index_type == 'flat':
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+
+    if index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, get_setting('HNSW_M'))
+        index.hnsw.efConstruction = get_setting('EF_CONSTRUCTION')
+        return faiss.IndexIDMap2(index)
+
+    nlist = get_setting('NLIST')
+    pq_bits = get_setting('PQ_BITS')
+    if n_train:
+        # k-means wants ~39 points per centroid; below that, fewer cells and
+        # PQ centroids are better than undertrained ones.
+        nlist = max(1, min(nlist, n_train // 39))
+        pq_bits = max(1, min(pq_bits, (n_train // 39).bit_length() - 1))
+    quantizer = faiss.IndexFlatL2(dimension)
+    if index_type == 'ivf_flat':
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+    else:
+        pq_m = get_setting('PQ_M')
+        if dimension % pq_m:
+            raise ValueError(f"PQ_M ({pq_m}) must divide the vector dimension ({dimension}).")
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, pq_m, pq_bits)
+        index.pq.cp.min_points_per_centroid = 1
+    # Tiny corpora train with fewer points than FAISS recommends; it copes, so don't warn.
+    index.cp.min_points_per_centroid = 1
+    return index
+
+
+def training_sample(vectors, n_train, seed=0):
+    """
+    Returns `n_train` of `vectors` picked at random (all of them if there are fewer), in their original order.
+    """
+    if len(vectors) <= n_train:
+        return vectors
+    rng = np.random.default_rng(seed)
+    return vectors[np.sort(rng.choice(len(vectors), n_train, replace=False))]
+
+
+class IndexBuilder:
+    """
+    Adds batches of vectors to an index, creating it from the first batch.
+
+    An index type that needs training holds batches back until
+    `train_size * POOL_FACTOR` vectors have arrived (or `finish` is called),
+    trains on a random `train_size` of them and then adds them all, so
+    ingestion can keep streaming.
+    """
+
+    # Held-back vectors per training vector; the pool is what the sample can cover.
+    POOL_FACTOR = 4
+
+    def __init__(self, index_type, index=None, train_size=None):
+        self.index_type = index_type
+        self.index = index
+        self.train_size = train_size or get_setting('TRAIN_SIZE')
+        self.pending = []
+        self.pending_count = 0
+
+    def add(self, vectors, ids):
+        if self.index is not None and self.index.is_trained:
+            self.index.add_with_ids(vectors, ids)
+            return
+        if not needs_training(self.index_type):
+            self.index = build_index(self.index_type, vectors.shape[1])
+            self.index.add_with_ids(vectors, ids)
+            return
+        self.pending.append((vectors, ids))
+        self.pending_count += len(vectors)
+        if self.pending_count >= self.train_size * self.POOL_FACTOR:
+            self._train_and_flush()
+
+    def _train_and_flush(self):
+        vectors = np.vstack([batch for batch, _ in self.pending])
+        ids = np.concatenate([batch_ids for _, batch_ids in self.pending])
+        self.pending, self.pending_count = [], 0
+        sample = training_sample(vectors, self.train_size)
+        if self.index is None:
+            self.index = build_index(self.index_type, vectors.shape[1], n_train=len(sample))
+        self.index.train(sample)
+        self.index.add_with_ids(vectors, ids)
+
+    def finish(self):
+        """
+        Train on whatever is still held back and return the index (None if nothing was added).
+        """
+        if self.pending:
+            self._train_and_flush()
+        return self.index
+
+
+def get_search_params(index_type):
+    """
+    The search parameters configured for an index type.
+    """
+    if needs_training(index_type):
+        return {'nprobe': get_setting('NPROBE')}
+    if index_type == 'hnsw':
+        return {'ef_search': get_setting('EF_SEARCH')}
+    return {}
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """
+    Apply `nprobe` (IVF) and/or `ef_search` (HNSW) to an index, looking through id maps.
+    """
+    import faiss
+    if nprobe is not None:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    if ef_search is not None:
+        inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+        faiss.downcast_index(inner).hnsw.efSearch = ef_search
+
+
+def index_type_of(index):
+    import faiss
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexIVFPQ):
+        return 'ivf_pq'
+    if isinstance(inner, faiss.IndexIVF):
+        return 'ivf_flat'
+    if isinstance(inner, faiss.IndexHNSW):
+        return 'hnsw'
+    return 'flat'
+
+
+def config_path(index_path):
+    return index_path + '.json'
+
+
+def save_index(index, path, search_params=None):
+    """
+    Write the index and, next to it, its type and search parameters.
+    """
+    import faiss
+    index_type = index_type_of(index)
+    params = get_search_params(index_type) if search_params is None else search_params
+    tmp_path = path + '.tmp'
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+    with open(config_path(path) + '.tmp', 'w') as f:
+        json.dump({'type': index_type, **params}, f, indent=2)
+    os.replace(config_path(path) + '.tmp', config_path(path))
+
+
+def load_index(path, mmap=False, **search_params):
+    """
+    Read an index and apply its saved search parameters.
+
+    Args:
+        path (str): Index file written by `save_index`.
+        mmap (bool): Map IVF inverted lists from the file, read-only, instead
+            of loading them. The mapping stays valid when ingestion replaces
+            the file; reload to see the new index.
+        **search_params: `nprobe` / `ef_search`, overriding the saved values.
+
+    Returns:
+        faiss.Index
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found.")
+    import faiss
+    params = {}
+    if os.path.exists(config_path(path)):
+        with open(config_path(path)) as f:
+            params = json.load(f)
+    index_type = params.pop('type', None)
+    flags = 0
+    if mmap:
+        if needs_training(index_type):
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        else:
+            logger.info("FAISS can only memory-map IVF indexes; reading the %s index %s into memory.",
+                        index_type or 'untyped', path)
+    index = faiss.read_index(path, flags)
+    params.update(search_params)
+    set_search_params(index, **params)
+    return index
@@ -0,0 +1,226 @@
+"""
+Incremental, streaming ingestion of the PDF corpus into the FAISS index.
+
+PDF text is extracted in parallel (see rag/extract.py) and split lazily, one
+file at a time, into chunks at sentence and paragraph boundaries that fit
+the embedder's token limit (see rag/chunking.py). Chunks are embedded in
+fixed-size batches and appended to the index as they are produced, so memory
+is bounded by one file's text and one batch of vectors rather than by the
+corpus.
+
+Chunk texts go to a SQLite chunk store (see rag/chunk_store.py) in one
+transaction that is committed only once the index has been written. The BM25
+index (see rag/lexical.py) is then rebuilt from the chunk store.
+
+A manifest records the SHA-256 and the FAISS id range of every indexed file.
+On a rerun only new or changed PDFs are read and embedded; the vectors of
+changed or deleted files are removed from the index first. HNSW indexes
+cannot remove vectors, so with those (or after changing the configured index
+type or chunking settings) the whole index is rebuilt instead.
+
+    python -m rag.ingest [--rebuild]
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+from itertools import islice
+
+import numpy as np
+from rag.chunk_store import CHUNKS_PATH, ChunkStore
+from rag.chunking import chunk_budget, iter_page_chunks
+from rag.config import get_setting
+from rag.extract import TEXT_CACHE_DIR, TextCache, extract_corpus
+from rag.index import IndexBuilder, index_type_of, load_index, save_index
+from rag.lexical import LEXICAL_PATH, build_lexical_index
+from rag.models import get_embedding_model
+
+INDEX_PATH = 'rag/vectorDB/faiss_index.index'
+# Pickled chunks from before the chunk store; `python -m rag.chunk_store` migrates it.
+METADATA_PATH = 'rag/vectorDB/metadata.pkl'
+MANIFEST_PATH = 'rag/vectorDB/manifest.json'
+PAPERS_DIR = 'rag/papers'
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path, block_size=1 << 20):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def iter_chunks(fname, pages, max_tokens=None, overlap=None, tokenizer=None):
+    """
+    Yields chunk dicts with `file`, `page`, `chunk`, `offset` and `text` for the pages of one file.
+
+    Args:
+        fname (str): File name recorded in each chunk.
+        pages (iterable): (page number, text) pairs.
+        max_tokens, overlap, tokenizer: See rag.chunking.iter_page_chunks.
+    """
+    chunks = iter_page_chunks(pages, max_tokens=max_tokens, overlap=overlap, tokenizer=tokenizer)
+    for chunk_number, chunk in enumerate(chunks):
+        yield {'file': fname, 'page': chunk['page'], 'chunk': chunk_number, 'offset': chunk['offset'],
+               'text': chunk['text']}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {'files': {}, 'next_id': 0}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def ingest_papers(papers_dir=PAPERS_DIR, index_path=INDEX_PATH, chunks_path=CHUNKS_PATH,
+                  manifest_path=MANIFEST_PATH, model=None, batch_size=64, max_tokens=None, overlap=None,
+                  rebuild=False, workers=None, text_cache_dir=TEXT_CACHE_DIR, index_type=None,
+                  lexical_path=LEXICAL_PATH):
+    """
+    Bring the index up to date with the PDFs in `papers_dir`.
+
+    Args:
+        papers_dir (str): Directory of PDFs.
+        index_path (str): Where the FAISS index is stored.
+        chunks_path (str): SQLite chunk store, see rag/chunk_store.py.
+        manifest_path (str): JSON manifest of indexed files.
+        model: Encoder with a sentence-transformers style `encode`; defaults to the shared embedding model.
+        batch_size (int): Chunks embedded and added per step.
+        max_tokens (int, optional): Token budget per chunk; defaults to CHUNK_MAX_TOKENS, capped at the
+            model's max_seq_length.
+        overlap (int, optional): Tokens repeated across a cut; defaults to CHUNK_OVERLAP_TOKENS.
+        rebuild (bool): Ignore the manifest and index every file again.
+        workers (int, optional): Processes extracting PDF text; defaults to the CPU count.
+        text_cache_dir (str): Cache of extracted page texts by file hash; None disables it.
+        index_type (str, optional): See rag/index.py; defaults to the INDEX_TYPE setting.
+        lexical_path (str): Where the BM25 index is stored; None skips building it.
+
+    Returns:
+        dict: `added`, `removed` and `unchanged` file names, and `chunks` added.
+    """
+    if model is None:
+        model = get_embedding_model()
+
+    index_type = index_type or get_setting('INDEX_TYPE')
+    chunking = {
+        'max_tokens': chunk_budget(model, max_tokens),
+        'overlap': get_setting('CHUNK_OVERLAP_TOKENS') if overlap is None else overlap,
+    }
+    tokenizer = getattr(model, 'tokenizer', None)
+
+    pdfs = {
+        fname: os.path.join(papers_dir, fname)
+        for fname in sorted(os.listdir(papers_dir)) if fname.endswith('.pdf')
+    }
+    hashes = {fname: file_hash(path) for fname, path in pdfs.items()}
+
+    manifest = {'files': {}, 'next_id': 0} if rebuild else load_manifest(manifest_path)
+    index = None
+    if manifest['files'] and os.path.exists(index_path) and os.path.exists(chunks_path):
+        index = load_index(index_path)
+        if index_type_of(index) != index_type:
+            logger.info("Index type changed from %s to %s; rebuilding.", index_type_of(index), index_type)
+            index = None
+        elif manifest.get('chunking') != chunking:
+            logger.info("Chunking settings changed to %s; rebuilding.", chunking)
+            index = None
+
+    stale = {fname: entry for fname, entry in manifest['files'].items() if hashes.get(fname) != entry['sha256']}
+    if index is not None:
+        ranges = [entry['ids'] for entry in stale.values() if entry['ids'][1] > entry['ids'][0]]
+        indexed = [entry['ids'] for entry in manifest['files'].values()] + manifest.get('documents', [])
+        # Vectors past `next_id` were added by a run that died before saving
+        # the manifest; their files are still pending and get added again.
+        if index.ntotal > sum(end - start for start, end in indexed):
+            ranges.append([manifest['next_id'], 2 ** 62])
+        if ranges and index_type == 'hnsw':
+            logger.info("HNSW indexes cannot remove vectors; rebuilding.")
+            index = None
+        else:
+            import faiss
+            for start, end in ranges:
+                index.remove_ids(faiss.IDSelectorRange(start, end))
+
+    if index is None:
+        # No usable previous build (or an index without ids): start over.
+        manifest, stale = {'files': {}, 'next_id': 0}, {}
+    manifest['chunking'] = chunking
+
+    os.makedirs(os.path.dirname(chunks_path) or '.', exist_ok=True)
+    store = ChunkStore(chunks_path)
+    try:
+        with store.transaction():
+            if index is None:
+                store.clear()
+            store.delete_range(manifest['next_id'])
+
+            removed = []
+            for fname, entry in stale.items():
+                store.delete_range(*entry['ids'])
+                del manifest['files'][fname]
+                removed.append(fname)
+
+            pending = [(fname, path, hashes[fname]) for fname, path in pdfs.items() if fname not in manifest['files']]
+            cache = TextCache(text_cache_dir) if text_cache_dir else None
+            builder = IndexBuilder(index_type, index)
+            added, chunks_added = [], 0
+            for fname, pages in extract_corpus(pending, workers=workers, cache=cache):
+                start = manifest['next_id']
+                chunks = iter_chunks(fname, enumerate(pages, start=1), tokenizer=tokenizer, **chunking)
+                for batch in batched(chunks, batch_size):
+                    vectors = np.asarray(
+                        model.encode([chunk['text'] for chunk in batch], batch_size=batch_size, convert_to_numpy=True),
+                        dtype='float32',
+                    )
+                    ids = np.arange(manifest['next_id'], manifest['next_id'] + len(batch), dtype='int64')
+                    builder.add(vectors, ids)
+                    store.add(ids.tolist(), batch)
+                    manifest['next_id'] += len(batch)
+                    chunks_added += len(batch)
+                manifest['files'][fname] = {'sha256': hashes[fname], 'ids': [start, manifest['next_id']]}
+                added.append(fname)
+                logger.info("Indexed %s (%s chunks)", fname, manifest['next_id'] - start)
+
+            index = builder.finish()
+            if index is None:
+                raise ValueError("No PDF documents found in the papers directory.")
+
+            if added or removed:
+                os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+                save_index(index, index_path)
+            if lexical_path and (added or removed or not os.path.exists(lexical_path)):
+                build_lexical_index(store, lexical_path)
+        if added or removed:
+            # Written last: if anything above fails, the next run redoes these files.
+            save_manifest(manifest, manifest_path)
+    finally:
+        store.close()
+
+    return {
+        'added': added,
+        'removed': removed,
+        'unchanged': [fname for fname in pdfs if fname not in added],
+        'chunks': chunks_added,
+    }
+
+
+if __name__ == "__main__":
+    result = ingest_papers(rebuild='--rebuild' in sys.argv)
+    print(f"Added {len(result['added'])} files ({result['chunks']} chunks), "
+          f"removed {len(result['removed'])}, unchanged {len(result['unchanged'])}.")
@@ -0,0 +1,138 @@
+"""
+BM25 lexical index over the chunk store.
+
+Dense retrieval misses exact terms it has never seen (names, acronyms,
+course codes); BM25 finds them. Ingestion rebuilds this index from the chunk
+store whenever it changes the FAISS index, and hybrid retrieval fuses the two
+rankings (see rag/retriever.py).
+
+The index is an inverted index in CSR form, saved as one compressed .npz:
+the sorted vocabulary as a single newline-separated UTF-8 blob, and for each
+term a slice of (document position, term frequency) postings, plus the FAISS
+id and length of every document. k1 and b (BM25_K1, BM25_B) are applied at
+query time, so changing them needs no rebuild.
+"""
+import logging
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from rag.config import get_setting
+
+LEXICAL_PATH = 'rag/vectorDB/bm25.npz'
+_TERM = re.compile(r'\w+')
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text):
+    return _TERM.findall(text.lower())
+
+
+class LexicalIndex:
+    """
+    Args:
+        terms (list): Sorted vocabulary.
+        indptr (np.ndarray): Postings of terms[i] are at [indptr[i], indptr[i + 1]).
+        postings (np.ndarray): Position in `ids` of each posting's document.
+        frequencies (np.ndarray): Term frequency of each posting.
+        ids (np.ndarray): FAISS id of each document.
+        lengths (np.ndarray): Tokens in each document.
+    """
+
+    def __init__(self, terms, indptr, postings, frequencies, ids, lengths):
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.indptr = indptr
+        self.postings = postings
+        self.frequencies = frequencies
+        self.ids = ids
+        self.lengths = lengths
+        self.average_length = float(lengths.mean()) if len(lengths) else 0.0
+
+    @classmethod
+    def build(cls, items):
+        """
+        Index (FAISS id, chunk dict) pairs, e.g. ChunkStore.items().
+        """
+        postings = {}
+        ids, lengths = [], []
+        for position, (faiss_id, chunk) in enumerate(items):
+            tokens = tokenize(chunk['text'])
+            ids.append(faiss_id)
+            lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                postings.setdefault(term, []).append((position, frequency))
+        terms = sorted(postings)
+        indptr = np.zeros(len(terms) + 1, dtype='int64')
+        indptr[1:] = np.cumsum([len(postings[term]) for term in terms])
+        flat = [posting for term in terms for posting in postings[term]]
+        pairs = np.array(flat, dtype='int64').reshape(-1, 2)
+        return cls(
+            terms, indptr, pairs[:, 0].astype('int32'),
+            np.minimum(pairs[:, 1], np.iinfo('uint16').max).astype('uint16'),
+            np.array(ids, dtype='int64'), np.array(lengths, dtype='int32'),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def save(self, path):
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f, terms=np.frombuffer('\n'.join(terms).encode(), dtype='uint8'), indptr=self.indptr,
+                postings=self.postings, frequencies=self.frequencies, ids=self.ids, lengths=self.lengths,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            blob = data['terms'].tobytes().decode()
+            return cls(blob.split('\n') if blob else [], data['indptr'], data['postings'], data['frequencies'],
+                       data['ids'], data['lengths'])
+
+    def search(self, query, top_k=5, k1=None, b=None):
+        """
+        Returns (FAISS ids, BM25 scores) of the `top_k` best matches for `query`, best first.
+        """
+        k1 = get_setting('BM25_K1') if k1 is None else k1
+        b = get_setting('BM25_B') if b is None else b
+        scores = np.zeros(len(self.ids), dtype='float32')
+        norms = k1 * (1 - b + b * self.lengths / max(self.average_length, 1e-9))
+        for term in set(tokenize(query)):
+            i = self.vocabulary.get(term)
+            if i is None:
+                continue
+            docs = self.postings[self.indptr[i]:self.indptr[i + 1]]
+            frequencies = self.frequencies[self.indptr[i]:self.indptr[i + 1]].astype('float32')
+            idf = np.log(1 + (len(self.ids) - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * frequencies * (k1 + 1) / (frequencies + norms[docs])
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind='stable')]
+        return self.ids[matched], scores[matched]
+
+
+def build_lexical_index(docs, path=LEXICAL_PATH):
+    """
+    Rebuild the BM25 index of every chunk in `docs` (a rag.chunk_store.ChunkStore) and save it to `path`.
+    """
+    index = LexicalIndex.build(docs.items())
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    index.save(path)
+    return index
+
+
+def load_lexical_index(path=LEXICAL_PATH):
+    """
+    Returns the saved BM25 index, or None (with a warning) if there is none yet.
+    """
+    if not os.path.exists(path):
+        logger.warning("No BM25 index at %s; run ingestion to build it. Using dense retrieval only.", path)
+        return None
+    return LexicalIndex.load(path)
@@ -0,0 +1,69 @@
+"""
+Process-wide, lazily loaded models for the rag package.
+
+Nothing is loaded, and torch / transformers / sentence-transformers are not
+even imported, until a model is first asked for. After that every caller in
+the process (embedding, retriever, pipeline, ingestion) shares one instance
+per model name. Default names come from `settings.RAG['EMBEDDING_MODEL']` and
+`settings.RAG['RERANKER_MODEL']`; `settings.RAG['MODEL_BACKEND']` picks fp32
+torch, int8-quantized torch or ONNX Runtime (see rag/backends.py).
+"""
+import threading
+
+from rag.config import get_setting
+
+_models = {}
+_lock = threading.Lock()
+
+
+def _get(kind, name, loader):
+    key = (kind, name, get_setting('MODEL_BACKEND'))
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = _models[key] = loader(name)
+    return model
+
+
+def _load_embedding_model(name):
+    from sentence_transformers import SentenceTransformer
+
+    from rag.backends import embedding_model_for_backend
+    return embedding_model_for_backend(SentenceTransformer(name), name)
+
+
+def _load_reranker(name):
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    from rag.backends import reranker_for_backend
+    model = AutoModelForSequenceClassification.from_pretrained(name).eval()
+    return reranker_for_backend(AutoTokenizer.from_pretrained(name), model, name)
+
+
+def get_embedding_model(name=None):
+    """
+    Returns the shared sentence-transformers model `name`, loading it on first use.
+    """
+    return _get('embedding', name or get_setting('EMBEDDING_MODEL'), _load_embedding_model)
+
+
+def get_reranker(name=None):
+    """
+    Returns the shared (tokenizer, model) of cross-encoder `name`, loading them on first use.
+    """
+    return _get('reranker', name or get_setting('RERANKER_MODEL'), _load_reranker)
+
+
+def set_model(kind, name, model):
+    """
+    Use `model` for `kind` ('embedding' or 'reranker') and `name`, under the current backend, instead of loading it.
+    """
+    with _lock:
+        _models[kind, name, get_setting('MODEL_BACKEND')] = model
+
+
+def clear_models():
+    with _lock:
+        _models.clear()
@@ -1,28 +1,75 @@
-from rag.retriever import load_vector_db, retrieve_documents
-from rag.embedding import load_embedding_model, embed_query
+from rag.config import get_setting
+from rag.retriever import (
+    load_vector_db, load_embedding_model, search_documents, hybrid_search_documents, is_easy_query,
+)
+from rag.lexical import LEXICAL_PATH, load_lexical_index
 from rag.reranker import load_reranker_model, rerank
 from rag.reader import load_reader_model, generate_answer
-from rag.utils import load_pickle
+from rag.chunk_store import ChunkStore
+from rag.query_cache import QueryEmbeddingCache
 
 class RAGPipeline:
-    def __init__(self, vector_db_path, docs_path, reranker_model_name, openai_api_key, embedding_model_name="all-MiniLM-L6-v2"):
+    """
+    Retrieval-augmented answering in stages: embed -> retrieve -> rerank -> generate.
+
+    Each stage takes the previous stage's output, so callers that already
+    have query vectors (or retrieved docs) can start further along. Query
+    embeddings go through an LRU cache (rag/query_cache.py). In 'hybrid'
+    retrieval mode (settings.RAG['RETRIEVAL_MODE']) BM25 hits are fused in,
+    and queries both retrievers agree on skip the reranker.
+    """
+
+    def __init__(self, vector_db_path, docs_path, reranker_model_name, openai_api_key,
+                 embedding_model_name=None, query_cache_size=None, retrieval_mode=None, lexical_path=None):
         # Load vector DB and docs
         self.vector_db = load_vector_db(vector_db_path)
-        self.docs = load_pickle(docs_path)
-        # Load embedding model
+        self.docs = ChunkStore(docs_path)
+        # BM25 index, for hybrid retrieval
+        self.lexical_index = None
+        if (retrieval_mode or get_setting('RETRIEVAL_MODE')) == 'hybrid':
+            self.lexical_index = load_lexical_index(lexical_path or LEXICAL_PATH)
+        # Shared embedding model (rag/models.py), behind the query embedding cache
         self.embed_model = load_embedding_model(embedding_model_name)
-        # Load reranker
+        self.query_cache = QueryEmbeddingCache(self.embed_model, maxsize=query_cache_size)
+        # Shared reranker
         self.reranker_tokenizer, self.reranker_model = load_reranker_model(reranker_model_name)
         # Load reader (LLM)
         load_reader_model(openai_api_key)
 
+    def embed(self, queries):
+        """
+        Returns an (N, d) array of query vectors, encoding only queries not in the cache.
+        """
+        return self.query_cache.encode(list(queries), convert_to_numpy=True)
+
+    def retrieve(self, query_vecs, top_k=5, queries=None):
+        """
+        Returns the top-k chunk dicts for each row of `query_vecs`. In hybrid mode, pass
+        the query texts as `queries` to fuse in BM25 hits.
+        """
+        if self.lexical_index is not None and queries is not None:
+            return hybrid_search_documents(queries, query_vecs, self.vector_db, self.lexical_index, self.docs,
+                                           top_k=top_k)
+        return search_documents(query_vecs, self.vector_db, self.docs, top_k=top_k)
+
+    def rerank(self, query, docs, top_n=3):
+        """
+        Returns the texts of the `top_n` docs the cross-encoder scores highest for `query`.
+        """
+        return rerank(query, [doc['text'] for doc in docs], self.reranker_tokenizer, self.reranker_model, top_n=top_n)
+
+    def generate(self, query, texts):
+        return generate_answer(query, texts)
+
     def run(self, query, top_k=5, top_n=3):
-        # 1. Query embedding
-        query_vec = embed_query(self.embed_model, query)
-        # 2. Retrieve top-k documents
-        retrieved_docs = retrieve_documents(query, self.vector_db, self.docs, self.embed_model, top_k=top_k)
-        # 3. Rerank top-k documents
-        top_docs = rerank(query, retrieved_docs, self.reranker_tokenizer, self.reranker_model, top_n=top_n)
+        # 1. Query embedding (once, and cached)
+        query_vecs = self.embed([query])
+        # 2. Retrieve top-k documents with the precomputed vector
+        retrieved_docs = self.retrieve(query_vecs, top_k=top_k, queries=[query])[0]
+        # 3. Rerank top-k documents, unless dense and BM25 retrieval agree on the best one
+        if self.lexical_index is not None and get_setting('SKIP_EASY_RERANK') and is_easy_query(retrieved_docs):
+            top_docs = [doc['text'] for doc in retrieved_docs[:top_n]]
+        else:
+            top_docs = self.rerank(query, retrieved_docs, top_n=top_n)
         # 4. Generate answer using reader
-        answer = generate_answer(query, top_docs)
-        return answer 
\ No newline at end of file
+        return self.generate(query, top_docs)
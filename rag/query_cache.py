@@ -0,0 +1,86 @@
+"""
+LRU cache of query embeddings.
+
+Syllabus and lesson plan generation send the same few queries over and over;
+cached queries skip the encoder entirely. Queries are keyed by the `encode`
+options and normalized text: collapsed whitespace, and lowercase only when
+the model's tokenizer lowercases anyway. Both are undone by the tokenizer,
+so queries that share an entry would have been given the same vector.
+
+QueryEmbeddingCache has the `encode` signature of a sentence-transformers
+model, so it can be passed wherever the retriever expects a model.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from rag.config import get_setting
+
+
+def normalize_query(text, lowercase=False):
+    text = " ".join(text.split())
+    return text.lower() if lowercase else text
+
+
+class QueryEmbeddingCache:
+    """
+    Args:
+        model: Encoder with a sentence-transformers style `encode`.
+        maxsize (int, optional): Queries kept; defaults to the QUERY_CACHE_SIZE setting. 0 disables caching.
+    """
+
+    def __init__(self, model, maxsize=None):
+        self.model = model
+        self.maxsize = get_setting('QUERY_CACHE_SIZE') if maxsize is None else maxsize
+        self.lowercase = getattr(getattr(model, 'tokenizer', None), 'do_lower_case', False)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **kwargs):
+        """
+        Embed queries, running the model only on the ones not cached; the misses go in one batch.
+
+        Extra keyword arguments (e.g. `normalize_embeddings`) go to the model
+        and are part of the cache key.
+        """
+        single = isinstance(sentences, str)
+        options = repr(sorted(kwargs.items()))
+        keys = [(options, normalize_query(sentence, self.lowercase))
+                for sentence in ([sentences] if single else sentences)]
+        if not keys:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype='float32')
+        with self.lock:
+            found = {key: self.entries[key] for key in keys if key in self.entries}
+            for key in found:
+                self.entries.move_to_end(key)
+            missing = list(dict.fromkeys(key for key in keys if key not in found))
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            vectors = np.asarray(
+                self.model.encode([text for options, text in missing], batch_size=batch_size, convert_to_numpy=True,
+                                  **kwargs),
+                dtype='float32',
+            )
+            found.update(zip(missing, vectors))
+            with self.lock:
+                for key, vector in zip(missing, vectors):
+                    self.entries[key] = vector
+                    self.entries.move_to_end(key)
+                while len(self.entries) > self.maxsize:
+                    self.entries.popitem(last=False)
+        embeddings = np.stack([found[key] for key in keys])
+        return embeddings[0] if single else embeddings
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
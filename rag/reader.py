@@ -1,10 +1,12 @@
 # rag/reader.py
-import openai
+# openai is imported on first use, keeping `import rag.pipeline` cheap.
 
 def load_reader_model(api_key):
+    import openai
     openai.api_key = api_key
 
 def generate_answer(query, retrieved_docs, model="gpt-3.5-turbo"):
+    import openai
     context = "\n\n".join(retrieved_docs)
     prompt = f"Context:\n{context}\n\nQuestion: {query}\nAnswer:"
     response = openai.ChatCompletion.create(
@@ -1,15 +1,85 @@
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-import torch
-
-def load_reranker_model(model_name="cross-encoder/ms-marco-MiniLM-L-6-v2"):
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSequenceClassification.from_pretrained(model_name)
-    return tokenizer, model
-
-def rerank(query, docs, tokenizer, model, top_n=3):
-    pairs = [(query, doc) for doc in docs]
-    inputs = tokenizer([q for q, d in pairs], [d for q, d in pairs], return_tensors='pt', padding=True, truncation=True)
-    with torch.no_grad():
-        scores = model(**inputs).logits.squeeze().tolist()
-    ranked = sorted(zip(docs, scores), key=lambda x: x[1], reverse=True)
-    return [doc for doc, score in ranked[:top_n]] 
\ No newline at end of file
+"""
+Cross-encoder reranking.
+
+Pairs are tokenized once, sorted by token length and scored in micro-batches
+of similar length, so one long document no longer pads every other pair to
+its length. Scoring runs under torch.inference_mode(); the batch size, token
+limit and torch thread count come from settings.RAG (RERANK_BATCH_SIZE,
+RERANK_MAX_LENGTH, RERANK_THREADS). torch is imported on first use.
+"""
+import numpy as np
+
+from rag.config import get_setting
+from rag.models import get_reranker
+
+_threads_configured = False
+
+
+def load_reranker_model(model_name=None):
+    # The process-wide (tokenizer, model); see rag/models.py.
+    return get_reranker(model_name)
+
+
+def _configure_threads(torch):
+    global _threads_configured
+    if not _threads_configured:
+        threads = get_setting('RERANK_THREADS')
+        if threads:
+            torch.set_num_threads(threads)
+        _threads_configured = True
+
+
+def _pad(features, rows, pad_token_id, torch):
+    width = max(len(features['input_ids'][row]) for row in rows)
+    batch = {}
+    for key in features.keys():
+        fill = pad_token_id if key == 'input_ids' else 0
+        batch[key] = torch.tensor([features[key][row] + [fill] * (width - len(features[key][row])) for row in rows])
+    return batch
+
+
+def score_pairs(query, docs, tokenizer, model, batch_size=None, max_length=None):
+    """
+    Cross-encoder scores of (query, doc) for every doc.
+
+    Args:
+        query (str): The query.
+        docs (list): Document texts.
+        tokenizer: The cross-encoder's tokenizer.
+        model: A sequence classification model with one output (or the relevant class last).
+        batch_size (int, optional): Pairs per forward pass; defaults to RERANK_BATCH_SIZE.
+        max_length (int, optional): Tokens per pair; defaults to RERANK_MAX_LENGTH.
+
+    Returns:
+        np.ndarray: One score per doc, in the order of `docs`.
+    """
+    import torch
+    _configure_threads(torch)
+    batch_size = batch_size or get_setting('RERANK_BATCH_SIZE')
+    max_length = max_length or get_setting('RERANK_MAX_LENGTH')
+    scores = np.empty(len(docs), dtype='float32')
+    if not docs:
+        return scores
+
+    features = tokenizer([query] * len(docs), list(docs), truncation=True, max_length=max_length)
+    order = np.argsort([len(ids) for ids in features['input_ids']], kind='stable')
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            logits = model(**_pad(features, rows, tokenizer.pad_token_id, torch)).logits
+            scores[rows] = logits.reshape(len(rows), -1)[:, -1].float().numpy()
+    return scores
+
+
+def rerank(query, docs, tokenizer, model, top_n=3, batch_size=None):
+    """
+    Returns the `top_n` docs with the highest cross-encoder scores, best first.
+    """
+    if not docs:
+        return []
+    scores = score_pairs(query, docs, tokenizer, model, batch_size=batch_size)
+    top_n = min(top_n, len(docs))
+    # Only the top n are ordered; the rest are just partitioned off.
+    top = np.argpartition(-scores, top_n - 1)[:top_n]
+    top = top[np.argsort(-scores[top], kind='stable')]
+    return [docs[i] for i in top]
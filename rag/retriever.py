@@ -1,24 +1,105 @@
-import faiss
+import os
+
 import numpy as np
-from .embedding import load_embedding_model, embed_query
-from sentence_transformers import SentenceTransformer
+from rag.config import get_setting
+from rag.models import get_embedding_model
+from rag.index import load_index, save_index
+from rag.ingest import INDEX_PATH, MANIFEST_PATH, load_manifest, save_manifest
+from rag.lexical import LEXICAL_PATH, build_lexical_index
+
+def load_vector_db(index_path="rag/vectorDB/faiss_index.index", mmap=None):
+    # Applies the nprobe / ef_search saved with the index. IVF indexes are
+    # memory-mapped (settings.RAG['MMAP_INDEX']) so workers share one copy.
+    if mmap is None:
+        mmap = get_setting('MMAP_INDEX')
+    return load_index(index_path, mmap=mmap)
+
+def search_documents(query_vecs, vector_db, docs, top_k=5):
+    # Searches precomputed query vectors, shape (N, d), in one FAISS call and
+    # reads all hits from the chunk store (a rag.chunk_store.ChunkStore) in
+    # one query. Returns one doc list per query.
+    query_vecs = np.asarray(query_vecs, dtype="float32").reshape(-1, vector_db.d)
+    D, I = vector_db.search(query_vecs, top_k)
+    hit_ids = np.unique(I[I != -1]).tolist()
+    found = dict(zip(hit_ids, docs.get_many(hit_ids)))
+    return [[found[i] for i in row if found.get(i) is not None] for row in I.tolist()]
 
-def load_vector_db(index_path="rag/vectorDB/faiss_index.index"):
-    return faiss.read_index(index_path)
+def reciprocal_rank_fusion(rankings, k=None):
+    # Merges ranked id lists: each id scores sum(1 / (k + rank)) over the lists
+    # it appears in (rank from 1). Returns [(id, score, ranks)] best first,
+    # `ranks` holding the id's rank in each list (None if absent).
+    k = get_setting('RRF_K') if k is None else k
+    fused = {}
+    for list_number, ranking in enumerate(rankings):
+        for rank, doc_id in enumerate(ranking, start=1):
+            entry = fused.setdefault(doc_id, [0.0, [None] * len(rankings)])
+            entry[0] += 1.0 / (k + rank)
+            entry[1][list_number] = rank
+    return sorted(((doc_id, score, ranks) for doc_id, (score, ranks) in fused.items()), key=lambda item: -item[1])
+
+def hybrid_search_documents(queries, query_vecs, vector_db, lexical_index, docs, top_k=5, candidates=None):
+    # Dense (FAISS) and BM25 search, HYBRID_CANDIDATES hits each, merged by
+    # reciprocal-rank fusion. Chunks come back with `score` (the fused score)
+    # and `ranks` ({'dense': rank, 'lexical': rank}, None where missed).
+    candidates = max(candidates or get_setting('HYBRID_CANDIDATES'), top_k)
+    query_vecs = np.asarray(query_vecs, dtype="float32").reshape(-1, vector_db.d)
+    _, I = vector_db.search(query_vecs, candidates)
+    fused = []
+    for query, dense in zip(queries, I.tolist()):
+        lexical, _ = lexical_index.search(query, candidates)
+        dense = [doc_id for doc_id in dense if doc_id != -1]
+        fused.append(reciprocal_rank_fusion([dense, lexical.tolist()]))
+    hit_ids = sorted({doc_id for hits in fused for doc_id, _, _ in hits[:top_k]})
+    found = dict(zip(hit_ids, docs.get_many(hit_ids)))
+    results = []
+    for hits in fused:
+        row = []
+        for doc_id, score, (dense_rank, lexical_rank) in hits:
+            if found.get(doc_id) is None:
+                continue
+            row.append({**found[doc_id], 'score': score, 'ranks': {'dense': dense_rank, 'lexical': lexical_rank}})
+            if len(row) == top_k:
+                break
+        results.append(row)
+    return results
+
+def is_easy_query(hybrid_docs):
+    # Both retrievers rank the fused top hit first: reranking would rarely change it.
+    return bool(hybrid_docs) and hybrid_docs[0]['ranks'] == {'dense': 1, 'lexical': 1}
 
 def retrieve_documents(query, vector_db, docs, model, top_k=5):
-    query_vec = np.array([embed_query(model, query)]).astype("float32")
-    D, I = vector_db.search(query_vec, top_k)
-    return [docs[i] for i in I[0]]
+    return search_documents(embed_query(model, query), vector_db, docs, top_k=top_k)[0]
+
+def retrieve_documents_batch(queries, vector_db, docs, model, top_k=5, batch_size=32):
+    # One encode call and one search for all queries.
+    if not queries:
+        return []
+    query_vecs = model.encode(list(queries), batch_size=batch_size, convert_to_numpy=True)
+    return search_documents(query_vecs, vector_db, docs, top_k=top_k)
 
-def add_documents(new_docs, vector_db, model, docs, index_path="rag/vectorDB/faiss_index.index"):
+def add_documents(new_docs, vector_db, model, docs, index_path=INDEX_PATH, manifest_path=MANIFEST_PATH,
+                  lexical_path=LEXICAL_PATH):
+    # Ids come from the ingestion manifest and are recorded there, so the next
+    # ingestion keeps these vectors (a rebuild drops them). `vector_db` must
+    # be loaded with mmap=False to be writable. An existing BM25 index is
+    # rebuilt to include the new documents.
+    manifest = load_manifest(manifest_path)
+    start = manifest['next_id']
+    ids = np.arange(start, start + len(new_docs), dtype="int64")
     new_vecs = np.array(model.encode(new_docs)).astype("float32")
-    vector_db.add(new_vecs)
-    docs.extend(new_docs)
-    faiss.write_index(vector_db, index_path)
+    vector_db.add_with_ids(new_vecs, ids)
+    with docs.transaction():
+        docs.add(ids.tolist(), [{'text': doc} for doc in new_docs])
+        save_index(vector_db, index_path)
+        if lexical_path and os.path.exists(lexical_path):
+            build_lexical_index(docs, lexical_path)
+    manifest['next_id'] += len(new_docs)
+    manifest.setdefault('documents', []).append([start, manifest['next_id']])
+    save_manifest(manifest, manifest_path)
 
-def load_embedding_model(model_name="all-MiniLM-L6-v2"):
-    return SentenceTransformer(model_name)
+def load_embedding_model(model_name=None):
+    # The process-wide instance; see rag/models.py.
+    return get_embedding_model(model_name)
 
 def embed_query(model, query):
     embedding = model.encode([query], convert_to_numpy=True)
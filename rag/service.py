@@ -0,0 +1,256 @@
+"""
+Research passages for prompts, from one RAG service shared by the process.
+
+Building a RAGPipeline per request loads the index, chunk store and models
+every time. get_rag_service() instead returns one long-lived RAGService per
+process. It loads everything once, in a background thread started by the
+first request, and every later request reuses it.
+
+Each request has a time budget (settings.RAG['CONTEXT_BUDGET'], in seconds):
+
+* while the service is still loading, a request waits at most its budget
+  and then goes ahead without passages;
+* a stage (retrieval, then reranking) is skipped when its recent average
+  duration no longer fits in what is left of the budget; without reranking,
+  passages come in retrieval order;
+* with hybrid retrieval, queries both retrievers agree on skip reranking
+  (which depends only on the rankings, so it is not counted as skipped).
+
+Every request's per-stage timings (milliseconds) and skipped stages come
+back with the passages and are logged. Without an ingested index the
+service stays disabled and requests get no passages.
+
+Prompts are the AI response cache key (utils/response_cache.py), so the
+passages in a prompt must not depend on timing. research_context() only
+uses passages ranked in full, and keeps them per query: a request that ran
+out of budget gets none, and a later one that ranks in full fills the cache
+that every request after it reuses.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from rag.chunk_store import CHUNKS_PATH, ChunkStore
+from rag.config import get_setting
+from rag.ingest import INDEX_PATH
+from rag.lexical import LEXICAL_PATH, load_lexical_index
+from rag.models import get_embedding_model, get_reranker
+from rag.query_cache import QueryEmbeddingCache
+from rag.reranker import score_pairs
+from rag.retriever import hybrid_search_documents, is_easy_query, load_vector_db, search_documents
+
+logger = logging.getLogger(__name__)
+
+_service = None
+_service_lock = threading.Lock()
+
+
+class RAGService:
+    """
+    Args:
+        index_path, chunks_path, lexical_path (str): What ingestion wrote; see rag/ingest.py.
+        embedding_model_name, reranker_model_name (str, optional): Default to the RAG settings.
+    """
+
+    # Weight of the newest sample in each stage's moving average duration.
+    SMOOTHING = 0.3
+
+    def __init__(self, index_path=INDEX_PATH, chunks_path=CHUNKS_PATH, lexical_path=LEXICAL_PATH,
+                 embedding_model_name=None, reranker_model_name=None):
+        self.index_path = index_path
+        self.chunks_path = chunks_path
+        self.lexical_path = lexical_path
+        self.embedding_model_name = embedding_model_name
+        self.reranker_model_name = reranker_model_name
+        self.ready = threading.Event()
+        self.error = None
+        self.loader = None
+        self.lock = threading.Lock()
+        self.estimates = {}
+        self.contexts = OrderedDict()
+
+    def start_loading(self):
+        """
+        Start loading the index and models in the background, if not already started.
+        """
+        with self.lock:
+            if self.loader is None:
+                self.loader = threading.Thread(target=self._load, name='rag-service-load', daemon=True)
+                self.loader.start()
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            if not os.path.exists(self.index_path):
+                raise FileNotFoundError(f"No index at {self.index_path}; run `python -m rag.ingest`.")
+            self.vector_db = load_vector_db(self.index_path)
+            self.docs = ChunkStore(self.chunks_path)
+            self.lexical_index = None
+            if get_setting('RETRIEVAL_MODE') == 'hybrid':
+                self.lexical_index = load_lexical_index(self.lexical_path)
+            self.query_cache = QueryEmbeddingCache(get_embedding_model(self.embedding_model_name))
+            self.reranker = get_reranker(self.reranker_model_name)
+            logger.info("RAG service loaded in %.1fs.", time.perf_counter() - start)
+        except FileNotFoundError as exc:
+            self.error = exc
+            logger.info("RAG context disabled: %s", exc)
+        except Exception as exc:
+            self.error = exc
+            logger.exception("Loading the RAG service failed; prompts go without research context.")
+        finally:
+            self.ready.set()
+
+    def _fits(self, stages, remaining):
+        with self.lock:
+            if sum(self.estimates.get(stage, 0.0) for stage in stages) <= remaining:
+                return True
+            # A skipped stage takes no new samples; let its estimate decay so one slow run doesn't skip it for good.
+            for stage in stages:
+                if stage in self.estimates:
+                    self.estimates[stage] *= 1 - self.SMOOTHING
+            return False
+
+    def _record(self, stage, seconds, timings):
+        timings[stage] = round(seconds * 1000, 1)
+        with self.lock:
+            previous = self.estimates.get(stage)
+            self.estimates[stage] = seconds if previous is None else (
+                self.SMOOTHING * seconds + (1 - self.SMOOTHING) * previous
+            )
+
+    def search(self, query, budget=None, top_k=None, top_n=None):
+        """
+        Passages for `query`, within `budget` seconds where possible.
+
+        Args:
+            query (str): What to look for.
+            budget (float, optional): Seconds; defaults to CONTEXT_BUDGET.
+            top_k (int, optional): Chunks retrieved; defaults to CONTEXT_CANDIDATES.
+            top_n (int, optional): Passages returned; defaults to CONTEXT_PASSAGES.
+
+        Returns:
+            dict: `passages` (chunk dicts, best first), `timings` ({stage: ms}) and
+            `skipped` (stages left out: 'retrieval' or 'rerank').
+        """
+        budget = get_setting('CONTEXT_BUDGET') if budget is None else budget
+        top_k = top_k or get_setting('CONTEXT_CANDIDATES')
+        top_n = top_n or get_setting('CONTEXT_PASSAGES')
+        start = time.perf_counter()
+        result = {'passages': [], 'timings': {}, 'skipped': []}
+        timings, skipped = result['timings'], result['skipped']
+
+        def remaining():
+            return budget - (time.perf_counter() - start)
+
+        self.start_loading()
+        if not self.ready.is_set():
+            self.ready.wait(max(remaining(), 0))
+            timings['load'] = round((time.perf_counter() - start) * 1000, 1)
+        if (not self.ready.is_set() or self.error is not None
+                or not self._fits(('embed', 'retrieve'), remaining())):
+            skipped.append('retrieval')
+        else:
+            stage_start = time.perf_counter()
+            query_vecs = self.query_cache.encode([query], convert_to_numpy=True)
+            self._record('embed', time.perf_counter() - stage_start, timings)
+
+            stage_start = time.perf_counter()
+            if self.lexical_index is not None:
+                docs = hybrid_search_documents([query], query_vecs, self.vector_db, self.lexical_index, self.docs,
+                                               top_k=top_k)[0]
+            else:
+                docs = search_documents(query_vecs, self.vector_db, self.docs, top_k=top_k)[0]
+            self._record('retrieve', time.perf_counter() - stage_start, timings)
+
+            easy = self.lexical_index is not None and get_setting('SKIP_EASY_RERANK') and is_easy_query(docs)
+            if len(docs) > 1 and not easy and self._fits(('rerank',), remaining()):
+                stage_start = time.perf_counter()
+                scores = score_pairs(query, [doc['text'] for doc in docs], *self.reranker)
+                docs = [docs[i] for i in np.argsort(-scores, kind='stable')]
+                self._record('rerank', time.perf_counter() - stage_start, timings)
+            elif len(docs) > 1 and not easy:
+                skipped.append('rerank')
+            result['passages'] = docs[:top_n]
+
+        timings['total'] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info("RAG context: %d passages, timings %s ms, skipped %s",
+                    len(result['passages']), timings, skipped or 'nothing')
+        return result
+
+    def ranked_passages(self, query, budget=None):
+        """
+        Passages for `query` as ranked in full, or [] when this request could not rank them in full.
+
+        Full rankings are kept per query (up to QUERY_CACHE_SIZE), so the same query always gets the
+        same passages, and only the first full ranking costs any time.
+        """
+        with self.lock:
+            if query in self.contexts:
+                self.contexts.move_to_end(query)
+                return self.contexts[query]
+        result = self.search(query, budget=budget)
+        if result['skipped']:
+            return []
+        with self.lock:
+            self.contexts[query] = result['passages']
+            while len(self.contexts) > get_setting('QUERY_CACHE_SIZE'):
+                self.contexts.popitem(last=False)
+        return result['passages']
+
+
+def get_rag_service():
+    """
+    Returns the process-wide RAGService, creating it on first use.
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RAGService()
+    return _service
+
+
+def set_rag_service(service):
+    """
+    Use `service` as the process-wide RAGService (None to create a fresh one on next use).
+    """
+    global _service
+    with _service_lock:
+        _service = service
+
+
+def format_passages(passages, max_chars=None):
+    """
+    Number passages for a prompt, with their source file and page.
+    """
+    max_chars = max_chars or get_setting('CONTEXT_MAX_CHARS')
+    lines = []
+    for number, passage in enumerate(passages, start=1):
+        parts = [passage.get('file'), f"p. {passage['page']}" if passage.get('page') else None]
+        source = ", ".join(part for part in parts if part)
+        text = " ".join(passage['text'].split())
+        if len(text) > max_chars:
+            text = text[:max_chars].rsplit(' ', 1)[0] + " ..."
+        lines.append(f"[{number}] ({source}) {text}" if source else f"[{number}] {text}")
+    return "\n".join(lines)
+
+
+def research_context(query, budget=None):
+    """
+    Research passages for `query`, formatted as a prompt section, or "" when there are none
+    (no index, not ranked in full within the budget, or PROMPT_CONTEXT is off).
+    """
+    if not get_setting('PROMPT_CONTEXT') or not query.strip():
+        return ""
+    passages = get_rag_service().ranked_passages(query, budget=budget)
+    if not passages:
+        return ""
+    return (
+        "\n### Research on teaching and learning (use where relevant):\n"
+        + format_passages(passages)
+        + "\n"
+    )
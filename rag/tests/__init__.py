@@ -0,0 +1,11 @@
+from .ingest_tests import *
+from .index_tests import *
+from .chunk_store_tests import *
+from .retriever_tests import *
+from .pipeline_tests import *
+from .models_tests import *
+from .reranker_tests import *
+from .backends_tests import *
+from .chunking_tests import *
+from .lexical_tests import *
+from .service_tests import *
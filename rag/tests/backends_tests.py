@@ -0,0 +1,97 @@
+import importlib.util
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from rag.backends import (
+    OnnxEncoder, OnnxSequenceClassifier, embedding_drift, embedding_model_for_backend, onnx_path, quantize_int8,
+    reranker_for_backend, score_drift,
+)
+from rag.models import clear_models, get_embedding_model, set_model
+from rag.reranker import rerank, score_pairs
+from rag.tests.encoders import tiny_cross_encoder, tiny_sentence_transformer
+
+SENTENCES = [
+    'spacing out review sessions improves retention',
+    'feedback',
+    'worked examples reduce cognitive load for novices ' * 4,
+    'students learn by retrieval practice',
+]
+DOCS = SENTENCES + ['interleaving mixes problem types', 'scaffolding supports learners', 'memory']
+HAS_ONNX = all(importlib.util.find_spec(name) for name in ('onnx', 'onnxruntime'))
+
+
+class BackendsTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dir = tempfile.mkdtemp()
+        os.makedirs(f"{cls.dir}/embedding")
+        os.makedirs(f"{cls.dir}/reranker")
+        cls.encoder = tiny_sentence_transformer(f"{cls.dir}/embedding")
+        cls.reranker = tiny_cross_encoder(f"{cls.dir}/reranker")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+        super().tearDownClass()
+
+    def test_int8_stays_close_to_fp32(self):
+        encoder = quantize_int8(self.encoder)
+        self.assertIsNot(encoder, self.encoder)
+        self.assertGreater(embedding_drift(self.encoder, encoder, SENTENCES)['min_cosine'], 0.99)
+
+        tokenizer, model = self.reranker
+        drift = score_drift(self.reranker, (tokenizer, quantize_int8(model)), 'memory', DOCS)
+        # The random tiny model scores every pair almost alike, so only the absolute error is meaningful here.
+        self.assertLess(drift['max_abs_diff'], 1e-3)
+        self.assertEqual(set(drift), {'pearson', 'spearman', 'max_abs_diff'})
+
+    @override_settings(RAG={'MODEL_BACKEND': 'float16'})
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            embedding_model_for_backend(self.encoder, 'tiny')
+        with self.assertRaises(ValueError):
+            reranker_for_backend(*self.reranker, 'tiny')
+
+    def test_models_are_kept_per_backend(self):
+        clear_models()
+        self.addCleanup(clear_models)
+        set_model('embedding', 'tiny', self.encoder)
+        self.assertIs(get_embedding_model('tiny'), self.encoder)
+        with override_settings(RAG={'MODEL_BACKEND': 'int8'}):
+            with mock.patch('rag.models._load_embedding_model', return_value='quantized') as load:
+                self.assertEqual(get_embedding_model('tiny'), 'quantized')
+        load.assert_called_once_with('tiny')
+        self.assertIs(get_embedding_model('tiny'), self.encoder)
+
+    @skipUnless(HAS_ONNX, 'needs the onnx and onnxruntime packages')
+    def test_onnx_matches_torch(self):
+        with override_settings(RAG={'ONNX_DIR': f"{self.dir}/onnx"}):
+            encoder = embedding_model_for_backend(self.encoder, 'tiny/encoder', 'onnx')
+            tokenizer, model = reranker_for_backend(*self.reranker, 'tiny/reranker', 'onnx')
+            self.assertTrue(os.path.exists(onnx_path('embedding', 'tiny/encoder')))
+        self.assertIsInstance(encoder, OnnxEncoder)
+        self.assertIsInstance(model, OnnxSequenceClassifier)
+
+        self.assertEqual(encoder.get_sentence_embedding_dimension(), self.encoder.get_sentence_embedding_dimension())
+        np.testing.assert_allclose(encoder.encode(SENTENCES, batch_size=3), self.encoder.encode(SENTENCES), atol=1e-5)
+        self.assertEqual(encoder.encode('feedback').shape, (32,))
+        self.assertGreater(embedding_drift(self.encoder, encoder, SENTENCES)['min_cosine'], 0.9999)
+
+        np.testing.assert_allclose(score_pairs('memory', DOCS, tokenizer, model, batch_size=3),
+                                   score_pairs('memory', DOCS, *self.reranker), atol=1e-4)
+        self.assertEqual(rerank('memory', DOCS, tokenizer, model, top_n=3), rerank('memory', DOCS, *self.reranker, top_n=3))
+
+    @skipUnless(HAS_ONNX, 'needs the onnx and onnxruntime packages')
+    def test_onnx_exports_once(self):
+        path = f"{self.dir}/cached.onnx"
+        OnnxSequenceClassifier.from_transformers(*self.reranker, path)
+        with mock.patch('rag.backends.export_onnx') as export:
+            OnnxSequenceClassifier.from_transformers(*self.reranker, path)
+        export.assert_not_called()
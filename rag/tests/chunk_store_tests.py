@@ -0,0 +1,146 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.test import SimpleTestCase
+
+from rag.chunk_store import ChunkStore, migrate_pickle
+from rag.extract import extract_pages
+from rag.ingest import ingest_papers, load_manifest
+from rag.utils import save_pickle
+from rag.tests.encoders import HashingEncoder
+from rag.tests.pdfs import make_pdf
+
+
+def chunk(text, file='a.pdf', page=1, number=0, offset=0):
+    return {'file': file, 'page': page, 'chunk': number, 'offset': offset, 'text': text}
+
+
+class ChunkStoreTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.store = ChunkStore(os.path.join(self.dir, 'chunks.sqlite3'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.dir)
+
+    def test_lookups_by_id(self):
+        self.store.add([0, 1, 7], [chunk('zero'), chunk('one', page=2, offset=500), chunk('seven')])
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.get(1), chunk('one', page=2, offset=500))
+        self.assertEqual([c and c['text'] for c in self.store.get_many([7, -1, 0, 3])], ['seven', None, 'zero', None])
+        self.assertEqual(self.store.next_id(), 8)
+
+    def test_many_ids(self):
+        self.store.add(range(1200), [chunk(str(i)) for i in range(1200)])
+        self.assertEqual([c['text'] for c in self.store.get_many(range(1199, -1, -1))],
+                         [str(i) for i in range(1199, -1, -1)])
+
+    def test_append_only(self):
+        self.store.add([0], [chunk('zero')])
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.store.add([0], [chunk('again')])
+        self.assertEqual(self.store.get(0)['text'], 'zero')
+
+    def test_delete_range(self):
+        self.store.add(range(10), [chunk(str(i)) for i in range(10)])
+        self.store.delete_range(2, 4)
+        self.store.delete_range(8)
+        self.assertEqual([faiss_id for faiss_id, _ in self.store.items()], [0, 1, 4, 5, 6, 7])
+
+    def test_transaction_rolls_back(self):
+        self.store.add([0], [chunk('zero')])
+        with self.assertRaises(RuntimeError):
+            with self.store.transaction():
+                self.store.delete_range(0)
+                self.store.add([1, 2], [chunk('one'), chunk('two')])
+                raise RuntimeError
+        self.assertEqual([c['text'] for _, c in self.store.items()], ['zero'])
+
+    def test_migrate_pickle(self):
+        pickle_path = os.path.join(self.dir, 'metadata.pkl')
+        save_pickle({3: chunk('three'), 4: chunk('four', page=2)}, pickle_path)
+        path = os.path.join(self.dir, 'migrated.sqlite3')
+        self.assertEqual(migrate_pickle(pickle_path, path), 2)
+        self.assertEqual(ChunkStore(path).get_many([3, 4]), [chunk('three'), chunk('four', page=2)])
+        with self.assertRaises(FileExistsError):
+            migrate_pickle(pickle_path, path)
+
+    def test_migrate_legacy_list(self):
+        papers = os.path.join(self.dir, 'papers')
+        os.mkdir(papers)
+        make_pdf(os.path.join(papers, 'b.pdf'), ['Spacing helps memory. ' * 20, 'Feedback guides practice. ' * 20])
+        text = "".join(extract_pages(os.path.join(papers, 'b.pdf')))
+        self.assertGreater(len(text), 500)
+        pickle_path = os.path.join(self.dir, 'metadata.pkl')
+        save_pickle(['first', {'file': 'b.pdf', 'chunk': 0}, {'file': 'b.pdf', 'chunk': 1}], pickle_path)
+        path = os.path.join(self.dir, 'migrated.sqlite3')
+        migrate_pickle(pickle_path, path, papers)
+        store = ChunkStore(path)
+        self.assertEqual(store.get(0)['text'], 'first')
+        self.assertEqual(store.get(1)['file'], 'b.pdf')
+        self.assertEqual(store.get(1)['text'], text[:500])
+        self.assertEqual(store.get(2)['text'], text[500:1000])
+        self.assertEqual(store.get(2)['offset'], 500)
+
+    def test_migrate_legacy_list_without_the_pdf(self):
+        pickle_path = os.path.join(self.dir, 'metadata.pkl')
+        save_pickle([{'file': 'gone.pdf', 'chunk': 0}], pickle_path)
+        path = os.path.join(self.dir, 'migrated.sqlite3')
+        with self.assertRaisesRegex(ValueError, 're-ingest'):
+            migrate_pickle(pickle_path, path, os.path.join(self.dir, 'papers'))
+        self.assertFalse(os.path.exists(path))
+
+
+class FailingEncoder(HashingEncoder):
+
+    def __init__(self, fail_after):
+        super().__init__()
+        self.fail_after = fail_after
+
+    def encode(self, sentences, **kwargs):
+        if len(self.calls) == self.fail_after:
+            raise RuntimeError("encoder failed")
+        return super().encode(sentences, **kwargs)
+
+
+class IngestChunkStoreTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.papers = os.path.join(self.dir, 'papers')
+        os.mkdir(self.papers)
+        self.paths = {
+            'index_path': os.path.join(self.dir, 'faiss.index'),
+            'chunks_path': os.path.join(self.dir, 'chunks.sqlite3'),
+            'manifest_path': os.path.join(self.dir, 'manifest.json'),
+            'lexical_path': os.path.join(self.dir, 'bm25.npz'),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def ingest(self, encoder):
+        return ingest_papers(self.papers, model=encoder, batch_size=4, max_tokens=20, workers=1,
+                             text_cache_dir=None, **self.paths)
+
+    def test_failed_run_leaves_store_unchanged(self):
+        make_pdf(os.path.join(self.papers, 'a.pdf'), ['Alpha topic. ' * 40])
+        self.ingest(HashingEncoder())
+        before = dict(ChunkStore(self.paths['chunks_path']).items())
+
+        make_pdf(os.path.join(self.papers, 'a.pdf'), ['Beta topic. ' * 40])
+        make_pdf(os.path.join(self.papers, 'b.pdf'), ['Gamma topic. ' * 40])
+        with self.assertRaises(RuntimeError):
+            self.ingest(FailingEncoder(fail_after=2))
+        self.assertEqual(dict(ChunkStore(self.paths['chunks_path']).items()), before)
+
+        result = self.ingest(HashingEncoder())
+        self.assertEqual(result['added'], ['a.pdf', 'b.pdf'])
+        store = ChunkStore(self.paths['chunks_path'])
+        manifest = load_manifest(self.paths['manifest_path'])
+        self.assertEqual(len(store), sum(end - start for start, end in (f['ids'] for f in manifest['files'].values())))
+        self.assertTrue(all('Alpha' not in c['text'] for _, c in store.items()))
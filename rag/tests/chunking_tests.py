@@ -0,0 +1,77 @@
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from rag.chunking import chunk_budget, iter_page_chunks, token_counter
+from rag.tests.encoders import tiny_cross_encoder
+
+PAGE = (
+    "Spacing helps memory. Retrieval practice works! \"Does it?\" she asked.\n\n"
+    "Feedback should be timely. It should be specific. It should be actionable. It should be kind."
+)
+
+
+class ChunkingTest(SimpleTestCase):
+
+    def chunks(self, pages, **kwargs):
+        return list(iter_page_chunks(pages, **kwargs))
+
+    def test_cuts_at_sentence_boundaries(self):
+        chunks = self.chunks([(1, PAGE)], max_tokens=12, overlap=0)
+        self.assertEqual([c['text'] for c in chunks], [
+            'Spacing helps memory. Retrieval practice works!',
+            '"Does it?" she asked.',
+            'Feedback should be timely. It should be specific.',
+            'It should be actionable. It should be kind.',
+        ])
+        for chunk in chunks:
+            self.assertLessEqual(chunk['tokens'], 12)
+            self.assertEqual(PAGE[chunk['offset']:chunk['offset'] + len(chunk['text'])], chunk['text'])
+            self.assertRegex(chunk['text'], r'[.!?"]$')
+
+    def test_paragraphs_end_chunks_once_half_full(self):
+        text = PAGE.split('\n\n')[0] + '\n\nShort one.'
+        chunks = self.chunks([(1, text)], max_tokens=30, overlap=0)
+        self.assertEqual([c['text'] for c in chunks], [PAGE.split('\n\n')[0], 'Short one.'])
+        self.assertEqual(len(self.chunks([(1, text)], max_tokens=40, overlap=0)), 1)
+
+    def test_overlap_repeats_sentences_within_a_paragraph(self):
+        second = PAGE.split('\n\n')[1]
+        chunks = self.chunks([(1, second)], max_tokens=10, overlap=5)
+        self.assertEqual([c['text'] for c in chunks], [
+            'Feedback should be timely. It should be specific.',
+            'It should be specific. It should be actionable.',
+            'It should be actionable. It should be kind.',
+        ])
+
+    def test_long_sentences_split_at_words(self):
+        text = ' '.join(['word'] * 25) + '.'
+        chunks = self.chunks([(4, text)], max_tokens=10, overlap=0)
+        self.assertEqual([c['tokens'] for c in chunks], [10, 10, 6])
+        self.assertEqual(' '.join(c['text'] for c in chunks), text)
+        self.assertEqual({c['page'] for c in chunks}, {4})
+
+    def test_streams_pages_lazily(self):
+        def pages():
+            yield 1, 'First page.'
+            yield 2, ''
+            raise AssertionError('read past the first chunk')
+
+        chunks = iter_page_chunks(pages(), max_tokens=10, overlap=0)
+        self.assertEqual(next(chunks), {'page': 1, 'offset': 0, 'tokens': 3, 'text': 'First page.'})
+
+    def test_counts_with_the_tokenizer(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        tokenizer, _ = tiny_cross_encoder(path)
+        # The tiny vocabulary spells words out letter by letter.
+        self.assertEqual(token_counter(tokenizer)(['ab cd.', '']), [5, 0])
+        chunks = self.chunks([(1, PAGE)], max_tokens=40, overlap=0, tokenizer=tokenizer)
+        self.assertTrue(all(0 < c['tokens'] <= 40 for c in chunks))
+        self.assertEqual(token_counter(tokenizer)([chunks[0]['text']]), [chunks[0]['tokens']])
+
+    def test_budget_fits_the_embedder(self):
+        self.assertEqual(chunk_budget(SimpleNamespace(max_seq_length=128), 512), 126)
+        self.assertEqual(chunk_budget(None, 300), 300)
@@ -0,0 +1,77 @@
+"""
+A deterministic stand-in for the sentence-transformers encoder.
+
+The real models are downloaded from the Hugging Face hub; tests use this
+bag-of-words hashing encoder instead so they run offline and fast, while
+still placing texts that share words close together.
+"""
+import hashlib
+
+import numpy as np
+
+
+class HashingEncoder:
+
+    def __init__(self, dimension=64):
+        self.dimension = dimension
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **kwargs):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        self.calls.append(len(sentences))
+        vectors = np.zeros((len(sentences), self.dimension), dtype='float32')
+        for row, sentence in enumerate(sentences):
+            for word in sentence.lower().split():
+                digest = hashlib.md5(word.strip('.,;:!?()').encode()).digest()
+                vectors[row, int.from_bytes(digest[:4], 'little') % self.dimension] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+        return vectors[0] if single else vectors
+
+
+def _tiny_bert(path, seed, **config):
+    import string
+
+    import torch
+    from transformers import BertConfig, BertTokenizerFast
+
+    vocab = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + list(string.ascii_lowercase + string.punctuation)
+    vocab += ['##' + char for char in string.ascii_lowercase]
+    with open(f"{path}/vocab.txt", 'w') as f:
+        f.write('\n'.join(vocab))
+    tokenizer = BertTokenizerFast(f"{path}/vocab.txt", model_max_length=512)
+    torch.manual_seed(seed)
+    return tokenizer, BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                                 intermediate_size=64, max_position_embeddings=512, **config)
+
+
+def tiny_cross_encoder(path, seed=0):
+    """
+    A small randomly initialised BERT cross-encoder and its tokenizer, saved under `path`.
+
+    Returns:
+        tuple: (tokenizer, model), like rag.reranker.load_reranker_model.
+    """
+    from transformers import BertForSequenceClassification
+
+    tokenizer, config = _tiny_bert(path, seed, num_labels=1)
+    return tokenizer, BertForSequenceClassification(config).eval()
+
+
+def tiny_sentence_transformer(path, seed=0):
+    """
+    A small randomly initialised BERT with mean pooling and normalization, saved under `path`.
+    """
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertModel
+
+    tokenizer, config = _tiny_bert(path, seed)
+    tokenizer.save_pretrained(path)
+    BertModel(config).save_pretrained(path)
+    transformer = models.Transformer(path, max_seq_length=128)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), 'mean')
+    return SentenceTransformer(modules=[transformer, pooling, models.Normalize()], device='cpu').eval()
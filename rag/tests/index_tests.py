@@ -0,0 +1,170 @@
+import json
+import os
+import shutil
+import tempfile
+
+import faiss
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from rag.index import (
+    INDEX_TYPES, IndexBuilder, build_index, config_path, index_type_of, load_index, save_index,
+    training_sample,
+)
+from rag.chunk_store import ChunkStore
+from rag.ingest import ingest_papers, load_manifest
+from rag.tests.encoders import HashingEncoder
+from rag.tests.pdfs import make_pdf
+
+
+def clustered_vectors(n, dimension=32, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    return (centers[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dimension))).astype('float32')
+
+
+@override_settings(RAG={'NLIST': 16, 'PQ_M': 16, 'NPROBE': 4, 'EF_SEARCH': 32, 'TRAIN_SIZE': 2000})
+class IndexTypeTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def build(self, index_type, vectors):
+        builder = IndexBuilder(index_type)
+        for start in range(0, len(vectors), 100):
+            builder.add(vectors[start:start + 100], np.arange(start, min(start + 100, len(vectors)), dtype='int64'))
+        return builder.finish()
+
+    def test_types_find_neighbours(self):
+        vectors = clustered_vectors(2000)
+        queries = clustered_vectors(50, seed=1)
+        _, expected = self.build('flat', vectors).search(queries, 10)
+        for index_type in INDEX_TYPES:
+            with self.subTest(index_type):
+                index = self.build(index_type, vectors)
+                self.assertEqual(index_type_of(index), index_type)
+                self.assertEqual(index.ntotal, len(vectors))
+                save_index(index, os.path.join(self.dir, index_type))
+                _, found = load_index(os.path.join(self.dir, index_type)).search(queries, 10)
+                recall = np.mean([len(set(e) & set(f)) / 10 for e, f in zip(expected, found)])
+                self.assertGreater(recall, 0.5 if index_type == 'ivf_pq' else 0.8)
+
+    def test_trains_on_held_back_vectors(self):
+        builder = IndexBuilder('ivf_flat', train_size=250)
+        builder.add(clustered_vectors(300), np.arange(300, dtype='int64'))
+        self.assertIsNone(builder.index)
+        builder.add(clustered_vectors(800, seed=2), np.arange(300, 1100, dtype='int64'))
+        self.assertTrue(builder.index.is_trained)
+        self.assertEqual(builder.index.ntotal, 1100)
+        self.assertEqual(builder.finish().ntotal, 1100)
+
+    def test_training_sample_spans_the_pool(self):
+        # Batches in file order: the first quarter alone would miss most of the corpus.
+        vectors = np.repeat(np.arange(4, dtype='float32'), 250)[:, None]
+        sample = training_sample(vectors, 100)
+        self.assertEqual(len(sample), 100)
+        self.assertEqual(set(sample[:, 0].tolist()), {0, 1, 2, 3})
+        np.testing.assert_array_equal(sample, training_sample(vectors, 100))
+        self.assertIs(training_sample(vectors, 2000), vectors)
+
+    def test_small_training_sample(self):
+        index = self.build('ivf_pq', clustered_vectors(50))
+        self.assertEqual(index.ntotal, 50)
+        self.assertEqual(faiss.extract_index_ivf(index).nlist, 1)
+
+    def test_search_params_persist(self):
+        path = os.path.join(self.dir, 'index')
+        save_index(self.build('ivf_flat', clustered_vectors(1000)), path)
+        with open(config_path(path)) as f:
+            self.assertEqual(json.load(f), {'type': 'ivf_flat', 'nprobe': 4})
+        self.assertEqual(faiss.extract_index_ivf(load_index(path)).nprobe, 4)
+        self.assertEqual(faiss.extract_index_ivf(load_index(path, nprobe=9)).nprobe, 9)
+
+        save_index(self.build('hnsw', clustered_vectors(200)), path)
+        index = load_index(path)
+        self.assertEqual(faiss.downcast_index(index.index).hnsw.efSearch, 32)
+
+    def test_mmap_loading(self):
+        path = os.path.join(self.dir, 'index')
+        vectors = clustered_vectors(1000)
+        save_index(self.build('ivf_flat', vectors), path)
+        _, expected = load_index(path).search(vectors[:20], 5)
+
+        index = load_index(path, mmap=True)
+        if os.path.exists('/proc/self/maps'):
+            with open('/proc/self/maps') as f:
+                self.assertIn(os.path.realpath(path), f.read())
+        # Ingestion replaces the file; the mapped index keeps working.
+        save_index(self.build('ivf_flat', clustered_vectors(1000, seed=3)), path)
+        _, found = index.search(vectors[:20], 5)
+        self.assertEqual(found.tolist(), expected.tolist())
+        self.assertEqual(faiss.extract_index_ivf(index).nprobe, 4)
+
+        save_index(self.build('flat', vectors), path)
+        self.assertEqual(load_index(path, mmap=True).ntotal, 1000)
+
+    def test_rejects_unknown_type(self):
+        with self.assertRaises(ValueError):
+            build_index('lsh', 32)
+
+
+@override_settings(RAG={'NLIST': 4, 'PQ_M': 8})
+class IngestIndexTypeTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.papers = os.path.join(self.dir, 'papers')
+        os.mkdir(self.papers)
+        self.paths = {
+            'index_path': os.path.join(self.dir, 'faiss.index'),
+            'chunks_path': os.path.join(self.dir, 'chunks.sqlite3'),
+            'manifest_path': os.path.join(self.dir, 'manifest.json'),
+            'lexical_path': os.path.join(self.dir, 'bm25.npz'),
+        }
+        self.encoder = HashingEncoder()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, text):
+        make_pdf(os.path.join(self.papers, name), [text * 40])
+
+    def ingest(self, index_type):
+        return ingest_papers(self.papers, model=self.encoder, batch_size=8, max_tokens=20, workers=1,
+                             text_cache_dir=None, index_type=index_type, **self.paths)
+
+    def test_ivf_updates_in_place(self):
+        self.write('a.pdf', 'Alpha topic. ')
+        self.write('b.pdf', 'Beta topic. ')
+        self.ingest('ivf_flat')
+        self.write('b.pdf', 'Gamma topic. ')
+        result = self.ingest('ivf_flat')
+
+        self.assertEqual(result['added'], ['b.pdf'])
+        index, store = load_index(self.paths['index_path']), ChunkStore(self.paths['chunks_path'])
+        self.assertEqual(index_type_of(index), 'ivf_flat')
+        self.assertEqual(index.ntotal, len(store))
+        _, ids = index.search(self.encoder.encode(['gamma topic']), 1)
+        self.assertEqual(store.get(ids[0][0])['file'], 'b.pdf')
+
+    def test_hnsw_rebuilds_on_removal(self):
+        self.write('a.pdf', 'Alpha topic. ')
+        self.write('b.pdf', 'Beta topic. ')
+        self.ingest('hnsw')
+        os.remove(os.path.join(self.papers, 'b.pdf'))
+        result = self.ingest('hnsw')
+
+        self.assertEqual(result['added'], ['a.pdf'])
+        index = load_index(self.paths['index_path'])
+        self.assertEqual(index.ntotal, len(ChunkStore(self.paths['chunks_path'])))
+        self.assertEqual(set(load_manifest(self.paths['manifest_path'])['files']), {'a.pdf'})
+
+    def test_changing_type_rebuilds(self):
+        self.write('a.pdf', 'Alpha topic. ')
+        self.ingest('flat')
+        result = self.ingest('ivf_pq')
+        self.assertEqual(result['added'], ['a.pdf'])
+        self.assertEqual(index_type_of(load_index(self.paths['index_path'])), 'ivf_pq')
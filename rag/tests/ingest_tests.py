@@ -0,0 +1,173 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import faiss
+from django.test import SimpleTestCase
+
+from rag.extract import TextCache, extract_corpus
+from rag.ingest import file_hash, ingest_papers, iter_chunks, load_manifest, save_manifest
+from rag.chunk_store import ChunkStore
+from rag.tests.encoders import HashingEncoder
+from rag.tests.pdfs import make_pdf
+
+
+class IngestTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.papers = os.path.join(self.dir, 'papers')
+        os.mkdir(self.papers)
+        self.paths = {
+            'index_path': os.path.join(self.dir, 'db', 'faiss.index'),
+            'chunks_path': os.path.join(self.dir, 'db', 'chunks.sqlite3'),
+            'manifest_path': os.path.join(self.dir, 'db', 'manifest.json'),
+            'lexical_path': os.path.join(self.dir, 'db', 'bm25.npz'),
+        }
+        os.mkdir(os.path.join(self.dir, 'db'))
+        self.encoder = HashingEncoder()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, pages):
+        make_pdf(os.path.join(self.papers, name), pages)
+
+    def ingest(self, **kwargs):
+        kwargs.setdefault('max_tokens', 40)
+        return ingest_papers(self.papers, model=self.encoder, batch_size=4, workers=1,
+                             text_cache_dir=os.path.join(self.dir, 'text_cache'), **self.paths, **kwargs)
+
+    def load(self):
+        return faiss.read_index(self.paths['index_path']), dict(ChunkStore(self.paths['chunks_path']).items())
+
+    def test_chunks_keep_page_numbers(self):
+        pages = [(1, 'One two three. Four five six seven.'), (2, ' '), (3, 'Eight nine.')]
+        chunks = list(iter_chunks('a.pdf', pages, max_tokens=6, overlap=0))
+        self.assertEqual([(c['page'], c['chunk'], c['offset'], c['text']) for c in chunks],
+                         [(1, 0, 0, 'One two three.'), (1, 1, 15, 'Four five six seven.'), (3, 2, 0, 'Eight nine.')])
+
+    def test_changing_chunking_rebuilds(self):
+        self.write('a.pdf', ['Alpha topic. ' * 40])
+        self.ingest()
+        result = self.ingest(max_tokens=20)
+        self.assertEqual(result['added'], ['a.pdf'])
+        self.assertEqual(load_manifest(self.paths['manifest_path'])['chunking'], {'max_tokens': 20, 'overlap': 32})
+        index, metadata = self.load()
+        self.assertEqual(index.ntotal, len(metadata))
+        self.assertEqual(self.ingest(max_tokens=20)['added'], [])
+
+    def test_streams_in_batches(self):
+        self.write('scaffolding.pdf', ['Scaffolding supports learners step by step. ' * 30] * 3)
+        self.write('feedback.pdf', ['Formative feedback during practice. ' * 30] * 2)
+        result = self.ingest()
+
+        index, metadata = self.load()
+        self.assertEqual(result['added'], ['feedback.pdf', 'scaffolding.pdf'])
+        self.assertEqual(index.ntotal, len(metadata))
+        self.assertEqual(result['chunks'], len(metadata))
+        self.assertLessEqual(max(self.encoder.calls), 4)
+        self.assertEqual({chunk['file'] for chunk in metadata.values()}, {'feedback.pdf', 'scaffolding.pdf'})
+        self.assertEqual(max(chunk['page'] for chunk in metadata.values() if chunk['file'] == 'scaffolding.pdf'), 3)
+
+        query = self.encoder.encode(['formative feedback'])
+        _, ids = index.search(query, 1)
+        self.assertEqual(metadata[int(ids[0][0])]['file'], 'feedback.pdf')
+
+    def test_rerun_only_processes_changes(self):
+        self.write('a.pdf', ['Alpha topic. ' * 40])
+        self.write('b.pdf', ['Beta topic. ' * 40])
+        self.ingest()
+        self.encoder.calls.clear()
+
+        result = self.ingest()
+        self.assertEqual(result['added'], [])
+        self.assertEqual(self.encoder.calls, [])
+
+        self.write('b.pdf', ['Gamma topic, rewritten. ' * 20])
+        self.write('c.pdf', ['Delta topic. ' * 10])
+        os.remove(os.path.join(self.papers, 'a.pdf'))
+        result = self.ingest()
+
+        self.assertEqual(result['added'], ['b.pdf', 'c.pdf'])
+        self.assertEqual(sorted(result['removed']), ['a.pdf', 'b.pdf'])
+        index, metadata = self.load()
+        self.assertEqual(index.ntotal, len(metadata))
+        self.assertEqual({chunk['file'] for chunk in metadata.values()}, {'b.pdf', 'c.pdf'})
+        self.assertTrue(all('Gamma' in chunk['text'] for chunk in metadata.values() if chunk['file'] == 'b.pdf'))
+        self.assertEqual(set(load_manifest(self.paths['manifest_path'])['files']), {'b.pdf', 'c.pdf'})
+
+    def test_interrupted_run_is_redone(self):
+        self.write('a.pdf', ['Alpha topic. ' * 40])
+        self.ingest()
+        manifest = load_manifest(self.paths['manifest_path'])
+        self.write('b.pdf', ['Beta topic. ' * 40])
+        self.ingest()
+        # Simulate a crash between writing the index and the manifest.
+        save_manifest(manifest, self.paths['manifest_path'])
+
+        result = self.ingest()
+        self.assertEqual(result['added'], ['b.pdf'])
+        index, metadata = self.load()
+        self.assertEqual(index.ntotal, len(metadata))
+
+
+class ExtractTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.files = []
+        for i, page_count in enumerate([1, 5, 40]):
+            path = os.path.join(self.dir, f"{i}.pdf")
+            make_pdf(path, [f"File {i} page {page}" for page in range(1, page_count + 1)])
+            self.files.append((f"{i}.pdf", path, file_hash(path)))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_parallel_matches_sequential(self):
+        sequential = list(extract_corpus(self.files, workers=1))
+        parallel = list(extract_corpus(self.files, workers=3, pages_per_task=4))
+        self.assertEqual(parallel, sequential)
+        self.assertEqual([name for name, pages in parallel], ['0.pdf', '1.pdf', '2.pdf'])
+        self.assertEqual(len(parallel[2][1]), 40)
+        self.assertEqual(parallel[2][1][39].strip(), 'File 2 page 40')
+
+    def test_work_in_flight_is_bounded(self):
+        submitted = []
+        consumed = []
+        real_submit = ProcessPoolExecutor.submit
+
+        def submit(executor, fn, task):
+            submitted.append(task)
+            return real_submit(executor, fn, task)
+
+        with mock.patch.object(ProcessPoolExecutor, 'submit', autospec=True, side_effect=submit), \
+                mock.patch('rag.extract.TASKS_PER_WORKER', 1):
+            for name, pages in extract_corpus(self.files, workers=2, pages_per_task=4):
+                consumed.append(len(submitted))
+        # 13 page runs in all, but the first file comes out after only a window's worth were submitted.
+        self.assertEqual(len(submitted), 13)
+        self.assertLessEqual(consumed[0], 4)
+
+    def test_cache_is_read_per_file(self):
+        cache = TextCache(os.path.join(self.dir, 'cache'))
+        list(extract_corpus(self.files, workers=1, cache=cache))
+        reads = []
+        real_get = TextCache.get
+        with mock.patch.object(TextCache, 'get', autospec=True,
+                               side_effect=lambda cache, sha256: reads.append(sha256) or real_get(cache, sha256)):
+            corpus = extract_corpus(self.files, workers=1, cache=cache)
+            next(corpus)
+            self.assertEqual(len(reads), 1)
+            list(corpus)
+        self.assertEqual(len(reads), 3)
+
+    def test_cache_skips_extraction(self):
+        cache = TextCache(os.path.join(self.dir, 'cache'))
+        first = list(extract_corpus(self.files, workers=1, cache=cache))
+        with mock.patch('rag.extract.extract_pages', side_effect=AssertionError("extracted again")):
+            second = list(extract_corpus(self.files, workers=1, cache=cache))
+        self.assertEqual(second, first)
@@ -0,0 +1,147 @@
+import math
+import os
+import shutil
+import tempfile
+from collections import Counter
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from rag.chunk_store import ChunkStore
+from rag.index import load_index
+from rag.ingest import ingest_papers
+from rag.lexical import LexicalIndex, load_lexical_index, tokenize
+from rag.pipeline import RAGPipeline
+from rag.retriever import hybrid_search_documents, is_easy_query, reciprocal_rank_fusion
+from rag.tests.encoders import HashingEncoder
+from rag.tests.pdfs import make_pdf
+from rag.tests.retriever_tests import build_corpus
+
+TEXTS = {
+    10: 'Spacing review sessions improves memory.',
+    11: 'Retrieval practice improves memory more than rereading.',
+    12: 'The ZPD describes what a learner can do with help.',
+    13: 'Feedback, feedback and more feedback.',
+}
+
+
+def bm25(query, texts, k1=1.2, b=0.75):
+    docs = {doc_id: Counter(tokenize(text)) for doc_id, text in texts.items()}
+    average = sum(sum(counts.values()) for counts in docs.values()) / len(docs)
+    scores = {}
+    for doc_id, counts in docs.items():
+        length = sum(counts.values())
+        score = 0.0
+        for term in set(tokenize(query)):
+            n = sum(term in other for other in docs.values())
+            if counts[term]:
+                idf = math.log(1 + (len(docs) - n + 0.5) / (n + 0.5))
+                score += idf * counts[term] * (k1 + 1) / (counts[term] + k1 * (1 - b + b * length / average))
+        scores[doc_id] = score
+    return scores
+
+
+class LexicalIndexTest(SimpleTestCase):
+
+    def setUp(self):
+        self.index = LexicalIndex.build((doc_id, {'text': text}) for doc_id, text in TEXTS.items())
+
+    def test_scores_match_bm25(self):
+        for query in ('improves memory', 'feedback', 'zpd learner help', 'retrieval practice memory'):
+            with self.subTest(query=query):
+                expected = bm25(query, TEXTS)
+                ids, scores = self.index.search(query, top_k=10)
+                self.assertEqual(ids.tolist(), sorted((i for i in expected if expected[i]), key=lambda i: -expected[i]))
+                np.testing.assert_allclose(scores, [expected[i] for i in ids], rtol=1e-5)
+
+    def test_top_k_and_unknown_terms(self):
+        ids, _ = self.index.search('memory', top_k=1)
+        self.assertEqual(len(ids), 1)
+        self.assertEqual(len(self.index.search('photosynthesis')[0]), 0)
+        self.assertEqual(self.index.search('ZPD')[0].tolist(), [12])
+
+    def test_save_and_load(self):
+        path = os.path.join(tempfile.mkdtemp(), 'bm25.npz')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        self.index.save(path)
+        loaded = LexicalIndex.load(path)
+        self.assertEqual(len(loaded), len(TEXTS))
+        for query in ('improves memory', 'feedback'):
+            np.testing.assert_array_equal(loaded.search(query)[0], self.index.search(query)[0])
+        with self.assertLogs('rag.lexical', 'WARNING'):
+            self.assertIsNone(load_lexical_index(path + '.missing'))
+
+    def test_empty_index(self):
+        index = LexicalIndex.build([])
+        self.assertEqual(len(index.search('memory')[0]), 0)
+
+
+class HybridRetrievalTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dir = tempfile.mkdtemp()
+        cls.papers, cls.paths = build_corpus(cls.dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+        super().tearDownClass()
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60)
+        self.assertEqual([doc_id for doc_id, _, _ in fused], [1, 3, 2])
+        self.assertAlmostEqual(fused[0][1], 1 / 61 + 1 / 62)
+        self.assertEqual(fused[2][2], [2, None])
+
+    def test_ingestion_builds_the_index(self):
+        index = load_lexical_index(self.paths['lexical_path'])
+        store = ChunkStore(self.paths['chunks_path'])
+        self.assertEqual(sorted(index.ids.tolist()), [doc_id for doc_id, _ in store.items()])
+        self.assertEqual(store.get(int(index.search('formative')[0][0]))['file'], 'feedback.pdf')
+
+    def test_hybrid_search(self):
+        index, store = load_index(self.paths['index_path']), ChunkStore(self.paths['chunks_path'])
+        lexical = load_lexical_index(self.paths['lexical_path'])
+        queries = ['spacing weeks memory', 'scaffolding independence']
+        encoder = HashingEncoder()
+        results = hybrid_search_documents(queries, encoder.encode(queries), index, lexical, store, top_k=3)
+        self.assertEqual([hits[0]['file'] for hits in results], ['spacing.pdf', 'scaffolding.pdf'])
+        self.assertTrue(all(len(hits) == 3 for hits in results))
+        self.assertTrue(is_easy_query(results[0]))
+        self.assertEqual(results[0][0]['ranks'], {'dense': 1, 'lexical': 1})
+        scores = [hit['score'] for hit in results[0]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_removed_files_leave_the_index(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        papers, paths = build_corpus(path)
+        os.remove(os.path.join(papers, 'feedback.pdf'))
+        make_pdf(os.path.join(papers, 'zpd.pdf'), ['The zone of proximal development guides scaffolding.'])
+        ingest_papers(papers, model=HashingEncoder(), max_tokens=60, workers=1, text_cache_dir=None,
+                      index_type='flat', **paths)
+        lexical = load_lexical_index(paths['lexical_path'])
+        self.assertEqual(len(lexical.search('formative')[0]), 0)
+        store = ChunkStore(paths['chunks_path'])
+        self.assertEqual(store.get(int(lexical.search('proximal')[0][0]))['file'], 'zpd.pdf')
+        self.assertEqual(len(lexical), len(store))
+
+    def test_pipeline_skips_rerank_for_easy_queries(self):
+        encoder = HashingEncoder()
+        with mock.patch('rag.pipeline.load_embedding_model', return_value=encoder), \
+                mock.patch('rag.pipeline.load_reranker_model', return_value=(None, None)), \
+                mock.patch('rag.pipeline.load_reader_model'), \
+                mock.patch('rag.pipeline.rerank', side_effect=lambda query, docs, *args, top_n: docs[:top_n]) as rerank, \
+                mock.patch('rag.pipeline.generate_answer', side_effect=lambda query, docs: docs):
+            pipeline = RAGPipeline(self.paths['index_path'], self.paths['chunks_path'], 'reranker', 'key',
+                                   retrieval_mode='hybrid', lexical_path=self.paths['lexical_path'])
+            answer = pipeline.run('spacing weeks memory', top_k=3, top_n=2)
+            self.assertIn('Spacing', answer[0])
+            rerank.assert_not_called()
+
+            # No BM25 match, so nothing to agree on.
+            pipeline.run('photosynthesis', top_k=3, top_n=2)
+            rerank.assert_called_once()
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from rag import embedding, retriever
+from rag.models import clear_models, get_embedding_model, get_reranker, set_model
+from rag.tests.encoders import HashingEncoder
+
+HEAVY_MODULES = ('torch', 'transformers', 'sentence_transformers', 'faiss', 'openai')
+
+
+class ModelsTest(SimpleTestCase):
+
+    def setUp(self):
+        clear_models()
+        self.addCleanup(clear_models)
+
+    def test_importing_rag_is_cheap(self):
+        code = (
+            "import sys\n"
+            "import rag.pipeline, rag.retriever, rag.embedding, rag.reranker, rag.ingest, rag.service\n"
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=settings.BASE_DIR)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_one_instance_per_process(self):
+        encoder = HashingEncoder()
+        set_model('embedding', 'all-MiniLM-L6-v2', encoder)
+        self.assertIs(get_embedding_model(), encoder)
+        self.assertIs(embedding.load_embedding_model(), encoder)
+        self.assertIs(retriever.load_embedding_model('all-MiniLM-L6-v2'), encoder)
+        self.assertIs(embedding.model, encoder)
+
+    def test_loads_once_on_first_use(self):
+        with mock.patch('rag.models._load_reranker', return_value=('tokenizer', 'model')) as load:
+            with ThreadPoolExecutor(8) as pool:
+                results = list(pool.map(lambda _: get_reranker('cross-encoder'), range(16)))
+        load.assert_called_once_with('cross-encoder')
+        self.assertEqual(set(results), {('tokenizer', 'model')})
@@ -0,0 +1,118 @@
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from rag.pipeline import RAGPipeline
+from rag.query_cache import QueryEmbeddingCache, normalize_query
+from rag.tests.encoders import HashingEncoder
+from rag.tests.retriever_tests import build_corpus
+
+
+class QueryEmbeddingCacheTest(SimpleTestCase):
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query('  Spacing\n effect  '), 'Spacing effect')
+        self.assertEqual(normalize_query('Spacing Effect', lowercase=True), 'spacing effect')
+        # Characters are left as they are: the model may embed 'ﬁ' and 'fi' differently.
+        self.assertEqual(normalize_query('\ufb01rst'), '\ufb01rst')
+
+    def test_repeated_queries_skip_the_encoder(self):
+        encoder = HashingEncoder()
+        cache = QueryEmbeddingCache(encoder, maxsize=10)
+        first = cache.encode(['spacing effect', 'retrieval practice'])
+        second = cache.encode(['retrieval practice', ' spacing  effect', 'interleaving'])
+
+        self.assertEqual(encoder.calls, [2, 1])
+        np.testing.assert_array_equal(second[:2], first[::-1])
+        np.testing.assert_array_equal(cache.encode('interleaving'), encoder.encode('interleaving'))
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_encode_options_are_part_of_the_key(self):
+        encoder = HashingEncoder()
+        cache = QueryEmbeddingCache(encoder, maxsize=10)
+        cache.encode(['spacing'], normalize_embeddings=True)
+        cache.encode(['spacing'], normalize_embeddings=False)
+        cache.encode(['spacing'], normalize_embeddings=True)
+        self.assertEqual(encoder.calls, [1, 1])
+        self.assertEqual(len(cache), 2)
+
+    def test_empty_input(self):
+        encoder = HashingEncoder(dimension=16)
+        cache = QueryEmbeddingCache(encoder, maxsize=10)
+        self.assertEqual(cache.encode([]).shape, (0, 16))
+        self.assertEqual(encoder.calls, [])
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+    def test_counters_add_up_across_threads(self):
+        cache = QueryEmbeddingCache(HashingEncoder(), maxsize=100)
+        queries = [f"query {i % 20}" for i in range(50)]
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(lambda query: cache.encode([query]), queries * 4))
+        self.assertEqual(cache.hits + cache.misses, 200)
+
+    def test_case_folds_only_for_lowercasing_models(self):
+        encoder = HashingEncoder()
+        cache = QueryEmbeddingCache(encoder, maxsize=10)
+        cache.encode(['Spacing', 'spacing'])
+        self.assertEqual(len(cache), 2)
+
+        encoder.tokenizer = SimpleNamespace(do_lower_case=True)
+        cache = QueryEmbeddingCache(encoder, maxsize=10)
+        cache.encode(['Spacing', 'spacing', 'SPACING'])
+        self.assertEqual(len(cache), 1)
+
+    def test_evicts_least_recently_used(self):
+        encoder = HashingEncoder()
+        cache = QueryEmbeddingCache(encoder, maxsize=2)
+        cache.encode(['a'])
+        cache.encode(['b'])
+        cache.encode(['a'])
+        cache.encode(['c'])
+        encoder.calls.clear()
+        cache.encode(['a', 'c'])
+        self.assertEqual(encoder.calls, [])
+        cache.encode(['b'])
+        self.assertEqual(encoder.calls, [1])
+
+
+class RAGPipelineTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        _, paths = build_corpus(self.dir)
+        self.encoder = HashingEncoder()
+        patches = [
+            mock.patch('rag.pipeline.load_embedding_model', return_value=self.encoder),
+            mock.patch('rag.pipeline.load_reranker_model', return_value=(None, None)),
+            mock.patch('rag.pipeline.load_reader_model'),
+            mock.patch('rag.pipeline.rerank', side_effect=lambda query, docs, tokenizer, model, top_n: docs[:top_n]),
+            mock.patch('rag.pipeline.generate_answer', side_effect=lambda query, docs: docs),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.pipeline = RAGPipeline(paths['index_path'], paths['chunks_path'], 'reranker', 'key')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_run_embeds_query_once(self):
+        answer = self.pipeline.run('spacing review memory', top_k=3, top_n=2)
+        self.assertEqual(self.encoder.calls, [1])
+        self.assertEqual(len(answer), 2)
+        self.assertIn('Spacing', answer[0])
+
+        self.assertEqual(self.pipeline.run(' spacing review  memory', top_k=3, top_n=2), answer)
+        self.assertEqual(self.encoder.calls, [1])
+
+    def test_stages_take_precomputed_vectors(self):
+        vectors = self.encoder.encode(['formative feedback', 'scaffolding learners'])
+        docs = self.pipeline.retrieve(vectors, top_k=2)
+        self.assertEqual([hits[0]['file'] for hits in docs], ['feedback.pdf', 'scaffolding.pdf'])
+        self.assertEqual(self.pipeline.rerank('feedback', docs[0], top_n=1), [docs[0][0]['text']])
+        self.assertEqual(self.encoder.calls, [2])
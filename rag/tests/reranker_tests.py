@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+
+import numpy as np
+import torch
+from django.test import SimpleTestCase, override_settings
+
+from rag.reranker import rerank, score_pairs
+from rag.tests.encoders import tiny_cross_encoder
+
+DOCS = [
+    'spacing',
+    'retrieval practice strengthens memory ' * 20,
+    'feedback',
+    'worked examples reduce cognitive load for novices',
+    'interleaving mixes problem types ' * 5,
+]
+
+
+class RerankerTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dir = tempfile.mkdtemp()
+        cls.tokenizer, cls.model = tiny_cross_encoder(cls.dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+        super().tearDownClass()
+
+    def one_by_one(self, query, docs):
+        scores = []
+        with torch.no_grad():
+            for doc in docs:
+                inputs = self.tokenizer(query, doc, return_tensors='pt', truncation=True)
+                scores.append(self.model(**inputs).logits[0, 0].item())
+        return np.array(scores)
+
+    def test_bucketed_scores_match_unpadded(self):
+        expected = self.one_by_one('memory', DOCS)
+        for batch_size in (1, 2, 16):
+            with self.subTest(batch_size=batch_size):
+                np.testing.assert_allclose(score_pairs('memory', DOCS, self.tokenizer, self.model, batch_size=batch_size),
+                                           expected, atol=1e-4)
+
+    def test_rerank_orders_top_n(self):
+        scores = self.one_by_one('memory', DOCS)
+        expected = [DOCS[i] for i in np.argsort(-scores)]
+        self.assertEqual(rerank('memory', DOCS, self.tokenizer, self.model, top_n=3, batch_size=2), expected[:3])
+        self.assertEqual(rerank('memory', DOCS, self.tokenizer, self.model, top_n=10), expected)
+
+    def test_single_and_no_docs(self):
+        self.assertEqual(rerank('memory', ['only one'], self.tokenizer, self.model, top_n=3), ['only one'])
+        self.assertEqual(rerank('memory', [], self.tokenizer, self.model), [])
+
+    @override_settings(RAG={'RERANK_MAX_LENGTH': 16})
+    def test_truncates_long_pairs(self):
+        scores = score_pairs('memory', [DOCS[1], DOCS[1][:40]], self.tokenizer, self.model)
+        self.assertEqual(scores.shape, (2,))
+        self.assertTrue(np.isfinite(scores).all())
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from rag.chunk_store import ChunkStore
+from rag.index import load_index
+from rag.ingest import ingest_papers
+from rag.retriever import add_documents, retrieve_documents, retrieve_documents_batch
+from rag.tests.encoders import HashingEncoder
+from rag.tests.pdfs import make_pdf
+
+TOPICS = {
+    'feedback.pdf': 'Formative feedback during practice helps students correct errors. ',
+    'spacing.pdf': 'Spacing review sessions over weeks improves long term memory. ',
+    'scaffolding.pdf': 'Scaffolding supports learners step by step toward independence. ',
+}
+
+
+def build_corpus(path):
+    """
+    Ingest one small PDF per topic under `path`; returns the papers directory and the ingestion paths.
+    """
+    papers = os.path.join(path, 'papers')
+    os.mkdir(papers)
+    for name, text in TOPICS.items():
+        make_pdf(os.path.join(papers, name), [text * 20] * 2)
+    paths = {
+        'index_path': os.path.join(path, 'faiss.index'),
+        'chunks_path': os.path.join(path, 'chunks.sqlite3'),
+        'manifest_path': os.path.join(path, 'manifest.json'),
+        'lexical_path': os.path.join(path, 'bm25.npz'),
+    }
+    ingest_papers(papers, model=HashingEncoder(), max_tokens=60, workers=1, text_cache_dir=None,
+                  index_type='flat', **paths)
+    return papers, paths
+
+
+class RetrieverTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dir = tempfile.mkdtemp()
+        cls.papers, cls.paths = build_corpus(cls.dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.index = load_index(self.paths['index_path'])
+        self.store = ChunkStore(self.paths['chunks_path'])
+        self.encoder = HashingEncoder()
+
+    def test_batch_matches_single_queries(self):
+        queries = ['formative feedback', 'spacing review memory', 'scaffolding learners', 'feedback errors']
+        expected = [retrieve_documents(query, self.index, self.store, self.encoder, top_k=3) for query in queries]
+        self.encoder.calls.clear()
+
+        results = retrieve_documents_batch(queries, self.index, self.store, self.encoder, top_k=3)
+        self.assertEqual(results, expected)
+        self.assertEqual(self.encoder.calls, [len(queries)])
+        self.assertEqual([docs[0]['file'] for docs in results],
+                         ['feedback.pdf', 'spacing.pdf', 'scaffolding.pdf', 'feedback.pdf'])
+
+    def test_batch_skips_missing_hits(self):
+        results = retrieve_documents_batch(['spacing'], self.index, self.store, self.encoder, top_k=self.index.ntotal + 5)
+        self.assertEqual(len(results[0]), self.index.ntotal)
+        self.assertEqual(retrieve_documents_batch([], self.index, self.store, self.encoder), [])
+
+
+class AddDocumentsTest(SimpleTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.papers, self.paths = build_corpus(self.dir)
+        self.encoder = HashingEncoder()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_add_documents(self):
+        store = ChunkStore(self.paths['chunks_path'])
+        add_documents(['Interleaving mixes problem types within one session.'], load_index(self.paths['index_path']),
+                      self.encoder, store, index_path=self.paths['index_path'],
+                      manifest_path=self.paths['manifest_path'], lexical_path=self.paths['lexical_path'])
+        index = load_index(self.paths['index_path'])
+        self.assertEqual(index.ntotal, len(store))
+        docs = retrieve_documents('interleaving problem types', index, store, self.encoder, top_k=1)
+        self.assertIn('Interleaving', docs[0]['text'])
+
+        # The next ingestion keeps the added document.
+        result = ingest_papers(self.papers, model=self.encoder, max_tokens=60, workers=1, text_cache_dir=None,
+                               index_type='flat', **self.paths)
+        self.assertEqual(result['added'], [])
+        self.assertEqual(load_index(self.paths['index_path']).ntotal, len(store))
+        docs = retrieve_documents('interleaving problem types', index, store, self.encoder, top_k=1)
+        self.assertIn('Interleaving', docs[0]['text'])
@@ -0,0 +1,144 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from rag.models import clear_models, set_model
+from rag.service import RAGService, format_passages, research_context, set_rag_service
+from rag.tests.encoders import HashingEncoder, tiny_cross_encoder
+from rag.tests.retriever_tests import build_corpus
+
+
+class RAGServiceTest(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dir = tempfile.mkdtemp()
+        cls.papers, cls.paths = build_corpus(cls.dir)
+        cls.reranker = tiny_cross_encoder(cls.dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir)
+        super().tearDownClass()
+
+    def setUp(self):
+        clear_models()
+        self.addCleanup(clear_models)
+        self.addCleanup(set_rag_service, None)
+        self.encoder = HashingEncoder()
+        set_model('embedding', 'hashing', self.encoder)
+        set_model('reranker', 'tiny', self.reranker)
+
+    def service(self, **kwargs):
+        paths = {key: self.paths[key] for key in ('index_path', 'chunks_path', 'lexical_path')}
+        return RAGService(**{**paths, 'embedding_model_name': 'hashing', 'reranker_model_name': 'tiny', **kwargs})
+
+    def test_search(self):
+        service = self.service()
+        result = service.search('spacing weeks memory', budget=60, top_k=5, top_n=2)
+        self.assertEqual(len(result['passages']), 2)
+        self.assertEqual(result['skipped'], [])
+        self.assertEqual(set(result['timings']), {'load', 'embed', 'retrieve', 'rerank', 'total'})
+        self.assertEqual(set(service.estimates), {'embed', 'retrieve', 'rerank'})
+
+        # Loaded once: later requests have no load stage and reuse the query embedding.
+        result = service.search('spacing weeks memory', budget=60, top_k=5, top_n=2)
+        self.assertNotIn('load', result['timings'])
+        self.assertEqual(self.encoder.calls, [1])
+
+    def test_hybrid_retrieval(self):
+        with override_settings(RAG={'RETRIEVAL_MODE': 'hybrid'}):
+            service = self.service()
+            result = service.search('spacing weeks memory', budget=60, top_k=3, top_n=3)
+        self.assertEqual(result['passages'][0]['file'], 'spacing.pdf')
+        # Both retrievers agree, so the rerank is left out, but not for the budget.
+        self.assertNotIn('rerank', result['timings'])
+        self.assertEqual(result['skipped'], [])
+
+    def test_budget_runs_out_while_loading(self):
+        service = self.service()
+        release = threading.Event()
+        load = service._load
+        with mock.patch.object(service, '_load', side_effect=lambda: release.wait() and load()):
+            result = service.search('spacing', budget=0)
+            self.assertEqual(result['passages'], [])
+            self.assertEqual(result['skipped'], ['retrieval'])
+            self.assertIn('load', result['timings'])
+            release.set()
+            service.loader.join()
+        self.assertEqual(len(service.search('spacing', budget=60)['passages']), 3)
+
+    def test_slow_stages_are_skipped(self):
+        service = self.service()
+        service.search('feedback', budget=60)
+        service.estimates['rerank'] = 30.0
+        result = service.search('spacing weeks memory', budget=10, top_k=5, top_n=5)
+        self.assertEqual(result['skipped'], ['rerank'])
+        self.assertNotIn('rerank', result['timings'])
+        # Without the rerank, passages keep retrieval order.
+        self.assertEqual(result['passages'][0]['file'], 'spacing.pdf')
+        # Skipped stages' estimates decay, so they get retried.
+        self.assertLess(service.estimates['rerank'], 30.0)
+
+        service.estimates['embed'] = 30.0
+        result = service.search('spacing weeks memory', budget=10)
+        self.assertEqual(result['skipped'], ['retrieval'])
+        self.assertEqual(result['passages'], [])
+
+    def test_missing_index_disables_the_service(self):
+        service = self.service(index_path=f"{self.dir}/missing.index")
+        with self.assertLogs('rag.service', 'INFO') as logs:
+            result = service.search('spacing', budget=60)
+        self.assertEqual(result['passages'], [])
+        self.assertIsInstance(service.error, FileNotFoundError)
+        self.assertIn('RAG context disabled', logs.output[0])
+
+    def test_format_passages(self):
+        passages = [
+            {'file': 'spacing.pdf', 'page': 2, 'text': 'Spacing   review\nsessions helps.'},
+            {'file': 'long.pdf', 'page': None, 'text': 'word ' * 100},
+        ]
+        lines = format_passages(passages, max_chars=40).splitlines()
+        self.assertEqual(lines[0], '[1] (spacing.pdf, p. 2) Spacing review sessions helps.')
+        self.assertTrue(lines[1].startswith('[2] (long.pdf) word word'))
+        self.assertTrue(lines[1].endswith(' ...'))
+        self.assertLessEqual(len(lines[1]), len('[2] (long.pdf) ') + 40 + len(' ...'))
+
+    def test_research_context(self):
+        set_rag_service(self.service())
+        context = research_context('spacing weeks memory', budget=60)
+        self.assertIn('### Research on teaching and learning', context)
+        self.assertIn('spacing.pdf', context)
+        self.assertEqual(research_context('  '), '')
+        with override_settings(RAG={'PROMPT_CONTEXT': False}):
+            self.assertEqual(research_context('spacing weeks memory', budget=60), '')
+
+    def test_research_context_only_uses_full_rankings(self):
+        service = self.service()
+        set_rag_service(service)
+        service.search('feedback', budget=60)
+        service.estimates['rerank'] = 30.0
+        self.assertEqual(research_context('spacing weeks memory', budget=10), '')
+        self.assertEqual(service.contexts, {})
+
+        context = research_context('spacing weeks memory', budget=60)
+        self.assertIn('spacing.pdf', context)
+        # Later requests get the same text, whatever the budget.
+        with mock.patch.object(service, 'search') as search:
+            self.assertEqual(research_context('spacing weeks memory', budget=0), context)
+        search.assert_not_called()
+
+    def test_research_context_while_loading(self):
+        service = self.service()
+        set_rag_service(service)
+        release = threading.Event()
+        load = service._load
+        with mock.patch.object(service, '_load', side_effect=lambda: release.wait() and load()):
+            self.assertEqual(research_context('spacing weeks memory', budget=0), '')
+            release.set()
+            service.loader.join()
+        self.assertIn('spacing.pdf', research_context('spacing weeks memory', budget=60))
@@ -1,9 +1,6 @@
 import pickle
 import logging
 
-def split_text(text, chunk_size=500):
-    return [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-
 def save_pickle(obj, path):
     with open(path, "wb") as f:
         pickle.dump(obj, f)
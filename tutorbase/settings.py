@@ -140,6 +140,86 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 LOGOUT_REDIRECT_URL = "/"
 
+# LLM providers used by utils/AI.py. API keys are read from the named settings,
+# which live in settings_local.py.
+AI_PROVIDERS = {
+    'openai': {
+        'base_url': None,
+        'api_key_setting': 'OPEN_AI',
+        'model': 'gpt-4o-mini',
+    },
+    'openrouter': {
+        'base_url': 'https://openrouter.ai/api/v1',
+        'api_key_setting': 'OPENROUTER_API',
+        'model': 'deepseek/deepseek-chat-v3-0324:free',
+    },
+}
+AI_PROVIDER = 'openrouter'
+
+# Connection pool, timeout and retry options for the shared API clients
+# (see utils/clients.py for the defaults).
+AI_CLIENT = {
+    'timeout': 120.0,
+    'connect_timeout': 10.0,
+    'max_retries': 3,
+    'max_connections': 20,
+    'max_keepalive_connections': 10,
+    'keepalive_expiry': 60.0,
+}
+
+# Cache of AI responses keyed by prompt (see utils/response_cache.py).
+# Set BACKEND to None to disable.
+AI_RESPONSE_CACHE = {
+    'BACKEND': 'utils.response_cache.SQLiteBackend',
+    'TTL': 60 * 60 * 24 * 7,
+    'MAX_ENTRIES': 1000,
+    'OPTIONS': {},
+}
+
+# Maximum simultaneous AI requests, and requests started per second (None for
+# no limit), made by batch generation.
+AI_BATCH_CONCURRENCY = 4
+AI_BATCH_RATE_LIMIT = None
+
+# Per-tutor month summaries for the calendar (see apps/tutor/calendar_service.py).
+# Invalidation only reaches other processes if this alias is a shared cache
+# (Redis, Memcached or the database cache) rather than the local-memory default.
+CALENDAR_CACHE_ALIAS = 'default'
+CALENDAR_CACHE_TIMEOUT = 60 * 60
+
+# Retrieval index for rag/ (see rag/index.py and rag/config.py for defaults).
+# INDEX_TYPE is 'flat' (exact), 'ivf_flat', 'ivf_pq' or 'hnsw'; changing it
+# rebuilds the index on the next ingestion. NPROBE and EF_SEARCH are saved with
+# the index and trade recall for latency (benchmarks/faiss_index_types.py).
+# MMAP_INDEX maps IVF indexes from disk so web workers share one copy
+# (benchmarks/index_memory.py). MODEL_BACKEND runs the embedding and reranker
+# models as 'torch' (fp32), 'int8' (quantized torch) or 'onnx' (needs the
+# optional onnx and onnxruntime packages); benchmarks/model_backends.py shows
+# the speed and accuracy drift of each (see rag/backends.py). Chunks hold at
+# most CHUNK_MAX_TOKENS embedder tokens, cut at sentence boundaries; changing
+# the chunking settings rebuilds the index (see rag/chunking.py).
+# RETRIEVAL_MODE 'hybrid' fuses FAISS and BM25 hits (rag/lexical.py), which
+# ingestion builds, and skips reranking when both agree on the best hit
+# (benchmarks/hybrid_retrieval.py). PROMPT_CONTEXT adds research passages to
+# syllabus and lesson plan prompts; retrieval and reranking are skipped when
+# they would overrun CONTEXT_BUDGET seconds (see rag/service.py).
+RAG = {
+    'INDEX_TYPE': 'flat',
+    'NLIST': 256,
+    'NPROBE': 16,
+    'PQ_M': 16,
+    'HNSW_M': 32,
+    'EF_SEARCH': 64,
+    'MMAP_INDEX': True,
+    'MODEL_BACKEND': 'torch',
+    'CHUNK_MAX_TOKENS': 200,
+    'CHUNK_OVERLAP_TOKENS': 32,
+    'RETRIEVAL_MODE': 'dense',
+    'HYBRID_CANDIDATES': 20,
+    'PROMPT_CONTEXT': True,
+    'CONTEXT_BUDGET': 1.0,
+}
+
 try:
     from .settings_local import *
 except ImportError:
@@ -1,6 +1,7 @@
 import json
-from openai import OpenAI
 from django.conf import settings
+from .clients import get_client
+from .response_cache import get_response_cache
 
 
 class AI:
@@ -10,17 +11,55 @@ class AI:
     This class sends prompts to the ChatGPT API and processes the responses,
     optionally parsing JSON-formatted output.
 
+    The provider is chosen by `settings.AI_PROVIDER`, a key of `settings.AI_PROVIDERS`.
+    Responses are cached by prompt (see utils/response_cache.py); pass
+    `force=True` to skip the cache and always call the API.
+
     Methods:
-        ask_chatgpt(prompt, is_json=True): Sends a prompt to ChatGPT and returns the response.
+        ask(prompt, is_json=True, force=False): Sends a prompt to ChatGPT and returns the response.
+        stream(prompt, force=False): Sends a prompt to ChatGPT and yields the response as it arrives.
     """
 
-    def ask(self, prompt, is_json=True):
+    system_prompt = "You are a helpful assistant for helping teachers generate lesson plans."
+    # Overrides the client's `max_retries` (settings.AI_CLIENT) when set, e.g. 0 for callers that retry themselves.
+    max_retries = None
+    # Waited on before every API call (not for cached responses), e.g. a batch.RateLimiter.
+    rate_limiter = None
+
+    def get_provider(self):
+        """
+        Returns the configuration dict of the active provider.
+        """
+        return settings.AI_PROVIDERS[settings.AI_PROVIDER]
+
+    def get_client(self):
+        """
+        Returns the shared OpenAI-compatible client for the active provider.
+
+        Returns:
+            tuple: (OpenAI client, chat model name)
+        """
+        provider = self.get_provider()
+        api_key = provider.get('api_key') or getattr(settings, provider.get('api_key_setting', ''), None)
+        client = get_client(settings.AI_PROVIDER, api_key, provider.get('base_url'))
+        if self.max_retries is not None:
+            client = client.with_options(max_retries=self.max_retries)
+        return client, provider['model']
+
+    def get_messages(self, prompt):
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+    def ask(self, prompt, is_json=True, force=False):
         """
         Sends a prompt to ChatGPT and retrieves the response.
 
         Args:
             prompt (str): The input text to be sent to ChatGPT.
             is_json (bool): Whether to parse the response as JSON.
+            force (bool): Ignore any cached response for this prompt.
 
         Returns:
             dict or str: Parsed JSON response if `is_json=True`, otherwise the raw text response.
@@ -30,30 +69,23 @@ class AI:
             KeyError: If the expected format is not found in the response.
         """
         print("chatgpt")
-        chatgpt = False
+        client, chat_model = self.get_client()
 
-        if chatgpt:
-            client = OpenAI(
-                api_key=settings.OPEN_AI,
-            )
-            chat_model = "gpt-4o-mini"
-
-        else:
-            client = OpenAI(
-                api_key=settings.OPENROUTER_API,
-                base_url="https://openrouter.ai/api/v1",
-            )  # Initialize OpenAI client
-            chat_model = "deepseek/deepseek-chat-v3-0324:free"
+        cache = get_response_cache()
+        if cache:
+            cached = cache.get(chat_model, self.system_prompt, prompt, force=force)
+            if cached is not None:
+                return cached
 
         # print(prompt)  # Debug: Print the input prompt
 
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+
         # Make the API call
         completion = client.chat.completions.create(
             model=chat_model,
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant for helping teachers generate lesson plans."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=self.get_messages(prompt),
             stream=False
         )
 
@@ -62,4 +94,48 @@ class AI:
         # print(response[0:7])  # Debug: Print first few characters of response
 
         print(response)  # Debug: Print the processed response
+        if cache:
+            cache.set(chat_model, self.system_prompt, prompt, response)
         return response
+
+    def stream(self, prompt, force=False):
+        """
+        Sends a prompt to ChatGPT and yields the response text as it is generated.
+
+        Args:
+            prompt (str): The input text to be sent to ChatGPT.
+            force (bool): Ignore any cached response for this prompt.
+
+        Yields:
+            str: Token deltas in the order they were received. Empty deltas
+            (role headers, finish markers) are skipped. A cached response is
+            yielded as a single chunk.
+        """
+        client, chat_model = self.get_client()
+
+        cache = get_response_cache()
+        if cache:
+            cached = cache.get(chat_model, self.system_prompt, prompt, force=force)
+            if cached is not None:
+                yield cached
+                return
+
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+        completion = client.chat.completions.create(
+            model=chat_model,
+            messages=self.get_messages(prompt),
+            stream=True
+        )
+
+        chunks = []
+        for chunk in completion:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                chunks.append(delta)
+                yield delta
+
+        if cache:
+            cache.set(chat_model, self.system_prompt, prompt, "".join(chunks))
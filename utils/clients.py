@@ -0,0 +1,109 @@
+"""
+Process-wide registry of OpenAI-compatible API clients.
+
+Creating an `OpenAI` client builds a new httpx connection pool, so creating
+one per prompt pays for a fresh TCP/TLS handshake every time. `get_client`
+instead hands out one long-lived client per (provider, base_url, api_key)
+whose pool keeps connections alive between calls.
+
+Pool limits, timeouts and retries come from `settings.AI_CLIENT`. Retries use
+the OpenAI SDK's exponential backoff.
+"""
+import os
+import threading
+
+import httpx
+from openai import OpenAI
+from django.conf import settings
+
+DEFAULT_CLIENT_OPTIONS = {
+    'timeout': 120.0,
+    'connect_timeout': 10.0,
+    'max_retries': 3,
+    'max_connections': 20,
+    'max_keepalive_connections': 10,
+    'keepalive_expiry': 60.0,
+}
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client_options():
+    """
+    Returns the client options, with `settings.AI_CLIENT` applied over the defaults.
+    """
+    return {**DEFAULT_CLIENT_OPTIONS, **getattr(settings, 'AI_CLIENT', {})}
+
+
+def build_client(api_key, base_url=None, options=None):
+    """
+    Create a new OpenAI client with its own pooled httpx transport.
+
+    Args:
+        api_key (str): The provider API key.
+        base_url (str, optional): The API root, or None for api.openai.com.
+        options (dict, optional): Overrides for the pool/timeout/retry options.
+
+    Returns:
+        OpenAI: The new client.
+    """
+    options = {**get_client_options(), **(options or {})}
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=options['max_connections'],
+            max_keepalive_connections=options['max_keepalive_connections'],
+            keepalive_expiry=options['keepalive_expiry'],
+        ),
+        timeout=httpx.Timeout(options['timeout'], connect=options['connect_timeout']),
+    )
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        max_retries=options['max_retries'],
+        http_client=http_client,
+    )
+
+
+def get_client(provider, api_key, base_url=None):
+    """
+    Return the shared client for a provider, creating it on first use.
+
+    Args:
+        provider (str): The provider name from `settings.AI_PROVIDERS`.
+        api_key (str): The provider API key.
+        base_url (str, optional): The API root, or None for api.openai.com.
+
+    Returns:
+        OpenAI: A client that is reused by every later call with the same arguments.
+    """
+    key = (provider, base_url, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = build_client(api_key, base_url)
+    return client
+
+
+def reset_clients():
+    """
+    Close and forget every shared client.
+    """
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def _reset_after_fork():
+    # Sockets must not be shared between a forked worker and its parent, and
+    # the lock may have been held by a thread that does not exist in the child.
+    global _lock
+    _lock = threading.Lock()
+    _clients.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,19 +1,59 @@
-#from rag.pipeline import RAGPipeline
+from rag.service import research_context
 from .AI import AI
-from django.conf import settings
 
 
 class LessonPlanHelper(AI):
 
-    def generate(self, section, session_number, syllabus_content):
+    def build_student_context(self, section):
         """
-        Generate a detailed lesson plan for a specific session.
-        
+        Describe the section's students for the prompt.
+
+        The result is the same for every lesson of a section, so callers
+        generating many plans can build it once and pass it to `build_prompt`.
+        """
+        context = ""
+        for i, student in enumerate(section.students.all(), start=1):
+            context += f"""
+Student {i}:
+- Goal & Expectations: {student.goals or "Not provided"}
+- Current Grade/Level: {student.current_grades or "Not provided"}
+- Weak Areas: {student.weak_areas or "Not provided"}
+- Language: {student.language or "Unknown"}
+- Country: {student.country or "Unknown"}
+- Personality: {student.personality or "Not provided"}
+- Interests: {student.interests or "Not provided"}
+- Hobbies: {student.hobbies or "Not provided"}
+"""
+        return context
+
+    def build_research_context(self, section):
+        """
+        Research passages on running lessons for the section, from the shared RAG service (rag/service.py).
+
+        Like `build_student_context`, the result is the same for every lesson of a section.
+        Returns an empty string when RAG is not set up or its time budget runs out.
+        """
+        query = " ".join(str(part) for part in (
+            section.subject, section.theme, section.level, "lesson activities, practice and assessment",
+        ) if part)
+        return research_context(query)
+
+    def build_prompt(self, section, session_number, syllabus_content, student_context=None, research=None):
+        """
+        Build the lesson plan prompt for a specific session.
+
         Args:
             section: The section object containing course and student information
             session_number: The session number to generate a plan for
             syllabus_content: The content of the syllabus to ensure consistency
+            student_context: Output of `build_student_context`, if already built
+            research: Output of `build_research_context`, if already built
         """
+        if student_context is None:
+            student_context = self.build_student_context(section)
+        if research is None:
+            research = self.build_research_context(section)
+
         prompt = f"""
 You are an expert teacher and lesson planner. You are creating a lesson plan for student.
 
@@ -25,24 +65,12 @@ Level: {section.level}
 
 Here is the student's information:
 """
-
-        for i, student in enumerate(section.students.all(), start=1):
-            prompt += f"""
-Student {i}:
-- Goal & Expectations: {student.goals or "Not provided"}
-- Current Grade/Level: {student.current_grades or "Not provided"}
-- Weak Areas: {student.weak_areas or "Not provided"}
-- Language: {student.language or "Unknown"}
-- Country: {student.country or "Unknown"}
-- Personality: {student.personality or "Not provided"}
-- Interests: {student.interests or "Not provided"}
-- Hobbies: {student.hobbies or "Not provided"}
-"""
+        prompt += student_context
 
         prompt += f"""
 Here is the course syllabus for reference:
 {syllabus_content}
-
+{research}
 ### Your Task:
 Please follow the instructions below and write your response in **plain text only**.
 Do not use markdown formatting like asterisks (**), hashtags (#), or heading styles. 
@@ -105,9 +133,21 @@ Create a detailed lesson plan for Session {session_number} that includes:
 - Make it practical and age-appropriate
 - Ensure smooth transitions between activities
 """
+        return prompt
+
+    def generate(self, section, session_number, syllabus_content, force=False):
+        """
+        Generate a detailed lesson plan for a specific session.
+        
+        Args:
+            section: The section object containing course and student information
+            session_number: The session number to generate a plan for
+            syllabus_content: The content of the syllabus to ensure consistency
+            force: Skip the response cache and always call the model
+        """
+        prompt = self.build_prompt(section, session_number, syllabus_content)
 
-        #response = self.pipeline.run(prompt)
-        response = self.ask(prompt)
+        response = self.ask(prompt, force=force)
         print(response)
 
         # Validate response and ensure correct output format
@@ -115,3 +155,15 @@ Create a detailed lesson plan for Session {session_number} that includes:
             return response
         print("fail")
         return None  # Return None if response is invalid
+
+    def generate_stream(self, section, session_number, syllabus_content, force=False):
+        """
+        Generate a lesson plan, yielding the text as the model produces it.
+
+        Args:
+            section: The section object containing course and student information
+            session_number: The session number to generate a plan for
+            syllabus_content: The content of the syllabus to ensure consistency
+            force: Skip the response cache and always call the model
+        """
+        yield from self.stream(self.build_prompt(section, session_number, syllabus_content), force=force)
@@ -0,0 +1,405 @@
+"""
+Content-addressed cache of AI responses.
+
+Responses are stored under a SHA-256 of (model, system prompt, user prompt),
+so regenerating a syllabus from unchanged inputs is answered from the cache
+instead of the API. The storage backend is configured by
+`settings.AI_RESPONSE_CACHE`:
+
+    AI_RESPONSE_CACHE = {
+        'BACKEND': 'utils.response_cache.SQLiteBackend',  # or None to disable
+        'TTL': 60 * 60 * 24 * 7,   # seconds
+        'MAX_ENTRIES': 1000,       # least recently used entries are evicted
+        'OPTIONS': {},             # passed to the backend
+    }
+
+Hit / miss / bypass counters are kept by the backend itself so they add up
+across web and worker processes; see the `ai_cache_stats` management command.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files import locks
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+STAT_NAMES = ('hits', 'misses', 'bypasses')
+
+
+def make_key(model, system_prompt, prompt):
+    """
+    Returns the cache key for a chat request.
+    """
+    payload = json.dumps([model, system_prompt, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class BaseBackend:
+    """
+    Interface every response cache backend implements.
+
+    Args:
+        ttl (int): Seconds an entry stays valid.
+        max_entries (int): Entries kept before the least recently used are evicted.
+    """
+
+    def __init__(self, ttl, max_entries, **options):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def incr_stat(self, name):
+        raise NotImplementedError
+
+    def get_stats(self):
+        raise NotImplementedError
+
+    def reset_stats(self):
+        raise NotImplementedError
+
+
+class DjangoCacheBackend(BaseBackend):
+    """
+    Stores responses in one of the project's Django caches.
+
+    TTL is passed as the cache timeout; eviction follows the cache's own
+    policy (LocMemCache evicts least recently used entries past MAX_ENTRIES,
+    which should then be set in CACHES[alias]['OPTIONS']). Use a dedicated
+    alias: `clear()` clears the whole cache.
+    """
+    prefix = 'ai-response:'
+
+    def __init__(self, ttl, max_entries, alias='default', **options):
+        super().__init__(ttl, max_entries)
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.cache.set(self.prefix + key, value, timeout=self.ttl)
+
+    def clear(self):
+        self.cache.clear()
+
+    def incr_stat(self, name):
+        stat_key = self.prefix + 'stat:' + name
+        if self.cache.add(stat_key, 1, timeout=None):
+            return
+        try:
+            self.cache.incr(stat_key)
+        except ValueError:
+            self.cache.set(stat_key, 1, timeout=None)
+
+    def get_stats(self):
+        return {name: self.cache.get(self.prefix + 'stat:' + name, 0) for name in STAT_NAMES}
+
+    def reset_stats(self):
+        self.cache.delete_many([self.prefix + 'stat:' + name for name in STAT_NAMES])
+
+
+class SQLiteBackend(BaseBackend):
+    """
+    Stores responses in a small SQLite database shared by all processes.
+
+    Writes evict the least recently used entries beyond `max_entries`. To keep
+    hits from taking SQLite's write lock, a read refreshes the entry's access
+    time only once it is `touch_interval` seconds old, and counters are
+    gathered in memory and added to the table with the next write, or at most
+    `stats_interval` seconds later.
+
+    Args:
+        path (str, optional): The database file.
+        touch_interval (float): Granularity of the least-recently-used order, in seconds.
+        stats_interval (float): Longest a process holds counts before writing them;
+            counts still held when a process exits are lost.
+    """
+
+    def __init__(self, ttl, max_entries, path=None, touch_interval=60, stats_interval=10, **options):
+        super().__init__(ttl, max_entries)
+        self.path = str(path or settings.BASE_DIR / 'ai_response_cache.sqlite3')
+        self.touch_interval = touch_interval
+        self.stats_interval = stats_interval
+        self.local = threading.local()
+        self.stats_lock = threading.Lock()
+        self.pending_stats = Counter()
+        self.stats_written_at = time.monotonic()
+        with self.connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.path, timeout=10)
+        return conn
+
+    def get(self, key):
+        now = time.time()
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT value, accessed_at FROM responses WHERE key = ? AND created_at > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now - self.touch_interval:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.write_stats(conn)
+
+    def clear(self):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def write_stats(self, conn):
+        """
+        Adds the counts gathered since the last write, inside `conn`'s transaction.
+        """
+        with self.stats_lock:
+            pending, self.pending_stats = self.pending_stats, Counter()
+            self.stats_written_at = time.monotonic()
+        conn.executemany(
+            "INSERT INTO stats (name, value) VALUES (?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            pending.items(),
+        )
+
+    def incr_stat(self, name):
+        with self.stats_lock:
+            self.pending_stats[name] += 1
+            due = time.monotonic() - self.stats_written_at >= self.stats_interval
+        if due:
+            with self.connect() as conn:
+                self.write_stats(conn)
+
+    def get_stats(self):
+        with self.connect() as conn:
+            self.write_stats(conn)
+            stored = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        return {name: stored.get(name, 0) for name in STAT_NAMES}
+
+    def reset_stats(self):
+        with self.connect() as conn:
+            with self.stats_lock:
+                self.pending_stats.clear()
+            conn.execute("DELETE FROM stats")
+
+
+class FileBackend(BaseBackend):
+    """
+    Stores one file per response in a directory.
+
+    File modification times double as access times: reads touch the file and
+    writes evict the oldest files beyond `max_entries`. Each counter is a small
+    file holding its value in decimal, rewritten under an exclusive file lock
+    so that processes sharing the directory do not lose increments.
+    """
+
+    def __init__(self, ttl, max_entries, path=None, **options):
+        super().__init__(ttl, max_entries)
+        self.path = str(path or settings.BASE_DIR / 'ai_response_cache')
+        os.makedirs(os.path.join(self.path, 'stats'), exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key + '.txt')
+
+    def entries(self):
+        return [entry for entry in os.scandir(self.path) if entry.name.endswith('.txt')]
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                created_at = float(f.readline())
+                value = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        now = time.time()
+        if created_at <= now - self.ttl:
+            return None
+        os.utime(path, (now, now))
+        return value
+
+    def set(self, key, value):
+        now = time.time()
+        path = self.entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f"{now}\n{value}")
+        os.utime(tmp_path, (now, now))
+        os.replace(tmp_path, path)
+
+        entries = self.entries()
+        if len(entries) > self.max_entries:
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - self.max_entries]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def clear(self):
+        for entry in self.entries():
+            os.remove(entry.path)
+
+    def stat_path(self, name):
+        return os.path.join(self.path, 'stats', name)
+
+    @staticmethod
+    def read_stat(f):
+        f.seek(0)
+        data = f.read().strip()
+        # Counters written before they were stored as numbers hold one byte per event.
+        return int(data) if data.isdigit() else len(data)
+
+    def incr_stat(self, name):
+        with open(self.stat_path(name), 'a+b') as f:
+            locks.lock(f, locks.LOCK_EX)
+            try:
+                value = self.read_stat(f) + 1
+                f.truncate(0)
+                f.write(str(value).encode())
+                f.flush()
+            finally:
+                locks.unlock(f)
+
+    def get_stats(self):
+        stats = {}
+        for name in STAT_NAMES:
+            try:
+                with open(self.stat_path(name), 'rb') as f:
+                    locks.lock(f, locks.LOCK_SH)
+                    try:
+                        stats[name] = self.read_stat(f)
+                    finally:
+                        locks.unlock(f)
+            except FileNotFoundError:
+                stats[name] = 0
+        return stats
+
+    def reset_stats(self):
+        # Truncated rather than removed, so a process waiting on the lock
+        # does not go on to update a file that is no longer in the directory.
+        for name in STAT_NAMES:
+            try:
+                with open(self.stat_path(name), 'r+b') as f:
+                    locks.lock(f, locks.LOCK_EX)
+                    try:
+                        f.truncate(0)
+                    finally:
+                        locks.unlock(f)
+            except FileNotFoundError:
+                pass
+
+
+class ResponseCache:
+    """
+    Looks up and records AI responses, counting hits, misses and bypasses.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, model, system_prompt, prompt, force=False):
+        """
+        Returns the cached response, or None on a miss or when `force` is set.
+        """
+        if force:
+            self.backend.incr_stat('bypasses')
+            return None
+        value = self.backend.get(make_key(model, system_prompt, prompt))
+        self.backend.incr_stat('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, model, system_prompt, prompt, value):
+        if value:
+            self.backend.set(make_key(model, system_prompt, prompt), value)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """
+        Returns the hit / miss / bypass counters and the hit rate.
+        """
+        stats = self.backend.get_stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        self.backend.reset_stats()
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """
+    Returns the configured response cache, or None if caching is disabled.
+    """
+    global _response_cache
+    config = getattr(settings, 'AI_RESPONSE_CACHE', None) or {}
+    if not config.get('BACKEND'):
+        return None
+    if _response_cache is None:
+        backend_class = import_string(config['BACKEND'])
+        backend = backend_class(
+            ttl=config.get('TTL', 60 * 60 * 24 * 7),
+            max_entries=config.get('MAX_ENTRIES', 1000),
+            **config.get('OPTIONS', {}),
+        )
+        _response_cache = ResponseCache(backend)
+    return _response_cache
+
+
+@receiver(setting_changed)
+def reset_response_cache(setting, **kwargs):
+    global _response_cache
+    if setting == 'AI_RESPONSE_CACHE':
+        _response_cache = None
+
+
+def _reset_after_fork():
+    # Forked workers must open their own SQLite connections.
+    global _response_cache
+    _response_cache = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,27 +1,29 @@
-#from rag.pipeline import RAGPipeline
-from django.conf import settings
+from rag.service import research_context
 from .AI import AI
 
 
 class SyllabusHelper(AI):
-    # def __init__(self):
-    #     # rag/pipeline의 RAGPipeline 사용
-    #     self.pipeline = RAGPipeline(
-    #         vector_db_path="rag/vectorDB/faiss_index.index",
-    #         docs_path="rag/vectorDB/metadata.pkl",
-    #         reranker_model_name="cross-encoder/ms-marco-MiniLM-L-6-v2",
-    #         openai_api_key=settings.OPENROUTER_API
-    #     )
-
-    def generate(self, section):
+
+    def build_research_context(self, section):
         """
-        Generate a personalized curriculum syllabus for private tutor.
+        Research passages on teaching the section's subject, from the shared RAG service (rag/service.py).
+
+        Returns an empty string when RAG is not set up or its time budget runs out.
+        """
+        query = " ".join(str(part) for part in (
+            section.subject, section.theme, section.level, section.goals, section.student_characteristics,
+        ) if part)
+        return research_context(query)
+
+    def build_prompt(self, section):
+        """
+        Build the syllabus prompt for a section.
 
         Args:
             section: The section object containing course and student information.
 
         Returns:
-            str or None: Generated syllabus text, or None if generation failed.
+            str: The prompt to send to the model.
         """
         prompt = f"""
 You are an expert teacher and curriculum designer. You are creating a personalized curriculum syllabus
@@ -52,6 +54,8 @@ Student {i}:
 - Student Interests and Hobbies:  {student.interests or "Not provided"}, {student.hobbies or "Not provided"}
 """
 
+        prompt += self.build_research_context(section)
+
         prompt += """
 ### Your Task:
 Please follow the instructions below and write your response in **plain text only**.
@@ -74,11 +78,37 @@ You may use numbered lists (1., 2., etc.) and dashes (-) to organize your respon
 - Assume no prior knowledge unless stated.
 - Make it practical and age-appropriate.
 """
+        return prompt
+
+    def generate(self, section, force=False):
+        """
+        Generate a personalized curriculum syllabus for private tutor.
 
-        #response = self.pipeline.run(prompt)
-        response = self.ask(prompt)
+        Args:
+            section: The section object containing course and student information.
+            force: Skip the response cache and always call the model.
+
+        Returns:
+            str or None: Generated syllabus text, or None if generation failed.
+        """
+        prompt = self.build_prompt(section)
+
+        response = self.ask(prompt, force=force)
 
         # Validate response and ensure correct output format
         if response:
             return response
         return None  # Return None if response is invalid
+
+    def generate_stream(self, section, force=False):
+        """
+        Generate a syllabus, yielding the text as the model produces it.
+
+        Args:
+            section: The section object containing course and student information.
+            force: Skip the response cache and always call the model.
+
+        Yields:
+            str: Chunks of syllabus text.
+        """
+        yield from self.stream(self.build_prompt(section), force=force)